@@ -0,0 +1,185 @@
+"""
+검사 결과 집계
+
+검사 결과가 저장소 인덱스에 반영될 때마다 지표별 누적 통계(개수, 평균, 분산, 최소/최대, 백분위수)를
+연령대·성별 그룹별로 갱신합니다. 백분위수는 고정 구간 히스토그램으로 근사하므로
+조회 비용과 메모리가 저장된 검사 수와 관계없이 일정합니다.
+
+저장소는 누적 상태(state())를 어디까지 반영했는지와 함께 체크포인트로 저장해 두고, 시작할 때
+load_state()로 되살린 뒤 그 이후의 레코드만 반영합니다. (storage.ResultStore, sql_store.SqlResultStore)
+"""
+import math
+import threading
+
+# 검사 유형별 지표: 이름 -> (값 추출 함수, 히스토그램 하한, 상한, 구간 폭)
+METRICS = {
+    "sequence": {
+        "final_level": (lambda t: t.get('final_level'), 0, 20, 1),
+    },
+    "card_matching": {
+        "total_time": (lambda t: sum(level.get('time_taken') or 0 for level in t.get('result') or []), 0, 1200, 1),
+    },
+    "trail_making": {
+        "testA_time": (lambda t: (t.get('result') or {}).get('testA_time'), 0, 600, 1),
+        "testB_time": (lambda t: (t.get('result') or {}).get('testB_time'), 0, 600, 1),
+        "testA_errors": (lambda t: (t.get('result') or {}).get('testA_errors'), 0, 50, 1),
+        "testB_errors": (lambda t: (t.get('result') or {}).get('testB_errors'), 0, 50, 1),
+    },
+    "stroop": {
+        "avg_response_time_ms": (lambda t: _stroop_summary(t).get('avg_response_time_ms'), 0, 5000, 10),
+        "overall_error_rate_percent": (lambda t: _stroop_summary(t).get('overall_error_rate_percent'), 0, 100, 1),
+        "no_response_error_rate_percent": (lambda t: _stroop_summary(t).get('no_response_error_rate_percent'), 0, 100, 1),
+        "false_positive_error_rate_percent": (lambda t: _stroop_summary(t).get('false_positive_error_rate_percent'), 0, 100, 1),
+    },
+    "pattern": {
+        "total_score": (lambda t: (t.get('result') or {}).get('total_score'), 0, 50, 1),
+    },
+}
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# 체크포인트 형식 버전. METRICS의 지표나 히스토그램 구간을 바꾸면 올려서 이전 체크포인트를 버리게 한다.
+STATE_VERSION = 1
+
+
+def _stroop_summary(test):
+    return (test.get('result') or {}).get('summary') or {}
+
+
+def age_band(age):
+    """나이를 10년 단위 연령대 문자열로 바꿉니다. (예: '73' -> '70대')"""
+    try:
+        return f"{int(float(age)) // 10 * 10}대"
+    except (TypeError, ValueError):
+        return "unknown"
+
+
+class RunningStat:
+    """Welford 방식 누적 평균/분산과 고정 구간 히스토그램"""
+
+    def __init__(self, low, high, width):
+        self.low, self.high, self.width = low, high, width
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.bins = [0] * (int(math.ceil((high - low) / width)) + 1)
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        index = int((min(max(value, self.low), self.high) - self.low) // self.width)
+        self.bins[min(index, len(self.bins) - 1)] += 1
+
+    def percentile(self, q):
+        """히스토그램 구간 안에서 선형 보간한 q 백분위수"""
+        if not self.count:
+            return None
+        target = self.count * q / 100
+        seen = 0
+        for index, n in enumerate(self.bins):
+            if n and seen + n >= target:
+                value = self.low + (index + (target - seen) / n) * self.width
+                return round(min(max(value, self.min), self.max), 2)
+            seen += n
+        return self.max
+
+    def state(self):
+        return [self.count, self.mean, self.m2, self.min, self.max, self.bins]
+
+    def load_state(self, state):
+        count, mean, m2, minimum, maximum, bins = state
+        if len(bins) != len(self.bins):
+            raise ValueError("히스토그램 구간 수가 다릅니다.")
+        self.count, self.mean, self.m2, self.min, self.max, self.bins = count, mean, m2, minimum, maximum, list(bins)
+
+    def to_dict(self):
+        variance = self.m2 / (self.count - 1) if self.count > 1 else 0.0
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 2) if self.count else None,
+            "variance": round(variance, 2),
+            "std": round(math.sqrt(variance), 2),
+            "min": self.min,
+            "max": self.max,
+            "percentiles": {f"p{q}": self.percentile(q) for q in PERCENTILES},
+        }
+
+
+class CohortAggregates:
+    """검사 유형·지표·그룹별 누적 통계. ResultStore에 구독자로 등록해서 사용합니다."""
+
+    GROUPINGS = ("all", "age_band", "gender")
+    checkpoint_name = "cohort_aggregates"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """저장소 인덱스를 처음부터 다시 만들 때 호출됩니다."""
+        self._stats = {}   # (test_type, metric, grouping, group) -> RunningStat
+
+    def _stat(self, test_type, metric, grouping, group):
+        key = (test_type, metric, grouping, group)
+        stat = self._stats.get(key)
+        if stat is None:
+            _, low, high, width = METRICS[test_type][metric]
+            stat = self._stats[key] = RunningStat(low, high, width)
+        return stat
+
+    def add(self, test, participant):
+        """검사 레코드 한 건을 반영합니다."""
+        test_type = test.get('test_type')
+        if test_type not in METRICS:
+            return
+        participant = participant or {}
+        groups = {"all": "all", "age_band": age_band(participant.get('age')),
+                  "gender": participant.get('gender') or "unknown"}
+        with self._lock:
+            for metric, (extract, _, _, _) in METRICS[test_type].items():
+                try:
+                    value = extract(test)
+                    value = float(value) if value is not None else None
+                except (TypeError, ValueError, AttributeError):
+                    value = None
+                if value is None:
+                    continue
+                for grouping, group in groups.items():
+                    self._stat(test_type, metric, grouping, group).add(value)
+
+    def state(self):
+        """체크포인트에 저장할 누적 상태"""
+        with self._lock:
+            return {"version": STATE_VERSION,
+                    "stats": [list(key) + [stat.state()] for key, stat in self._stats.items()]}
+
+    def load_state(self, state):
+        """state()로 저장한 누적 상태를 되살립니다. 형식이 맞지 않으면 ValueError."""
+        if state.get('version') != STATE_VERSION:
+            raise ValueError("체크포인트 형식 버전이 다릅니다.")
+        stats = {}
+        try:
+            for test_type, metric, grouping, group, values in state['stats']:
+                _, low, high, width = METRICS[test_type][metric]
+                stat = stats[(test_type, metric, grouping, group)] = RunningStat(low, high, width)
+                stat.load_state(values)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"체크포인트를 읽을 수 없습니다: {e!r}")
+        with self._lock:
+            self._stats = stats
+
+    def summary(self, test_type=None, grouping="all"):
+        """{test_type: {metric: {group: 통계}}} 형태로 돌려줍니다."""
+        result = {}
+        with self._lock:
+            for (t, metric, g, group), stat in self._stats.items():
+                if g != grouping or (test_type and t != test_type):
+                    continue
+                result.setdefault(t, {}).setdefault(metric, {})[group] = stat.to_dict()
+        return result
@@ -1,56 +1,323 @@
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for, send_file
-import random
+from flask import Flask, render_template, jsonify, request, session, redirect, url_for, Response, stream_with_context, g, make_response
+import functools
+import time
+import uuid
 from datetime import datetime, timedelta
 import os
 import json
+import click
+
+import assets
+import events
+import exporters
+from stroop import process_stroop_result, compact_result, pack_trials
+from aggregates import CohortAggregates
+from flask_migrate import Migrate
+from ingest import IngestQueue, make_entry
+import problems
+from longitudinal import ParticipantSummaries
+from metrics import registry as metrics
+from models import NAME_MAX_LENGTH, db
+from server_session import ServerSideSessionInterface, make_backend
+from submissions import NEW, DONE, make_submission_log
+from storage import ResultStore
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
 app.permanent_session_lifetime = timedelta(minutes=30)
 
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "w123456789")
 
 # --- 데이터베이스 설정 ---
-INSTANCE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
-DATABASE_FILE = os.path.join(INSTANCE_FOLDER, 'database.json')
+INSTANCE_FOLDER = os.environ.get("INSTANCE_FOLDER", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance'))
+SECRET_KEY_FILE = os.path.join(INSTANCE_FOLDER, 'secret_key')
+DATABASE_FILE = os.path.join(INSTANCE_FOLDER, 'database.json')  # 이전 형식 (import-json 명령으로 가져오기)
+STORE_FOLDER = os.path.join(INSTANCE_FOLDER, 'store')
+INGEST_FOLDER = os.path.join(INSTANCE_FOLDER, 'ingest')
+EVENTS_FOLDER = os.path.join(INSTANCE_FOLDER, 'events')  # 검사 중 이벤트 기록 (결과 저장소와 별도)
+EVENT_BATCH_MAX_BYTES = 256 * 1024
+
+# --- 관계형 데이터베이스 설정 (STORAGE_BACKEND=sql) ---
+# 로컬에서는 instance/results.db(SQLite), 운영 환경에서는 DATABASE_URL(PostgreSQL)을 쓴다.
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "jsonl")
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///" + os.path.join(INSTANCE_FOLDER, 'results.db'))
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = "postgresql://" + DATABASE_URL[len("postgres://"):]
+app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+if not DATABASE_URL.startswith("sqlite"):
+    # 워커마다 연결을 재사용하고, 끊긴 연결은 꺼내기 전에 확인한다.
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+os.makedirs(INSTANCE_FOLDER, exist_ok=True)
+db.init_app(app)
+
+def load_secret_key():
+    """
+    세션 서명 키. SECRET_KEY 환경 변수를 쓰고, 없으면 instance/secret_key 파일(없으면 새로 만듦)을 씁니다.
+
+    워커마다 키가 다르면 다른 워커로 간 요청에서 세션이 풀리므로 모든 워커와 재시작 뒤에도 같은 키를 씁니다.
+    """
+    key = os.environ.get("SECRET_KEY")
+    if key:
+        return key
+    try:
+        with open(SECRET_KEY_FILE, encoding='ascii') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    # 여러 워커가 동시에 만들어도 먼저 링크한 한 파일만 남는다.
+    temp_path = f"{SECRET_KEY_FILE}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='ascii') as f:
+        f.write(os.urandom(32).hex())
+    os.chmod(temp_path, 0o600)
+    try:
+        os.link(temp_path, SECRET_KEY_FILE)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(temp_path)
+    with open(SECRET_KEY_FILE, encoding='ascii') as f:
+        return f.read().strip()
+
+app.secret_key = load_secret_key()
+migrate = Migrate(app, db)
+
+# --- 측정값 (/metrics) ---
+# 워커마다 instance/metrics에 스냅숏을 쓰고, /metrics는 모든 워커의 값을 합쳐 내보낸다.
+METRICS_PASSWORD = os.environ.get("METRICS_PASSWORD", ADMIN_PASSWORD)
+metrics.configure(os.path.join(INSTANCE_FOLDER, 'metrics'))
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get('request_start')
+    if start is not None:
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - start,
+                        endpoint=request.endpoint or 'unknown', method=request.method,
+                        status=response.status_code)
+    cookie = request.cookies.get(app.config['SESSION_COOKIE_NAME'])
+    if cookie:
+        metrics.observe('session_cookie_bytes', len(cookie))
+    metrics.flush()
+    return response
+
+# --- 정적 파일 (flask assets-build로 만든 해시 이름 사본) ---
+# 빌드된 사본이 있으면 템플릿의 url_for('static', ...)이 /assets/의 해시 이름 주소를 만든다.
+ASSETS_FOLDER = os.path.join(app.root_path, 'static_dist')
+asset_manifest = assets.AssetManifest(ASSETS_FOLDER)
+
+@app.route('/assets/<path:filename>')
+def asset_file(filename):
+    return assets.send_asset(ASSETS_FOLDER, filename)
+
+def asset_url_for(endpoint, **values):
+    if endpoint == 'static' and not app.debug:
+        hashed = asset_manifest.lookup(values.get('filename'))
+        if hashed:
+            endpoint, values['filename'] = 'asset_file', hashed
+    return url_for(endpoint, **values)
+
+app.jinja_env.globals['url_for'] = asset_url_for
+
+# --- 세션 저장소 설정 (sqlite, memory, cookie) ---
+# cookie는 Flask 기본 쿠키 세션이고, 나머지는 쿠키에 세션 ID만 담는다.
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "sqlite")
+if SESSION_BACKEND != "cookie":
+    app.session_interface = ServerSideSessionInterface(make_backend(SESSION_BACKEND, INSTANCE_FOLDER))
+
+# --- 관리자 화면에 표시할 검사 유형 ---
+TEST_TYPE_LABELS = {
+    "sequence": "순서 기억 검사",
+    "card_matching": "카드 짝 맞추기 검사",
+    "trail_making": "트레일 메이킹 테스트",
+    "stroop": "스트룹 테스트",
+    "pattern": "도형 패턴 인지 테스트",
+}
 
 # --- 순서 기억 검사의 최대 레벨 설정 ---
 SEQUENCE_MAX_LEVEL = 12 
 
-def load_database():
-    """통합 데이터베이스 파일을 불러옵니다."""
-    os.makedirs(INSTANCE_FOLDER, exist_ok=True)
-    if not os.path.exists(DATABASE_FILE):
-        return {"users": []}
-    try:
-        with open(DATABASE_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-            if not content:
-                return {"users": []}
-            return json.loads(content)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {"users": []}
-
-def save_database(data):
-    """통합 데이터베이스 파일을 저장합니다."""
-    os.makedirs(INSTANCE_FOLDER, exist_ok=True)
-    with open(DATABASE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-        
+# --- 도형 패턴 인지 테스트의 레벨 수 (static/js/pattern_test.js의 LEVEL_CONFIG와 같아야 함) ---
+PATTERN_MAX_LEVEL = 3
+
+# 상자 배치는 시작할 때(warm_caches) 레벨별(상자 수별)로 미리 만들어 두고 요청마다 하나씩 꺼내 쓴다.
+# 배치 묶음은 seed로 고정되어 있어 (생성기 버전, 레벨, seed)만으로 같은 문제를 다시 만들 수 있다.
+layout_pool = problems.layout_pool
+
+if STORAGE_BACKEND == "sql":
+    from sql_store import SqlResultStore
+    store = SqlResultStore()
+else:
+    store = ResultStore(STORE_FOLDER)
+cohort_stats = CohortAggregates()
+store.subscribe(cohort_stats)
+participant_summaries = ParticipantSummaries()
+store.subscribe(participant_summaries)
+event_log = events.EventLog(EVENTS_FOLDER)
+
+def build_test_record(entry):
+    """
+    수집 대기열 항목을 저장소 레코드로 만듭니다. 스트룹 결과는 여기서 채점합니다.
+
+    이벤트 기록이 있는 검사(트레일 메이킹, 스트룹)는 결과를 제출한 페이지(event_stream)가 보낸 이벤트로
+    다시 계산한 값을 쓰고, 제출된 값은 client_reported에 남깁니다. 그 페이지의 묶음이 빠졌거나
+    다시 만든 스트룹 시행이 제출된 시행과 다르면 제출된 값을 그대로 씁니다.
+    """
+    payload = entry['payload']
+    log_id = payload.get('event_log') if isinstance(payload, dict) else None
+    stream = batch_count = derived = None
+    if log_id:
+        stream, batch_count = payload.get('event_stream'), payload.get('event_batches')
+        payload = {key: value for key, value in payload.items()
+                   if key not in ('event_log', 'event_stream', 'event_batches')}
+        if events.valid_log_id(log_id) and isinstance(stream, str) and isinstance(batch_count, int):
+            stream_events = event_log.read_stream(log_id, entry['test_type'], stream, batch_count)
+            if stream_events is not None:
+                derived = events.derive(entry['test_type'], stream_events)
+            if derived and not events.matches_client(entry['test_type'], derived, payload):
+                derived = None
+    if derived:
+        # 시행 목록은 저장된 시행(result['trials'])처럼 열 배열로 남긴다.
+        client_reported = {key: pack_trials(payload[key]) if key.endswith('_trials') else payload[key]
+                           for key in derived if key in payload}
+        payload = dict(payload, **derived)
+    result = process_stroop_result(payload) if entry['test_type'] == 'stroop' else payload
+    if log_id:
+        result = dict(result, event_log=log_id)
+        if isinstance(stream, str):
+            result['event_stream'] = stream
+    if derived:
+        result['scoring_source'] = 'events'
+        if client_reported:
+            result['client_reported'] = client_reported
+    return {"id": entry['id'], "user_id": entry['user_id'], "test_type": entry['test_type'],
+            "timestamp": entry['timestamp'], "result": result}
+
+# --- 결과 수집 방식 (async: 저널에 쓰고 바로 응답, sync: 요청 안에서 저장) ---
+INGEST_MODE = os.environ.get("INGEST_MODE", "async")
+ingest = IngestQueue(INGEST_FOLDER, store, build_test_record, context=app.app_context)
+
+def warm_caches():
+    """
+    상자 배치 묶음과 저장소 인덱스(검사 통계, 참가자 요약 포함)를 미리 채웁니다.
+
+    검사 통계와 참가자 요약은 체크포인트에서 되살리고 그 뒤의 기록만 반영한 다음, 새 체크포인트를 남깁니다.
+    """
+    layout_pool.warm([4] + [level + 4 for level in range(1, SEQUENCE_MAX_LEVEL + 1)])
+    with app.app_context():
+        store.refresh()
+        store.save_checkpoint()
+        if STORAGE_BACKEND == "sql":
+            # fork 전에 연 DB 연결을 워커들이 함께 물려받지 않도록 닫는다. 워커는 필요할 때 새로 연다.
+            db.engine.dispose()
+
+def start_worker():
+    """
+    워커 프로세스의 백그라운드 작업을 시작합니다. 이미 시작했으면 아무 일도 하지 않습니다.
+
+    스레드와 파일 잠금은 fork 뒤에 만들어야 하므로 앱을 불러올 때가 아니라 워커에서 호출합니다.
+    (gunicorn.conf.py의 post_worker_init, 그 밖의 실행 방식에서는 첫 요청)
+    """
+    if INGEST_MODE == "async":
+        # 이전 실행에서 남은 저널도 다시 처리한다.
+        ingest.start()
+
+def create_app():
+    """
+    gunicorn 진입점 (gunicorn -c gunicorn.conf.py 'app:create_app()').
+
+    --preload면 마스터 프로세스가 한 번 불러와 캐시를 채우고, 워커들은 fork로 그 메모리를 copy-on-write로 나눠 씁니다.
+    """
+    warm_caches()
+    return app
+
+@app.before_request
+def ensure_worker_started():
+    start_worker()
+
+def session_counts(participant_id):
+    """
+    참가자의 검사 유형별 완료 횟수. 제출은 받았지만 수집 대기열에서 아직 저장소에 반영되지 않은 결과도 셉니다.
+
+    저널을 먼저 읽고 저장소를 갱신하므로, 그 사이에 반영된 항목은 저장소에 있는지 id로 확인해 두 번 세지 않습니다.
+    """
+    pending = ingest.pending_entries(participant_id) if INGEST_MODE == "async" else []
+    store.refresh()
+    counts = participant_summaries.session_counts(participant_id)
+    for entry in pending:
+        if store.get_test(entry['id']) is None:
+            counts[entry['test_type']] = counts.get(entry['test_type'], 0) + 1
+    return counts
+
+def submit_result(user_id, test_type, payload):
+    """검사 결과 제출을 저장소로 보냅니다."""
+    # submission ID가 있으면 검사 id를 그로부터 정해, 중복 방지 기록이 지워진 뒤의 재시도도 저장소에서 걸러지게 한다.
+    submission_key = g.get('submission_key')
+    entry_id = uuid.uuid5(uuid.NAMESPACE_URL, submission_key).hex if submission_key else None
+    if INGEST_MODE == "async":
+        return ingest.submit(user_id, test_type, payload, entry_id=entry_id)
+    record = build_test_record(make_entry(user_id, test_type, payload, entry_id=entry_id))
+    store.append_tests([record])
+    return record['id']
+
+# --- 결과 제출 중복 방지 (sqlite, memory) ---
+submission_log = make_submission_log(os.environ.get("SUBMISSION_LOG", "sqlite"), INSTANCE_FOLDER)
+
+def idempotent(view):
+    """
+    X-Submission-ID 헤더가 있는 제출을 한 번만 처리합니다.
+
+    같은 ID로 다시 온 요청에는 처음 처리했을 때의 응답을 그대로 돌려주고,
+    처음 요청이 아직 처리 중이면 409를 돌려줍니다. 성공(2xx)한 응답만 기록합니다.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        submission_id = request.headers.get('X-Submission-ID')
+        if not submission_id:
+            return view(*args, **kwargs)
+        key = f"{request.endpoint}:{session.get('participant_id', '')}:{submission_id[:64]}"
+        state, stored = submission_log.begin(key)
+        if state == DONE:
+            status, body = stored
+            return Response(body, status=status, mimetype='application/json')
+        if state != NEW:
+            return jsonify({"error": "같은 제출을 처리하고 있습니다. 잠시 후 다시 시도해 주세요."}), 409
+        g.submission_key = key
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            submission_log.abort(key)
+            raise
+        if 200 <= response.status_code < 300:
+            submission_log.finish(key, response.status_code, response.get_data())
+        else:
+            submission_log.abort(key)
+        return response
+    return wrapper
+
+def current_participant():
+    """현재 세션의 참가자 레코드를 돌려줍니다. 모든 라우트가 이 함수로 참가자를 찾습니다."""
+    participant_id = session.get('participant_id')
+    if participant_id:
+        return store.get_user(participant_id)
+    user_info = session.get('user_info', {})
+    return store.find_user(user_info.get('name'), user_info.get('age'))
+
 def save_sequence_test_result(final_level):
     """순서 기억 검사 결과를 DB에 저장하는 헬퍼 함수"""
-    db = load_database()
-    user_info = session.get('user_info', {})
-    for user in db['users']:
-        if user.get('name') == user_info.get('name') and user.get('age') == user_info.get('age'):
-            user.setdefault('tests', []).append({
-                "test_type": "sequence",
-                "timestamp": datetime.now().isoformat(),
-                "final_level": final_level,
-                "history": session.get('history', [])
-            })
-            break
-    save_database(db)
+    user = current_participant()
+    if user is None:
+        return
+    store.append_test(user['id'], "sequence", datetime.now().isoformat(),
+                      final_level=final_level,
+                      generator_version=problems.GENERATOR_VERSION,
+                      history=session.get('history', []))
 
 def init_session_for_sequence_test(level=1):
     """순서 기억 검사를 위한 세션을 초기화합니다."""
@@ -61,44 +328,10 @@ def init_session_for_sequence_test(level=1):
     session['history'] = []
     session.permanent = True
 
-def create_sequence_problem(level):
-    if level == 0:
-        num_boxes = 4
-        sequence_length = 2
-    else:
-        num_boxes = level + 4
-        sequence_length = level + 1
-    
-    all_box_ids = list(range(num_boxes))
-    flash_sequence = random.sample(all_box_ids, sequence_length)
-    
-    boxes = generate_box_positions(num_boxes, 500, 500)
-    return {"boxes": boxes, "flash_sequence": flash_sequence, "flash_count": sequence_length}
-
-def generate_box_positions(num_boxes, canvas_width, canvas_height):
-    boxes = []
-    box_size = 80
-    min_gap = 10
-    for i in range(num_boxes):
-        while True:
-            x1 = random.randint(min_gap, canvas_width - box_size - min_gap)
-            y1 = random.randint(min_gap, canvas_height - box_size - min_gap)
-            x2 = x1 + box_size
-            y2 = y1 + box_size
-            is_overlapping = False
-            for other_box in boxes:
-                if not (x2 < other_box['x1'] - min_gap or x1 > other_box['x2'] + min_gap or y2 < other_box['y1'] - min_gap or y1 > other_box['y2'] + min_gap):
-                    is_overlapping = True
-                    break
-            if not is_overlapping:
-                boxes.append({"id": i, "x1": x1, "y1": y1, "x2": x2, "y2": y2})
-                break
-    return boxes
-
 @app.route('/')
 def index():
     session.clear()
-    return render_template('index.html')
+    return render_template('index.html', name_max_length=NAME_MAX_LENGTH)
 
 @app.route('/start-test', methods=['POST'])
 def start_test():
@@ -108,33 +341,22 @@ def start_test():
         'gender': request.form.get('gender', 'N/A'),
         'test_date': request.form.get('test_date', datetime.now().strftime("%Y-%m-%d"))
     }
+    if len(user_info['name']) > NAME_MAX_LENGTH:
+        return f"이름은 {NAME_MAX_LENGTH}자 이하로 입력해 주세요.", 400
     session['user_info'] = user_info
     session.permanent = True
 
-    db = load_database()
-    
-    user_entry = None
-    for user in db['users']:
-        if user.get('name') == user_info.get('name') and user.get('age') == user_info.get('age'):
-            user_entry = user
-            break
-
-    if user_entry is None:
-        user_entry = {
-            "name": user_info['name'],
-            "age": user_info['age'],
-            "gender": user_info['gender'],
-            "tests": []
-        }
-        db['users'].append(user_entry)
-        save_database(db)
+    participant = store.find_user(user_info['name'], user_info['age'])
+    if participant is None:
+        participant = store.add_user(user_info['name'], user_info['age'], user_info['gender'])
+    session['participant_id'] = participant['id']
+    # 이번 검사 회차의 이벤트 기록 ID (트레일 메이킹, 스트룹)
+    session['event_log_id'] = uuid.uuid4().hex
     
     # --- 로직 수정 ---
-    # 순서 기억 검사와 카드 짝 맞추기 검사의 완료 횟수를 센다.
-    sequence_test_count = sum(1 for test in user_entry.get('tests', []) if test.get('test_type') == 'sequence')
-    card_test_count = sum(1 for test in user_entry.get('tests', []) if test.get('test_type') == 'card_matching')
-
-    total_primary_sessions = sequence_test_count + card_test_count
+    # 순서 기억 검사와 카드 짝 맞추기 검사의 완료 횟수를 참가자 요약 문서와 수집 대기열에서 센다.
+    test_counts = session_counts(participant['id'])
+    total_primary_sessions = test_counts.get('sequence', 0) + test_counts.get('card_matching', 0)
     
     # 세션 횟수가 짝수이면 '순서 기억 -> 트레일 메이킹' 진행
     if total_primary_sessions % 2 == 0:
@@ -165,8 +387,9 @@ def intermission():
     if 'user_info' not in session:
         return redirect(url_for('index'))
     level = session.get('current_level', 0)
-    problem = create_sequence_problem(level)
-    session['current_problem'] = problem
+    # 세션에는 (생성기 버전, 레벨, seed)만 두고 문제는 필요할 때 다시 만든다.
+    session['current_problem'] = problems.new_problem_ref(level)
+    problem = problems.resolve(session['current_problem'])
     return render_template('intermission.html', 
                          flash_count=problem['flash_count'],
                          current_level=level)
@@ -181,19 +404,20 @@ def problem():
 
 @app.route('/api/get-current-problem', methods=['GET'])
 def get_current_problem():
-    problem = session.get('current_problem')
+    problem = problems.resolve(session.get('current_problem'))
     if not problem:
         return jsonify({"error": "문제를 찾을 수 없습니다."}), 404
     return jsonify(problem)
 
 @app.route('/api/submit-answer', methods=['POST'])
+@idempotent
 def submit_answer():
     data = request.get_json()
     if not data: return jsonify({"error": "Invalid request"}), 400
 
     user_answer = data.get('answer')
     level = session.get('current_level', 0)
-    problem = session.get('current_problem')
+    problem = problems.resolve(session.get('current_problem'))
     
     time_taken = data.get('time_taken', None)
 
@@ -203,13 +427,18 @@ def submit_answer():
     is_correct = (user_answer == correct_answer)
 
     if level > 0:
-        session.setdefault('history', []).append({
+        item = {
             "level": level, 
             "correct": is_correct, 
             "user_answer": user_answer, 
-            "correct_answer": correct_answer,
             "time_taken": time_taken 
-        })
+        }
+        # 정답은 seed로 다시 만들 수 있으므로 저장하지 않는다. (seed가 없는 이전 형식 세션은 정답을 저장)
+        if 'seed' in problem:
+            item["seed"] = problem['seed']
+        else:
+            item["correct_answer"] = correct_answer
+        session.setdefault('history', []).append(item)
 
     if level == 0:
         status = "correct_practice" if is_correct else "incorrect_practice"
@@ -236,6 +465,41 @@ def submit_answer():
     session.modified = True
     return jsonify({"status": status, "correct": is_correct, "chances_left": session.get('chances_left')})
 
+def attach_event_log(result_data):
+    """
+    제출 데이터에 이번 세션의 이벤트 기록 ID를 붙입니다. 클라이언트가 보낸 값은 쓰지 않습니다.
+
+    event_stream, event_batches(제출한 페이지와 그 페이지가 보낸 묶음 수)는 클라이언트가 보낸 값을 그대로 둡니다.
+    """
+    result_data.pop('event_log', None)
+    if session.get('event_log_id'):
+        result_data['event_log'] = session['event_log_id']
+
+@app.route('/api/events/<test_type>', methods=['POST'])
+def record_events(test_type):
+    """
+    검사 중 이벤트 묶음(static/js/telemetry.js)을 세션의 이벤트 기록에 덧붙입니다.
+
+    결과 저장소에는 쓰지 않습니다. 페이지를 떠날 때 sendBeacon으로도 오므로 Content-Type은 보지 않습니다.
+    """
+    if 'user_info' not in session:
+        return jsonify({"error": "사용자 정보가 없습니다."}), 401
+    if test_type not in events.EVENT_TEST_TYPES:
+        return jsonify({"error": "이벤트를 기록하지 않는 검사입니다."}), 404
+    if (request.content_length or 0) > EVENT_BATCH_MAX_BYTES:
+        return jsonify({"error": "이벤트 묶음이 너무 큽니다."}), 413
+    if not session.get('event_log_id'):
+        # 이벤트 기록 도입 전에 시작한 세션
+        session['event_log_id'] = uuid.uuid4().hex
+    try:
+        count = event_log.append(session['event_log_id'], test_type, request.get_json(force=True, silent=True))
+    except events.EventLogFull as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    metrics.inc('client_events_total', count, test_type=test_type)
+    return jsonify({"status": "success", "events": count})
+
 @app.route('/trail_making_test')
 def trail_making_test():
     if 'user_info' not in session:
@@ -243,6 +507,7 @@ def trail_making_test():
     return render_template('trail_making_test.html')
 
 @app.route('/save_trail_making_results', methods=['POST'])
+@idempotent
 def save_trail_making_results():
     if 'user_info' not in session:
         return jsonify({"success": False, "error": "User session not found"}), 401
@@ -250,24 +515,15 @@ def save_trail_making_results():
     result_data = request.get_json()
     if not result_data:
         return jsonify({"success": False, "error": "No result data provided"}), 400
+    if not isinstance(result_data, dict):
+        return jsonify({"success": False, "error": "Invalid result data"}), 400
 
-    db = load_database()
-    user_info = session.get('user_info')
-    user_found = False
-    for user in db['users']:
-        if user.get('name') == user_info.get('name') and user.get('age') == user_info.get('age'):
-            user.setdefault('tests', []).append({
-                "test_type": "trail_making",
-                "timestamp": datetime.now().isoformat(),
-                "result": result_data
-            })
-            user_found = True
-            break
-    
-    if not user_found:
+    user = current_participant()
+    if user is None:
         return jsonify({"success": False, "error": "User not found in database"}), 404
 
-    save_database(db)
+    attach_event_log(result_data)
+    submit_result(user['id'], "trail_making", result_data)
     return jsonify({"success": True, "next_url": url_for('final_finish')})
 
 @app.route('/card-test')
@@ -277,6 +533,7 @@ def card_test():
     return render_template('card_test.html')
 
 @app.route('/api/submit-card-result', methods=['POST'])
+@idempotent
 def submit_card_result():
     if 'user_info' not in session: 
         return jsonify({"error": "사용자 정보가 없습니다."}), 401
@@ -284,26 +541,15 @@ def submit_card_result():
     result_data = request.get_json()
     if not result_data: 
         return jsonify({"error": "결과 데이터가 없습니다."}), 400
+    if not isinstance(result_data, list) or not all(level is None or isinstance(level, dict) for level in result_data):
+        return jsonify({"error": "결과 데이터 형식이 올바르지 않습니다."}), 400
     
     try:
-        db = load_database()
-        user_info = session.get('user_info')
-        user_found = False
-        
-        for user in db['users']:
-            if user.get('name') == user_info.get('name') and user.get('age') == user_info.get('age'):
-                user.setdefault('tests', []).append({
-                    "test_type": "card_matching",
-                    "timestamp": datetime.now().isoformat(),
-                    "result": result_data
-                })
-                user_found = True
-                break
-        
-        if not user_found: 
+        user = current_participant()
+        if user is None: 
             return jsonify({"error": "데이터베이스에서 사용자를 찾을 수 없습니다."}), 404
         
-        save_database(db)
+        submit_result(user['id'], "card_matching", result_data)
         
         # [수정] 성공적으로 저장되었다면 URL을 반환
         return jsonify({
@@ -333,6 +579,7 @@ def stroop_test():
         return f"스트룹 테스트 로드 중 오류가 발생했습니다: {str(e)}", 500
 
 @app.route('/api/submit-stroop-result', methods=['POST'])
+@idempotent
 def submit_stroop_result():
     if 'user_info' not in session: 
         return jsonify({"error": "사용자 정보가 없습니다."}), 401
@@ -340,138 +587,85 @@ def submit_stroop_result():
     result_data = request.get_json()
     if not result_data: 
         return jsonify({"error": "결과 데이터가 없습니다."}), 400
+    # 시행은 하나하나가 객체여야 채점과 내보내기에서 읽을 수 있다.
+    if not isinstance(result_data, dict) or not all(
+            isinstance(trials, list) and all(isinstance(trial, dict) for trial in trials)
+            for trials in (result_data.get(key, []) for key in ('practice_trials', 'test_trials'))):
+        return jsonify({"error": "결과 데이터 형식이 올바르지 않습니다."}), 400
     
     try:
-        processed_result = process_stroop_result(result_data)
-        
-        db = load_database()
-        user_info = session.get('user_info')
-        user_found = False
-        
-        for user in db['users']:
-            if user.get('name') == user_info.get('name') and user.get('age') == user_info.get('age'):
-                user.setdefault('tests', []).append({
-                    "test_type": "stroop",
-                    "timestamp": datetime.now().isoformat(),
-                    "result": processed_result
-                })
-                user_found = True
-                break
-        
-        if not user_found: 
+        user = current_participant()
+        if user is None: 
             return jsonify({"error": "데이터베이스에서 사용자를 찾을 수 없습니다."}), 404
         
-        save_database(db)
+        # 채점(process_stroop_result)은 수집 대기열의 백그라운드 작업에서 한다.
+        attach_event_log(result_data)
+        submit_result(user['id'], "stroop", result_data)
         # --- 로직 수정: 최종 완료 페이지 URL 반환 ---
         return jsonify({
             "status": "success", 
             "message": "스트룹 테스트 결과가 성공적으로 저장되었습니다.",
-            "next_url": url_for('final_finish') # 최종 종료 페이지로 이동
+            "next_url": url_for('finish') # 도형 패턴 인지 테스트로 이동
         })
         
     except Exception as e:
         print(f"스트룹 테스트 결과 저장 중 오류: {str(e)}")
         return jsonify({"error": f"서버 오류가 발생했습니다: {str(e)}"}), 500
 
-def process_stroop_result(raw_data):
+@app.route('/pattern-test')
+def pattern_test():
+    if 'user_info' not in session:
+        return redirect(url_for('index'))
+    session.pop('pattern_levels', None)
+    return render_template('pattern_test.html')
+
+@app.route('/api/submit-pattern-result', methods=['POST'])
+@idempotent
+def submit_pattern_result():
     """
-    스트룹 테스트 원본 데이터를 분석하여 정리된 결과 포맷으로 변환
-    
-    예상 입력 포맷:
-    {
-        "practice_trials": [
-            {"word": "빨강", "color": "blue", "user_response": true/false/null, "response_time": 1200, "correct_answer": false},
-            ...
-        ],
-        "test_trials": [
-            {"word": "파랑", "color": "red", "user_response": true/false/null, "response_time": 800, "correct_answer": false},
-            ...
-        ]
-    }
+    도형 패턴 인지 테스트의 레벨 결과를 받습니다.
+
+    레벨 결과는 세션에 모아 두고, final이 true이거나 마지막 레벨이면 모은 결과를 검사 1건으로 저장합니다.
     """
-    
-    try:
-        # 연습 문항 분석
-        practice_trials = raw_data.get('practice_trials', [])
-        practice_failures = 0
-        
-        for trial in practice_trials:
-            user_response = trial.get('user_response')
-            correct_answer = trial.get('correct_answer')
-            
-            # 연습에서 실패한 경우 카운트 (정답과 다르게 응답한 경우)
-            if user_response != correct_answer:
-                practice_failures += 1
-        
-        # 본 검사 분석
-        test_trials = raw_data.get('test_trials', [])
-        total_trials = len(test_trials)
-        
-        if total_trials > 0:
-            # 평균 응답 시간 계산
-            total_response_time = sum(trial.get('response_time', 0) for trial in test_trials)
-            avg_response_time = total_response_time / total_trials
-            
-            # 오답율 계산
-            incorrect_responses = 0
-            no_response_errors = 0  # 정답인데 미입력
-            false_positive_errors = 0  # 오답인데 입력
-            
-            for trial in test_trials:
-                user_response = trial.get('user_response')
-                correct_answer = trial.get('correct_answer')
-                
-                if user_response != correct_answer:
-                    incorrect_responses += 1
-                    
-                    # 세부 오답 유형 분류
-                    if correct_answer and (user_response is False or user_response is None):
-                        no_response_errors += 1  # 정답인데 미입력
-                    elif not correct_answer and user_response:
-                        false_positive_errors += 1  # 오답인데 입력
-            
-            error_rate = (incorrect_responses / total_trials) * 100
-            no_response_error_rate = (no_response_errors / total_trials) * 100
-            false_positive_error_rate = (false_positive_errors / total_trials) * 100
-        else:
-            avg_response_time = 0
-            error_rate = 0
-            no_response_error_rate = 0
-            false_positive_error_rate = 0
-            incorrect_responses = 0
-            no_response_errors = 0
-            false_positive_errors = 0
-        
-        # 정리된 결과 포맷
-        processed_result = {
-            "summary": {
-                "practice_failures": practice_failures,
-                "total_practice_trials": len(practice_trials),
-                "total_test_trials": total_trials,
-                "avg_response_time_ms": round(avg_response_time, 2),
-                "overall_error_rate_percent": round(error_rate, 2),
-                "no_response_error_rate_percent": round(no_response_error_rate, 2),
-                "false_positive_error_rate_percent": round(false_positive_error_rate, 2),
-                "total_incorrect": incorrect_responses,
-                "no_response_errors": no_response_errors,
-                "false_positive_errors": false_positive_errors
-            },
-            "detailed_data": {
-                "practice_trials": practice_trials,
-                "test_trials": test_trials
-            },
-            "raw_data": raw_data  # 원본 데이터도 보존
-        }
-        
-        return processed_result
-        
-    except Exception as e:
-        print(f"스트룹 결과 처리 중 오류: {str(e)}")
-        # 오류 발생 시 원본 데이터 반환
-        return {
-            "summary": {"processing_error": str(e)},
-            "raw_data": raw_data
-        }
+    if 'user_info' not in session:
+        return jsonify({"error": "사용자 정보가 없습니다."}), 401
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "결과 데이터가 없습니다."}), 400
+
+    levels = list(session.get('pattern_levels', []))
+    if 'level' in data:
+        level, score, total_problems, times = (data.get('level'), data.get('score'),
+                                               data.get('total_problems'), data.get('times', []))
+        if not all(isinstance(value, int) for value in (level, score, total_problems)) \
+                or not isinstance(times, list) \
+                or not all(isinstance(t, (int, float)) for t in times):
+            return jsonify({"error": "결과 데이터 형식이 올바르지 않습니다."}), 400
+        # 같은 레벨을 다시 보낸 경우(저장 실패 후 재전송) 새 결과로 바꾼다.
+        levels = [item for item in levels if item['level'] != level]
+        levels.append({"level": level, "score": score, "total_problems": total_problems, "times": times})
+        levels.sort(key=lambda item: item['level'])
+        session['pattern_levels'] = levels
+
+    if not (data.get('final') or data.get('level', 0) >= PATTERN_MAX_LEVEL):
+        return jsonify({"status": "buffered", "levels": len(levels)})
+
+    if levels:
+        user = current_participant()
+        if user is None:
+            return jsonify({"error": "데이터베이스에서 사용자를 찾을 수 없습니다."}), 404
+        submit_result(user['id'], "pattern", {
+            "levels": levels,
+            "total_score": sum(item['score'] for item in levels),
+            "total_problems": sum(item['total_problems'] for item in levels),
+        })
+        session.pop('pattern_levels', None)
+    return jsonify({
+        "status": "success",
+        "message": "도형 패턴 인지 테스트 결과가 성공적으로 저장되었습니다.",
+        "next_url": url_for('final_finish')
+    })
 
 @app.route('/finish')
 def finish():
@@ -486,8 +680,12 @@ def finish():
         # 카드 짝 맞추기 후에는 스트룹 테스트로 이동
         session['current_test_flow'] = 'stroop'
         return redirect(url_for('stroop_test'))
+    elif current_flow == 'stroop':
+        # 스트룹 테스트 후에는 도형 패턴 인지 테스트로 이동
+        session['current_test_flow'] = 'pattern'
+        return redirect(url_for('pattern_test'))
     else:
-        # 그 외의 경우(trail_making, stroop 완료 후) 최종 종료
+        # 그 외의 경우(trail_making, pattern 완료 후) 최종 종료
         return redirect(url_for('final_finish'))
 
 @app.route('/final_finish')
@@ -499,22 +697,156 @@ def results():
     password = request.args.get('pw')
     if password != ADMIN_PASSWORD:
         return "접근 권한이 없습니다.", 403
-    db = load_database()
-    return render_template('results.html', data=db)
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(100, max(1, int(request.args.get('per_page', 20))))
+    except ValueError:
+        page, per_page = 1, 20
+    filters = {
+        "name": request.args.get('name', '').strip(),
+        "test_type": request.args.get('test_type', ''),
+        "date_from": request.args.get('date_from', ''),
+        "date_to": request.args.get('date_to', ''),
+    }
+    total, entries = store.query_tests(offset=(page - 1) * per_page, limit=per_page,
+                                       **{k: v or None for k, v in filters.items()})
+    rows = [{"entry": entry,
+             "user": store.get_user(entry.user_id) or {},
+             "summary": participant_summaries.get(entry.user_id),
+             "test": store.get_test(entry.test_id)} for entry in entries]
+    return render_template('results.html', rows=rows, total=total, page=page, per_page=per_page,
+                           page_count=max(1, (total + per_page - 1) // per_page), filters=filters,
+                           test_type_labels=TEST_TYPE_LABELS)
+
+@app.route('/results/tests/<test_id>')
+def result_detail(test_id):
+    """검사 한 건의 상세 기록 (관리자 화면에서 펼칠 때 불러옴)"""
+    password = request.args.get('pw')
+    if password != ADMIN_PASSWORD:
+        return "접근 권한이 없습니다.", 403
+    test = store.get_test(test_id)
+    if test is None:
+        return "검사 기록을 찾을 수 없습니다.", 404
+    if test.get('test_type') == 'sequence':
+        test = dict(test, history=problems.history_with_answers(test))
+    return render_template('test_detail.html', test=test, summaries=store.summaries(test_id))
+
+@app.route('/api/tests/<test_id>/replay')
+def replay_sequence_test(test_id):
+    """순서 기억 검사 기록의 문항별 문제(상자 배치, 깜빡인 순서)를 seed로 다시 만듭니다. (관리자용)"""
+    if request.args.get('pw') != ADMIN_PASSWORD:
+        return jsonify({"error": "접근 권한이 없습니다."}), 403
+    test = store.get_test(test_id)
+    if test is None or test.get('test_type') != 'sequence':
+        return jsonify({"error": "순서 기억 검사 기록을 찾을 수 없습니다."}), 404
+    try:
+        replayed = problems.replay(test)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 422
+    items = [dict(item, problem=problem) for item, problem in zip(test.get('history') or [], replayed)]
+    return jsonify({"test_id": test_id, "generator_version": test.get('generator_version'), "history": items})
+
+@app.route('/api/tests/<test_id>/events')
+def test_events(test_id):
+    """
+    검사 한 건의 이벤트 기록과 그로부터 다시 계산한 값을 돌려줍니다. (관리자용)
+
+    events는 그 회차의 모든 이벤트이고, derived는 결과를 제출한 페이지(event_stream)의 이벤트로만 계산합니다.
+    """
+    if request.args.get('pw') != ADMIN_PASSWORD:
+        return jsonify({"error": "접근 권한이 없습니다."}), 403
+    test = store.get_test(test_id)
+    if test is None:
+        return jsonify({"error": "검사 기록을 찾을 수 없습니다."}), 404
+    log_id = (test.get('result') or {}).get('event_log') if isinstance(test.get('result'), dict) else None
+    if not events.valid_log_id(log_id):
+        return jsonify({"error": "이벤트 기록이 없는 검사입니다."}), 404
+    stream = test['result'].get('event_stream')
+    recorded = event_log.read(log_id, test['test_type'])
+    submitted = event_log.read(log_id, test['test_type'], stream) if stream else recorded
+    return jsonify({"test_id": test_id, "event_log": log_id, "event_stream": stream, "events": recorded,
+                    "derived": events.derive(test['test_type'], submitted)})
 
 @app.route('/download-results')
 def download_results():
+    """전체 검사 기록을 한 줄에 검사 1건씩(NDJSON) 내려받습니다."""
     password = request.args.get('pw')
     if password != ADMIN_PASSWORD:
         return "결과 파일이 아직 생성되지 않았습니다.", 403
-    try:
-        return send_file(
-            DATABASE_FILE,
-            as_attachment=True,
-            download_name='cognitive_tests_database.json'
-        )
-    except FileNotFoundError:
+    if store.is_empty():
         return "결과 파일이 아직 생성되지 않았습니다.", 404
+    rows = exporters.stream_tests_ndjson(store, request.args.get('date_from') or None,
+                                         request.args.get('date_to') or None)
+    return Response(stream_with_context(rows), mimetype='application/x-ndjson',
+                    headers={"Content-Disposition": "attachment; filename=cognitive_tests.ndjson"})
+
+@app.route('/export/<test_type>.<fmt>')
+def export_results(test_type, fmt):
+    """검사 유형별 평평한 행 구조로 결과를 스트리밍합니다. (fmt: csv 또는 ndjson)"""
+    if request.args.get('pw') != ADMIN_PASSWORD:
+        return "접근 권한이 없습니다.", 403
+    if test_type not in exporters.SCHEMAS or fmt not in ('csv', 'ndjson'):
+        return "지원하지 않는 내보내기 형식입니다.", 404
+    rows = exporters.iter_rows(store, test_type, request.args.get('date_from') or None,
+                               request.args.get('date_to') or None)
+    if fmt == 'csv':
+        body, mimetype = exporters.stream_csv(rows, exporters.SCHEMAS[test_type]), 'text/csv'
+    else:
+        body, mimetype = exporters.stream_ndjson(rows), 'application/x-ndjson'
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={test_type}.{fmt}"})
+
+@app.route('/api/stats')
+@app.route('/api/stats/<test_type>')
+def cohort_statistics(test_type=None):
+    """검사 유형별 누적 통계 (관리자용). group: all, age_band, gender"""
+    if request.args.get('pw') != ADMIN_PASSWORD:
+        return jsonify({"error": "접근 권한이 없습니다."}), 403
+    grouping = request.args.get('group', 'all')
+    if grouping not in CohortAggregates.GROUPINGS:
+        return jsonify({"error": f"group은 {', '.join(CohortAggregates.GROUPINGS)} 중 하나여야 합니다."}), 400
+    store.refresh()
+    return jsonify(cohort_stats.summary(test_type, grouping))
+
+@app.route('/api/participants/<participant_id>')
+def participant_detail(participant_id):
+    """참가자 정보와 종단 요약 (관리자용)"""
+    if request.args.get('pw') != ADMIN_PASSWORD:
+        return jsonify({"error": "접근 권한이 없습니다."}), 403
+    store.refresh()
+    participant = store.get_user(participant_id)
+    if participant is None:
+        return jsonify({"error": "참가자를 찾을 수 없습니다."}), 404
+    return jsonify(dict(participant, summary=participant_summaries.get(participant_id)))
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """워커별 저장소 캐시 통계 (관리자용)"""
+    if request.args.get('pw') != ADMIN_PASSWORD:
+        return jsonify({"error": "접근 권한이 없습니다."}), 403
+    return jsonify(dict(store.cache_stats(), pid=os.getpid(), ingest=ingest.status(),
+                        submissions=dict(submission_log.stats, entries=len(submission_log))))
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """모든 워커의 측정값 (Prometheus 텍스트 형식). HTTP 기본 인증 또는 ?pw= 로 접근합니다."""
+    auth = request.authorization
+    password = auth.password if auth and auth.password is not None else request.args.get('pw')
+    if password != METRICS_PASSWORD:
+        return Response("접근 권한이 없습니다.\n", 401, {"WWW-Authenticate": 'Basic realm="metrics"'},
+                        mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.cli.command('import-json')
+@click.argument('path', default=DATABASE_FILE)
+def import_json_command(path):
+    """이전 database.json 파일을 결과 저장소로 가져옵니다."""
+    if not store.is_empty():
+        raise click.ClickException("결과 저장소가 비어 있지 않습니다. 이미 가져온 것으로 보입니다.")
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    user_count, test_count = store.import_legacy(data)
+    click.echo(f"참가자 {user_count}명, 검사 {test_count}건을 가져왔습니다.")
 
 # [추가] 오류 처리 핸들러
 @app.errorhandler(500)
@@ -527,5 +859,108 @@ def not_found_error(error):
     print(f"404 Not Found: {str(error)}")
     return "페이지를 찾을 수 없습니다.", 404
 
+@app.cli.command('assets-build')
+def assets_build_command():
+    """static/ 파일의 해시 이름 사본과 gzip/brotli 압축 사본을 static_dist/에 만듭니다. (배포 빌드 단계)"""
+    report = assets.build(app.static_folder, ASSETS_FOLDER)
+    for item in report:
+        compressed = ", ".join(f"{name} {item[name]:,}" for name in ("gzip", "br") if item[name])
+        click.echo(f"{item['path']}: {item['bytes']:,} 바이트" + (f" ({compressed})" if compressed else ""))
+    if assets.brotli is None:
+        click.echo("brotli 패키지가 없어 .br 사본은 만들지 않았습니다.")
+    asset_manifest.load()
+
+@app.cli.command('ingest-replay')
+def ingest_replay_command():
+    """결과 수집 저널에 남은 항목을 지금 저장소에 반영합니다. (이미 저장된 항목은 건너뜀)"""
+    click.echo(f"저널 항목 {ingest.drain()}건을 처리했습니다.")
+
+@app.cli.command('compact-stroop')
+def compact_stroop_command():
+    """이전 형식으로 저장된 스트룹 결과의 중복 시행 데이터를 열 배열 한 벌로 줄입니다."""
+    def transform(record):
+        if record.get('test_type') == 'stroop':
+            record['result'] = compact_result(record.get('result'))
+        return record
+    if STORAGE_BACKEND == "sql":
+        changed, total = store.rewrite_tests(transform)
+        click.echo(f"세션 {total:,}건 중 {changed:,}건을 변환했습니다.")
+    else:
+        before, after = store.rewrite_tests(transform)
+        click.echo(f"검사 기록: {before:,} -> {after:,} 바이트")
+
+@app.cli.command('store-compact')
+@click.option('--keep-months', type=int, default=3, show_default=True, help="월별 세그먼트로 남겨 둘 최근 개월 수")
+def store_compact_command(keep_months):
+    """
+    오래된 해의 월별 검사 세그먼트를 연도별 파일로 합치고, 이전 형식 tests.jsonl을 세그먼트로 옮깁니다.
+
+    STORAGE_BACKEND=sql이면 세그먼트가 없으므로 테이블 통계만 갱신하고 기간 조회의 실행 계획을 보여 줍니다.
+    """
+    if STORAGE_BACKEND == "sql":
+        result = store.compact(keep_months=keep_months)
+        for year, count in result['rolled_up'].items():
+            click.echo(f"{year}: 검사 {count:,}건")
+        click.echo("테이블 통계를 갱신했습니다. 기간 조회 실행 계획:")
+        for line in result['plan']:
+            click.echo(f"  {line}")
+        return
+    result = store.compact(keep_months=keep_months)
+    for year, count in result['rolled_up'].items():
+        click.echo(f"{year}: 검사 {count:,}건")
+    click.echo(f"합친 월별 세그먼트 {len(result['removed_segments'])}개, "
+               f"{result['bytes_before']:,} -> {result['bytes_after']:,} 바이트")
+    if result['migrated_legacy']:
+        click.echo("tests.jsonl을 세그먼트로 옮기고 tests.jsonl.migrated로 이름을 바꿨습니다.")
+    echo_segment_stats()
+
+def echo_segment_stats():
+    for key, stats in store.segment_stats().items():
+        label = '  (보관)' if stats.get('archived') else '  (압축됨)' if stats['compacted'] else ''
+        click.echo(f"  {key:12s} 검사 {stats['indexed']:>8,}건  {stats['bytes']:>12,} 바이트{label}")
+
+@app.cli.command('store-archive')
+@click.option('--older-than-months', type=int, default=12, show_default=True,
+              help="검사 일시가 이보다 오래된 세그먼트를 보관 세그먼트로 옮김")
+@click.option('--max-segments', type=int, default=None, help="이번 실행에서 옮길 세그먼트 수 (기본: 모두)")
+@click.option('--max-sessions', type=int, default=None,
+              help="STORAGE_BACKEND=sql일 때 이번 실행에서 옮길 세션 수 (기본: 모두)")
+def store_archive_command(older_than_months, max_segments, max_sessions):
+    """
+    오래된 검사 세그먼트를 연도별 압축 보관 세그먼트로 옮깁니다. 실행 중에도 결과 저장은 계속됩니다.
+
+    STORAGE_BACKEND=sql이면 오래된 세션의 시행 행을 세션마다 압축해 archived_trials 테이블로 옮깁니다.
+    """
+    if STORAGE_BACKEND == "sql":
+        result = store.archive(older_than_months=older_than_months, max_sessions=max_sessions)
+        for year, count in sorted(result['archived'].items()):
+            click.echo(f"{year}: 세션 {count:,}건 보관")
+        click.echo(f"시행 데이터 {result['bytes_before']:,} -> {result['bytes_after']:,} 바이트, "
+                   f"남은 대상 세션 {result['remaining']:,}건")
+        return
+    result = store.archive(older_than_months=older_than_months, max_segments=max_segments)
+    for key, count in result['archived'].items():
+        click.echo(f"{key}: 검사 {count:,}건 보관")
+    click.echo(f"보관한 세그먼트 {len(result['archived'])}개, {result['bytes_before']:,} -> {result['bytes_after']:,} 바이트, "
+               f"남은 대상 {result['remaining']}개")
+    echo_segment_stats()
+
+@app.cli.command('rescore-stroop')
+@click.option('--scoring-version', required=True, help="새 요약에 붙일 채점 규칙 버전 이름")
+@click.option('--rt-cutoff', type=float, default=None, help="이 시간(ms)보다 늦게 누른 응답은 누르지 않은 것으로 처리")
+@click.option('--batch-size', type=int, default=1000)
+@click.option('--dry-run', is_flag=True, help="계산만 하고 저장하지 않음")
+def rescore_stroop_command(scoring_version, rt_cutoff, batch_size, dry_run):
+    """저장된 스트룹 세션 전체를 새 채점 규칙으로 일괄 재채점합니다."""
+    from stroop import SCORING_VERSION
+    from stroop_rescore import rescore_store
+    if scoring_version == SCORING_VERSION:
+        raise click.ClickException(f"버전 {SCORING_VERSION}은 제출 시점 채점에 쓰이는 버전입니다.")
+    count, skipped = rescore_store(store, scoring_version, rt_cutoff, batch_size, dry_run)
+    click.echo(f"스트룹 세션 {count}건을 버전 {scoring_version}으로 재채점했습니다."
+               + (" (저장하지 않음)" if dry_run else ""))
+    if skipped:
+        click.echo(f"채점 오류로 원본만 남았거나 시행 형식이 맞지 않는 세션 {skipped}건은 건너뛰었습니다.")
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    create_app().run(debug=True, port=5001)
\ No newline at end of file
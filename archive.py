@@ -0,0 +1,101 @@
+"""
+검사 기록 보관(콜드) 세그먼트
+
+오래된 검사 기록은 ResultStore.archive()가 tests/archive/ 아래의 연도별 압축 세그먼트로 옮깁니다.
+
+- <연도>.jsonl.gz  : 레코드 묶음(block)마다 gzip 멤버 하나를 이어 붙인 파일. 통째로 zcat 하면 JSON Lines가 된다.
+- <연도>.idx.jsonl : 레코드마다 한 줄 {"id", "block", "size", "item", "digest"}.
+  block/size는 묶음의 파일 위치와 압축 크기, item은 묶음 안에서 몇 번째 줄인지이다.
+  digest는 레코드에서 상세 시행 데이터(DETAIL_FIELDS)를 뺀 것으로, 저장소 인덱스와 검사 통계·참가자 요약은
+  이것만 읽어 만들고 레코드 본문은 상세 보기나 내보내기에서 필요할 때 묶음 하나만 풀어 읽습니다.
+
+두 파일 모두 덧붙이기만 합니다. 묶음을 먼저 쓰고 디스크에 내려 쓴 뒤 색인 줄을 쓰므로 색인에 있는 묶음은 항상 완전합니다.
+"""
+import gzip
+import json
+import os
+
+ARCHIVE_DIR = 'archive'
+BLOCK_RECORDS = 256
+COMPRESS_LEVEL = 6
+
+# digest에서 뺄 상세 항목: 순서 기억 문항 기록, 스트룹 시행 목록, 카드 클릭 순서, 도형 패턴 응답 시간 등.
+# 검사 통계(aggregates.METRICS)와 참가자 요약은 이 항목을 쓰지 않는다.
+DETAIL_FIELDS = frozenset({
+    "history", "trials", "raw_data", "detailed_data", "client_data",
+    "user_click_sequence", "correct_card_pairs", "levels", "times",
+})
+
+
+def _strip(value):
+    if isinstance(value, dict):
+        return {key: item for key, item in value.items() if key not in DETAIL_FIELDS}
+    return value
+
+
+def digest(record):
+    """레코드에서 상세 항목을 뺀 사본. 결과(result)가 목록이면 항목마다 뺍니다."""
+    light = _strip(record)
+    result = light.get('result')
+    if isinstance(result, list):
+        light['result'] = [_strip(item) for item in result]
+    elif isinstance(result, dict):
+        light['result'] = _strip(result)
+    return light
+
+
+def _dump(record):
+    return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class ArchiveSegment:
+    """연도 하나의 압축 세그먼트 파일과 색인 파일"""
+
+    def __init__(self, directory, name, fsync=True):
+        self.path = os.path.join(directory, f"{name}.jsonl.gz")
+        self.index_path = os.path.join(directory, f"{name}.idx.jsonl")
+        self.fsync = fsync
+
+    def ids(self):
+        """색인에 있는 레코드 id 집합"""
+        ids = set()
+        try:
+            with open(self.index_path, 'rb') as f:
+                for raw in f:
+                    if raw.endswith(b'\n'):
+                        ids.add(json.loads(raw)['id'])
+        except FileNotFoundError:
+            pass
+        return ids
+
+    def append(self, records, block_records=BLOCK_RECORDS):
+        """레코드를 묶음으로 압축해 덧붙이고 색인 줄을 씁니다. 압축한 바이트 수를 돌려줍니다."""
+        if not records:
+            return 0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        index_lines, written = [], 0
+        with open(self.path, 'ab') as f:
+            for start in range(0, len(records), block_records):
+                block = records[start:start + block_records]
+                data = gzip.compress(b''.join(_dump(record) for record in block), compresslevel=COMPRESS_LEVEL, mtime=0)
+                offset = f.seek(0, os.SEEK_END)
+                f.write(data)
+                written += len(data)
+                for item, record in enumerate(block):
+                    index_lines.append(_dump({"id": record['id'], "block": offset, "size": len(data),
+                                              "item": item, "digest": digest(record)}))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        with open(self.index_path, 'ab') as f:
+            f.write(b''.join(index_lines))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        return written
+
+    def read_block(self, offset, size):
+        """묶음 하나를 풀어 줄 목록(bytes)으로 돌려줍니다."""
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return gzip.decompress(f.read(size)).splitlines()
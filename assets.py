@@ -0,0 +1,130 @@
+"""
+정적 파일 빌드와 전송
+
+배포 빌드 단계에서 `flask assets-build`를 실행하면 static/ 아래 파일마다 내용 해시를 붙인 사본
+(js/stroop_test.3f2a1b9c0d4e.js)을 static_dist/에 만들고, JS/CSS처럼 압축이 잘 되는 파일은
+gzip(.gz)과 brotli(.br) 사본도 미리 만들어 둡니다. 원래 경로 -> 해시 경로는 static_dist/manifest.json에 적습니다.
+
+/assets/ 경로는 요청의 Accept-Encoding에 맞는 사본을 골라 1년짜리 immutable 캐시 헤더와 함께 보냅니다.
+파일 이름이 내용에 따라 바뀌므로 내용이 바뀌면 주소도 바뀌어 캐시를 지울 필요가 없습니다.
+Range 요청(음성 파일 이어 받기)은 send_file의 conditional 처리로 지원합니다.
+
+빌드하지 않았거나 디버그 모드면 기존 /static/ 경로를 그대로 씁니다.
+brotli 패키지가 없으면 .br 사본은 만들지 않습니다.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import abort, request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 미리 압축해 둘 확장자 (음성·이미지는 이미 압축된 형식이라 제외)
+COMPRESSIBLE = {'.js', '.css', '.svg', '.json', '.html', '.txt'}
+HASH_LENGTH = 12
+MANIFEST_NAME = 'manifest.json'
+MAX_AGE = 365 * 24 * 3600
+
+# 우선순위 순서: (Content-Encoding, 파일 확장자)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprint(path, data):
+    """'js/test.js' -> 'js/test.<내용 해시>.js'"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build(source, target):
+    """
+    source 폴더의 정적 파일을 target 폴더에 해시 이름으로 복사하고 압축 사본을 만듭니다.
+
+    target은 비우고 다시 만듭니다. 파일별 {"path", "bytes", "gzip", "br"} 목록을 돌려줍니다.
+    """
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    os.makedirs(target)
+    manifest, report = {}, []
+    for dirpath, dirnames, filenames in os.walk(source):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            relative = os.path.relpath(path, source).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                data = f.read()
+            hashed = fingerprint(relative, data)
+            output = os.path.join(target, hashed)
+            _write(output, data)
+            sizes = {"path": hashed, "bytes": len(data), "gzip": None, "br": None}
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                # mtime=0: 같은 내용이면 빌드할 때마다 같은 .gz가 나온다.
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(compressed) < len(data):
+                    _write(output + '.gz', compressed)
+                    sizes["gzip"] = len(compressed)
+                if brotli is not None:
+                    compressed = brotli.compress(data, quality=11)
+                    if len(compressed) < len(data):
+                        _write(output + '.br', compressed)
+                        sizes["br"] = len(compressed)
+            manifest[relative] = hashed
+            report.append(sizes)
+    with open(os.path.join(target, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    return report
+
+
+class AssetManifest:
+    """빌드된 정적 파일의 원래 경로 -> 해시 경로"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.paths = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(os.path.join(self.folder, MANIFEST_NAME), encoding='utf-8') as f:
+                self.paths = json.load(f)
+        except FileNotFoundError:
+            self.paths = {}
+
+    def lookup(self, filename):
+        return self.paths.get(filename)
+
+    def __len__(self):
+        return len(self.paths)
+
+
+def send_asset(folder, filename):
+    """빌드된 정적 파일을 보냅니다. 클라이언트가 받을 수 있으면 미리 압축한 사본을 보냅니다."""
+    path = safe_join(folder, filename)
+    if path is None or filename == MANIFEST_NAME or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for name, suffix in ENCODINGS:
+        if request.accept_encodings[name] and os.path.isfile(path + suffix):
+            path, encoding = path + suffix, name
+            break
+    response = send_file(path, mimetype=mimetype, conditional=True, max_age=MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
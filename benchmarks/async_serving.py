@@ -0,0 +1,203 @@
+"""
+gunicorn 워커 방식 비교 (sync / gevent)
+
+가상 참가자를 채운 임시 instance 폴더로 gunicorn(gunicorn.conf.py)을 워커 방식마다 띄우고,
+동시 참가자 수(--concurrency)를 바꿔 가며 --duration초 동안 검사 흐름을 되풀이하게 해서
+초당 처리한 요청 수와 응답 시간(p50/p95/p99)을 비교합니다. 참가자 한 명의 흐름은 다음과 같습니다.
+
+    start-test -> 카드 짝 맞추기 화면 -> 카드 결과 제출 -> 스트룹 화면 -> 스트룹 결과 제출 -> 트레일 메이킹 결과 제출
+
+제출 요청은 X-Submission-ID를 붙이고, --upload-ms만큼 헤더와 본문 사이를 쉬어 느린 무선망에서 올리는 태블릿을
+흉내 냅니다. sync 워커는 본문을 기다리는 동안 다른 요청을 받지 못하고, gevent 워커는 그동안 다른 요청을 처리합니다.
+부하는 asyncio로 만든 참가자들이 요청마다 새 연결로 보냅니다. 끝난 뒤 저장된 검사 수가 성공한 제출 수와 같은지 확인합니다.
+
+사용법:
+    python benchmarks/async_serving.py
+    python benchmarks/async_serving.py --concurrency 50 100 200 --duration 20 --upload-ms 50
+    python benchmarks/async_serving.py --ingest sync --workers 8 --gevent-workers 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from startup import ROOT, WORKER_READY, free_port, prefill
+
+STROOP_TRIAL = {"word": "빨강", "color": "blue", "user_response": True, "response_time": 800, "correct_answer": False}
+TRAIL_RESULT = {"testA_time": 30, "testA_errors": 0, "testB_time": 60, "testB_errors": 1, "consonant_check_failures": 0}
+CARD_RESULT = [{"level": "1단계", "pairs": 2, "time_taken": 3.0,
+                "correct_card_pairs": [[0, 1]], "user_click_sequence": [0, 1]}]
+STROOP_RESULT = {"practice_trials": [STROOP_TRIAL] * 10, "test_trials": [STROOP_TRIAL] * 120}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def serve(instance, worker_class, workers, connections, ingest, timeout=120):
+    """gunicorn을 띄워 모든 워커가 준비될 때까지 기다린 뒤 (프로세스, 포트)를 돌려줍니다."""
+    port = free_port()
+    log_path = os.path.join(instance, f'gunicorn-{worker_class}.log')
+    env = dict(os.environ, INSTANCE_FOLDER=instance, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_WORKER_CLASS=worker_class, GUNICORN_WORKER_CONNECTIONS=str(connections), INGEST_MODE=ingest)
+    started = time.perf_counter()
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()'],
+                                   cwd=ROOT, env=env, stdout=log, stderr=log)
+    ready = []
+    while len(ready) < workers:
+        if process.poll() is not None or time.perf_counter() - started > timeout:
+            process.kill()
+            with open(log_path) as f:
+                sys.exit(f"gunicorn이 준비되지 않았습니다:\n{f.read()[-2000:]}")
+        time.sleep(0.05)
+        with open(log_path) as f:
+            ready = WORKER_READY.findall(f.read())
+    return process, port
+
+
+def stored_counts(instance):
+    """남은 저널을 저장소에 반영한 뒤 참가자 이름 앞머리('sync-50')별 검사 수를 돌려줍니다."""
+    code = ("import collections, json, app; app.app.app_context().push(); app.ingest.drain(); "
+            "counts = collections.Counter(u['name'].rsplit('-', 2)[0] for u in app.store.users() "
+            "for _ in app.store.user_tests(u['id'])); print(json.dumps(counts))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=dict(os.environ, INSTANCE_FOLDER=instance),
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+async def request(port, method, path, cookies, body=b'', content_type=None, upload_delay=0, headers=()):
+    """요청 하나를 새 연결로 보내고 상태 코드를 돌려줍니다. 응답의 Set-Cookie는 cookies에 반영합니다."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        lines = [f"{method} {path} HTTP/1.1", "Host: 127.0.0.1", "Connection: close",
+                 f"Content-Length: {len(body)}", *headers]
+        if content_type:
+            lines.append(f"Content-Type: {content_type}")
+        if cookies:
+            lines.append("Cookie: " + "; ".join(f"{name}={value}" for name, value in cookies.items()))
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        if body and upload_delay:
+            await writer.drain()
+            await asyncio.sleep(upload_delay)
+        writer.write(body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    head = response.partition(b"\r\n\r\n")[0].decode('latin-1').split("\r\n")
+    for line in head[1:]:
+        name, _, value = line.partition(':')
+        if name.lower() == 'set-cookie':
+            cookie_name, _, cookie_value = value.strip().split(';')[0].partition('=')
+            cookies[cookie_name] = cookie_value
+    return int(head[0].split()[1])
+
+
+async def participant(port, name, deadline, upload_delay, record):
+    """deadline까지 검사 흐름을 되풀이합니다. record(종류, ms, 상태 코드)로 요청마다 기록합니다."""
+    async def call(kind, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            status = await request(port, method, path, cookies, **kwargs)
+        except OSError:
+            status = 0
+        record(kind, (time.perf_counter() - start) * 1000, status)
+
+    async def submit(path, result):
+        await call('submit', 'POST', path, body=json.dumps(result).encode('utf-8'), content_type='application/json',
+                   upload_delay=upload_delay, headers=(f"X-Submission-ID: {uuid.uuid4().hex}",))
+
+    round_number = 0
+    while time.perf_counter() < deadline:
+        cookies = {}
+        form = f"name={name}-{round_number}&age=72&gender=female".encode('utf-8')
+        await call('page', 'POST', '/start-test', body=form, content_type='application/x-www-form-urlencoded')
+        await call('page', 'GET', '/card-test')
+        await submit('/api/submit-card-result', CARD_RESULT)
+        await call('page', 'GET', '/stroop-test')
+        await submit('/api/submit-stroop-result', STROOP_RESULT)
+        await submit('/save_trail_making_results', TRAIL_RESULT)
+        round_number += 1
+
+
+async def load(port, prefix, concurrency, duration, upload_delay):
+    """(종류별 응답 시간 ms, 실패한 상태 코드 목록, 성공한 제출 수, 걸린 시간)을 돌려줍니다."""
+    timings = {}
+    errors = []
+    submitted = 0
+
+    def record(kind, ms, status):
+        nonlocal submitted
+        timings.setdefault(kind, []).append(ms)
+        if status not in (200, 302):
+            errors.append(status)
+        elif kind == 'submit':
+            submitted += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(participant(port, f"{prefix}-{i}", start + duration, upload_delay, record)
+                           for i in range(concurrency)))
+    return timings, errors, submitted, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--prefill', type=int, default=1000, help="미리 채울 가상 참가자 수")
+    parser.add_argument('--prefill-tests', type=int, default=4, help="가상 참가자당 검사 기록 수")
+    parser.add_argument('--workers', type=int, default=4, help="sync 워커 수")
+    parser.add_argument('--gevent-workers', type=int, default=os.cpu_count() or 1, help="gevent 워커 수 (기본: CPU 수)")
+    parser.add_argument('--worker-connections', type=int, default=200, help="gevent 워커 하나가 함께 처리하는 요청 수")
+    parser.add_argument('--worker-class', nargs='+', default=['sync', 'gevent'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[50, 100, 200], help="동시 참가자 수")
+    parser.add_argument('--duration', type=float, default=20, help="동시 참가자 수마다 부하를 거는 시간(초)")
+    parser.add_argument('--upload-ms', type=float, default=20, help="제출 요청의 헤더와 본문 사이에 쉬는 시간(ms)")
+    parser.add_argument('--ingest', choices=('sync', 'async'), default='async', help="INGEST_MODE")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as instance:
+        start = time.perf_counter()
+        prefill(instance, args.prefill, args.prefill_tests)
+        print(f"가상 참가자 {args.prefill}명, 검사 {args.prefill * args.prefill_tests}건 채움 "
+              f"({time.perf_counter() - start:.2f}초)")
+        print(f"워커 sync {args.workers}개 / gevent {args.gevent_workers}개(연결 {args.worker_connections}), "
+              f"수집 {args.ingest}, 제출 본문 지연 {args.upload_ms:g}ms, 부하 {args.duration:g}초씩")
+        print(f"  {'워커':8s} {'동시':>5s} {'req/s':>8s} {'오류':>5s}  {'종류':8s} {'건수':>6s} "
+              f"{'p50':>9s} {'p95':>9s} {'p99':>9s}")
+        expected = {}
+        for worker_class in args.worker_class:
+            workers = args.gevent_workers if worker_class == 'gevent' else args.workers
+            process, port = serve(instance, worker_class, workers, args.worker_connections, args.ingest)
+            try:
+                for concurrency in args.concurrency:
+                    prefix = f"{worker_class}-{concurrency}"
+                    timings, errors, expected[prefix], elapsed = asyncio.run(
+                        load(port, prefix, concurrency, args.duration, args.upload_ms / 1000))
+                    total = sum(len(values) for values in timings.values())
+                    head = f"  {worker_class:8s} {concurrency:5d} {total / elapsed:8.1f} {len(errors):5d}"
+                    for kind in ('page', 'submit'):
+                        values = timings.get(kind, [0])
+                        print(f"{head}  {kind:8s} {len(values):6d} {percentile(values, 0.5):7.1f}ms "
+                              f"{percentile(values, 0.95):7.1f}ms {percentile(values, 0.99):7.1f}ms")
+                        head = " " * len(head)
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait(timeout=60)
+
+        stored = stored_counts(instance)
+        lost = {prefix: (stored.get(prefix, 0), count) for prefix, count in expected.items()
+                if stored.get(prefix, 0) != count}
+        print(f"저장된 검사 {sum(stored.get(prefix, 0) for prefix in expected)}/{sum(expected.values())}")
+        if lost:
+            sys.exit(f"저장된 검사 수가 성공한 제출 수와 다릅니다: {lost}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+전체 검사 흐름 부하 테스트
+
+가상 참가자 N명을 미리 채운 저장소에서, 동시에 여러 참가자가 검사 전체 흐름을 진행하게 하고
+라우트별 처리량과 p50/p95/p99 응답 시간을 보여 줍니다. 참가자 한 명의 흐름은 다음과 같습니다.
+
+    start-test -> 순서 기억 연습(get-current-problem, submit-answer) -> 본 검사(--max-level까지 맞힌 뒤 두 번 틀림)
+    -> 트레일 메이킹 결과 저장 -> start-test -> 카드 짝 맞추기 결과 -> 스트룹 결과
+
+동시성은 스레드(참가자마다 test client 하나)로 만듭니다.
+
+사용법:
+    python benchmarks/full_flow.py --prefill 1000 --concurrency 8 --participants 200
+    python benchmarks/full_flow.py --backend sql --ingest async
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STROOP_TRIAL = {"word": "빨강", "color": "blue", "user_response": True, "response_time": 800, "correct_answer": False}
+TRAIL_RESULT = {"testA_time": 30, "testA_errors": 0, "testB_time": 60, "testB_errors": 1, "consonant_check_failures": 0}
+CARD_RESULT = [{"level": "1단계", "pairs": 2, "time_taken": 3.0,
+                "correct_card_pairs": [[0, 1]], "user_click_sequence": [0, 1]}]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def prefill(app_module, users, tests_per_user, seed=0):
+    """가상 참가자와 검사 기록을 저장소에 채웁니다."""
+    from ingest import make_entry
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=365)
+    payloads = {
+        "sequence": lambda: {"final_level": rng.randint(1, 8), "history": []},
+        "trail_making": lambda: dict(TRAIL_RESULT, testA_time=rng.randint(20, 90)),
+        "card_matching": lambda: CARD_RESULT,
+        "stroop": lambda: {"practice_trials": [STROOP_TRIAL] * 5, "test_trials": [STROOP_TRIAL] * 40},
+    }
+    for i in range(users):
+        user = app_module.store.add_user(f"prefill-{i}", str(rng.randint(60, 89)), rng.choice(('male', 'female')))
+        records = []
+        for _ in range(tests_per_user):
+            test_type = rng.choice(list(payloads))
+            entry = make_entry(user['id'], test_type, payloads[test_type]())
+            entry['timestamp'] = (start + timedelta(minutes=rng.randint(0, 525600))).isoformat()
+            records.append(app_module.build_test_record(entry))
+        app_module.store.append_tests(records)
+
+
+def run_participant(client, name, max_level, record):
+    """참가자 한 명의 전체 흐름을 진행합니다. record(route, seconds)로 요청마다 기록합니다."""
+    def call(method, path, **kwargs):
+        start = time.perf_counter()
+        response = getattr(client, method)(path, **kwargs)
+        record(f"{method.upper()} {path}", time.perf_counter() - start)
+        assert response.status_code in (200, 302), (path, response.status_code, response.data[:200])
+        return response
+
+    def answer(correct):
+        call('get', '/intermission')
+        problem = call('get', '/api/get-current-problem').get_json()
+        sequence = problem['flash_sequence'] if correct else []
+        return call('post', '/api/submit-answer', json={"answer": sequence, "time_taken": 1.0}).get_json()
+
+    form = {'name': name, 'age': '72', 'gender': 'female'}
+    call('post', '/start-test', data=form)
+    call('get', '/practice')
+    answer(correct=True)
+    call('get', '/test')
+    for _ in range(max_level):
+        answer(correct=True)
+    while answer(correct=False)['status'] != 'game_over':
+        pass
+    call('post', '/save_trail_making_results', json=TRAIL_RESULT)
+
+    call('post', '/start-test', data=form)
+    call('get', '/card-test')
+    call('post', '/api/submit-card-result', json=CARD_RESULT)
+    call('get', '/stroop-test')
+    call('post', '/api/submit-stroop-result', json={"practice_trials": [STROOP_TRIAL] * 10,
+                                                     "test_trials": [STROOP_TRIAL] * 120})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--prefill', type=int, default=1000, help="미리 채울 가상 참가자 수")
+    parser.add_argument('--prefill-tests', type=int, default=4, help="가상 참가자당 검사 기록 수")
+    parser.add_argument('--concurrency', type=int, default=8, help="동시에 진행하는 참가자 수 (스레드)")
+    parser.add_argument('--participants', type=int, default=100, help="흐름을 진행할 참가자 수 (전체)")
+    parser.add_argument('--max-level', type=int, default=4, help="본 검사에서 맞히고 넘어갈 레벨 수")
+    parser.add_argument('--backend', choices=('jsonl', 'sql'), default='jsonl')
+    parser.add_argument('--ingest', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--session', choices=('sqlite', 'memory', 'cookie'), default='sqlite')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # app을 불러오기 전에 저장소 설정을 임시 디렉터리로 돌린다.
+        os.environ['STORAGE_BACKEND'] = args.backend
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'results.db')
+        os.environ['SESSION_BACKEND'] = 'memory'
+        os.environ['SUBMISSION_LOG'] = 'memory'
+        os.environ['INGEST_MODE'] = 'sync'
+        import app as app_module
+        from ingest import IngestQueue
+        from server_session import ServerSideSessionInterface, make_backend
+        from storage import ResultStore
+        if args.session != 'cookie':
+            app_module.app.session_interface = ServerSideSessionInterface(make_backend(args.session, tmp))
+        else:
+            from flask.sessions import SecureCookieSessionInterface
+            app_module.app.session_interface = SecureCookieSessionInterface()
+        if args.backend == 'sql':
+            with app_module.app.app_context():
+                app_module.db.create_all()
+        else:
+            app_module.store = ResultStore(os.path.join(tmp, 'store'))
+        app_module.ingest = IngestQueue(os.path.join(tmp, 'ingest'), app_module.store,
+                                        app_module.build_test_record, context=app_module.app.app_context)
+
+        start = time.perf_counter()
+        with app_module.app.app_context():
+            prefill(app_module, args.prefill, args.prefill_tests)
+        print(f"가상 참가자 {args.prefill}명, 검사 {args.prefill * args.prefill_tests}건 채움 "
+              f"({time.perf_counter() - start:.2f}초)")
+        app_module.warm_caches()
+
+        app_module.INGEST_MODE = args.ingest
+        if args.ingest == 'async':
+            app_module.ingest.start()
+
+        timings, lock = {}, threading.Lock()
+        next_index = iter(range(args.participants))
+
+        def record(route, seconds):
+            with lock:
+                timings.setdefault(route, []).append(seconds * 1000)
+
+        def worker():
+            while True:
+                with lock:
+                    index = next(next_index, None)
+                if index is None:
+                    return
+                run_participant(app_module.app.test_client(), f"flow-{index}", args.max_level, record)
+
+        threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        if args.ingest == 'async':
+            app_module.ingest.wait_idle(timeout=600)
+            app_module.ingest.stop()
+
+        total = sum(len(values) for values in timings.values())
+        print(f"저장소 {args.backend}, 수집 {args.ingest}, 세션 {args.session}, 동시 참가자 {args.concurrency}명")
+        print(f"참가자 {args.participants}명, 요청 {total}건, {elapsed:.2f}초 ({total / elapsed:.1f} req/s)")
+        print(f"  {'라우트':38s} {'건수':>6s} {'req/s':>8s} {'p50':>9s} {'p95':>9s} {'p99':>9s}")
+        for route, values in sorted(timings.items()):
+            print(f"  {route:40s} {len(values):6d} {len(values) / elapsed:8.1f} "
+                  f"{percentile(values, 0.5):7.2f}ms {percentile(values, 0.95):7.2f}ms {percentile(values, 0.99):7.2f}ms")
+
+        with app_module.app.app_context():
+            flow_users = [u for u in app_module.store.users() if u['name'].startswith('flow-')]
+            stored = sum(len(app_module.store.user_tests(u['id'])) for u in flow_users)
+        expected = args.participants * 4   # sequence, trail_making, card_matching, stroop
+        print(f"저장된 검사 {stored}/{expected}")
+        if stored != expected:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
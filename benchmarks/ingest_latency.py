@@ -0,0 +1,98 @@
+"""
+결과 제출 지연 시간 벤치마크 (수집 대기열 vs 요청 안에서 저장)
+
+여러 스레드가 동시에 스트룹 결과를 제출할 때의 응답 시간 p50/p99를
+INGEST_MODE=sync(요청 안에서 채점·저장)와 async(저널에 쓰고 바로 응답)로 각각 잽니다.
+async는 모든 제출이 저장소에 반영될 때까지 걸린 시간도 함께 보여 줍니다.
+
+사용법:
+    python benchmarks/ingest_latency.py --threads 16 --submissions 50 --backend jsonl
+    python benchmarks/ingest_latency.py --backend sql
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STROOP_TRIAL = {"word": "빨강", "color": "blue", "user_response": True, "response_time": 800, "correct_answer": False}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(app_module, mode, args):
+    app_module.INGEST_MODE = mode
+    payload = {"practice_trials": [STROOP_TRIAL] * 10, "test_trials": [STROOP_TRIAL] * args.trials}
+    timings, lock = [], threading.Lock()
+
+    def participant(index):
+        client = app_module.app.test_client()
+        client.post('/start-test', data={'name': f'{mode}-{index}', 'age': '70', 'gender': 'female'})
+        local = []
+        for _ in range(args.submissions):
+            start = time.perf_counter()
+            response = client.post('/api/submit-stroop-result', json=payload)
+            local.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.data[:200]
+        with lock:
+            timings.extend(local)
+
+    threads = [threading.Thread(target=participant, args=(i,)) for i in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    responded = time.perf_counter() - start
+    if mode == 'async':
+        app_module.ingest.wait_idle(timeout=600)
+    stored = time.perf_counter() - start
+    return timings, responded, stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--submissions', type=int, default=50, help="스레드당 제출 수")
+    parser.add_argument('--trials', type=int, default=120, help="제출 한 건의 본 검사 시행 수")
+    parser.add_argument('--backend', choices=('jsonl', 'sql'), default='jsonl')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # app을 불러오기 전에 저장소 설정을 임시 디렉터리로 돌린다.
+        os.environ['STORAGE_BACKEND'] = args.backend
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'results.db')
+        os.environ['SESSION_BACKEND'] = 'memory'
+        os.environ['INGEST_MODE'] = 'sync'
+        import app as app_module
+        from ingest import IngestQueue
+        from storage import ResultStore
+        if args.backend == 'sql':
+            with app_module.app.app_context():
+                app_module.db.create_all()
+        else:
+            app_module.store = ResultStore(os.path.join(tmp, 'store'))
+        app_module.ingest = IngestQueue(os.path.join(tmp, 'ingest'), app_module.store,
+                                        app_module.build_test_record, context=app_module.app.app_context)
+
+        total = args.threads * args.submissions
+        print(f"저장소 {args.backend}, 스레드 {args.threads}개, 제출 {total}건 (본 검사 시행 {args.trials}개)")
+        for mode in ('sync', 'async'):
+            timings, responded, stored = run(app_module, mode, args)
+            ms = [t * 1000 for t in timings]
+            print(f"  {mode:5s} p50 {percentile(ms, 0.5):7.2f}ms  p99 {percentile(ms, 0.99):7.2f}ms  "
+                  f"응답 완료 {responded:6.2f}초  저장 완료 {stored:6.2f}초")
+        app_module.ingest.stop()
+        with app_module.app.app_context():
+            stored_tests = sum(len(app_module.store.user_tests(u['id'])) for u in app_module.store.users())
+        print(f"저장된 검사 {stored_tests}/{total * 2}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+순서 기억 검사 문제 생성 지연 시간 벤치마크
+
+레벨마다 /intermission 요청(문제 생성 + 세션 저장)과 배치 꺼내기(layout_pool.get)의
+p50/p99 지연 시간을 잽니다. --compare를 주면 이전 방식(상자마다 겹치지 않을 때까지 무한히 다시 뽑는 rejection sampling)의
+배치 생성 시간도 함께 잽니다. 이전 방식은 상자가 많으면 끝나지 않을 수 있으므로
+--legacy-timeout 초 안에 끝나지 않은 레벨은 '시간 초과'로 표시합니다.
+
+사용법:
+    python benchmarks/intermission_latency.py --requests 300 --compare
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+from layouts import BOX_SIZE, CANVAS_SIZE, MIN_GAP  # noqa: E402
+from server_session import ServerSideSessionInterface, make_backend  # noqa: E402
+
+
+def legacy_box_positions(num_boxes, canvas_width, canvas_height):
+    """이전 app.generate_box_positions() 그대로"""
+    boxes = []
+    for i in range(num_boxes):
+        while True:
+            x1 = random.randint(MIN_GAP, canvas_width - BOX_SIZE - MIN_GAP)
+            y1 = random.randint(MIN_GAP, canvas_height - BOX_SIZE - MIN_GAP)
+            x2, y2 = x1 + BOX_SIZE, y1 + BOX_SIZE
+            if all(x2 < o['x1'] - MIN_GAP or x1 > o['x2'] + MIN_GAP or y2 < o['y1'] - MIN_GAP or y1 > o['y2'] + MIN_GAP
+                   for o in boxes):
+                boxes.append({"id": i, "x1": x1, "y1": y1, "x2": x2, "y2": y2})
+                break
+    return boxes
+
+
+def _legacy_timings(num_boxes, count, queue):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        legacy_box_positions(num_boxes, CANVAS_SIZE, CANVAS_SIZE)
+        timings.append(time.perf_counter() - start)
+    queue.put(timings)
+
+
+def legacy_timings(num_boxes, count, timeout):
+    """별도 프로세스에서 이전 방식을 count번 실행합니다. 시간 안에 끝나지 않으면 None"""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_legacy_timings, args=(num_boxes, count, queue))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return None
+    return queue.get()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def ms(seconds):
+    return f"{seconds * 1000:8.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300, help="레벨별 요청 수")
+    parser.add_argument('--compare', action='store_true', help="이전 배치 방식과 비교")
+    parser.add_argument('--legacy-timeout', type=float, default=20.0)
+    args = parser.parse_args()
+
+    app = app_module.app
+    app.session_interface = ServerSideSessionInterface(make_backend('memory', app_module.INSTANCE_FOLDER))
+    client = app.test_client()
+    client.post('/start-test', data={'name': 'bench', 'age': '70', 'gender': 'male'})
+
+    print(f"배치 묶음: {app_module.layout_pool.stats}")
+    header = f"{'레벨':>4} {'상자':>4} {'요청 p50':>8} {'요청 p99':>8} | {'배치 p50':>8} {'배치 p99':>8}"
+    if args.compare:
+        header += f" | {'이전 p50':>8} {'이전 p99':>8}"
+    print(header)
+    for level in range(0, app_module.SEQUENCE_MAX_LEVEL + 1):
+        num_boxes = 4 if level == 0 else level + 4
+        with client.session_transaction() as sess:
+            sess['current_level'] = level
+        timings = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            client.get('/intermission')
+            timings.append(time.perf_counter() - start)
+        layouts = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            app_module.layout_pool.get(num_boxes)
+            layouts.append(time.perf_counter() - start)
+        line = (f"{level:>4} {num_boxes:>4} {ms(percentile(timings, 0.5))} {ms(percentile(timings, 0.99))}"
+                f" | {ms(percentile(layouts, 0.5))} {ms(percentile(layouts, 0.99))}")
+        if args.compare:
+            legacy = legacy_timings(num_boxes, args.requests, args.legacy_timeout)
+            line += (" |   시간 초과" if legacy is None
+                     else f" | {ms(percentile(legacy, 0.5))} {ms(percentile(legacy, 0.99))}")
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+핵심 함수 마이크로 벤치마크
+
+데이터 크기를 바꿔 가며 다음 함수의 호출당 시간을 잽니다. 숫자를 커밋 전후로 비교해 성능 회귀를 찾습니다.
+
+- store_load : 저장소 열기 + 전체 인덱스 읽기 (이전 load_database)
+- store_save : 검사 결과 한 건 저장 (이전 save_database)
+- layout     : 상자 배치 만들기 (이전 generate_box_positions) - 무작위 배치, 격자 대체 포함 배치, 배치 묶음에서 꺼내기
+- stroop     : process_stroop_result 채점
+
+사용법:
+    python benchmarks/micro.py
+    python benchmarks/micro.py --only store_load,stroop --users 100,1000,10000 --repeat 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import make_entry  # noqa: E402
+from layouts import LayoutPool, make_layout, random_layout  # noqa: E402
+from storage import ResultStore  # noqa: E402
+from stroop import process_stroop_result  # noqa: E402
+
+WORDS = ["빨강", "파랑", "초록", "노랑"]
+COLORS = ["red", "blue", "green", "yellow"]
+
+
+def bench(fn, number, repeat):
+    """fn을 number번 호출하는 것을 repeat번 되풀이해 호출당 (중앙값, 최솟값) ms를 돌려줍니다."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) * 1000 / number)
+    return statistics.median(samples), min(samples)
+
+
+def report(name, size, result):
+    median, best = result
+    print(f"  {name:24s} {size:>10s}  중앙값 {median:10.4f}ms  최솟값 {best:10.4f}ms")
+
+
+def make_stroop_payload(rng, trials):
+    def trial():
+        word, color = rng.choice(WORDS), rng.choice(COLORS)
+        correct = WORDS.index(word) == COLORS.index(color)
+        return {"word": word, "color": color, "user_response": rng.random() < 0.5,
+                "response_time": rng.randint(300, 1500), "correct_answer": correct}
+    return {"practice_trials": [trial() for _ in range(10)], "test_trials": [trial() for _ in range(trials)]}
+
+
+def fill_store(root, users, tests_per_user, rng):
+    store = ResultStore(root, fsync=False)
+    for i in range(users):
+        user = store.add_user(f"micro-{i}", str(rng.randint(60, 89)), 'female')
+        records = []
+        for _ in range(tests_per_user):
+            entry = make_entry(user['id'], 'trail_making', {"testA_time": rng.randint(20, 90), "testB_time": 60})
+            records.append({"id": entry['id'], "user_id": entry['user_id'], "test_type": entry['test_type'],
+                            "timestamp": entry['timestamp'], "result": entry['payload']})
+        store.append_tests(records)
+    return store
+
+
+def bench_store(args, rng, only):
+    for users in args.users:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = os.path.join(tmp, 'store')
+            fill_store(root, users, args.tests_per_user, rng)
+            size = f"{users}명"
+            if 'store_load' in only:
+                report('store_load', size, bench(lambda: ResultStore(root).refresh(), 1, args.repeat))
+            if 'store_save' in only:
+                store = ResultStore(root, fsync=args.fsync)
+                store.refresh()
+                user_id = store.users()[0]['id']
+                report('store_save', size, bench(
+                    lambda: store.append_test(user_id, 'trail_making', '2024-01-01T00:00:00', result={}),
+                    20, args.repeat))
+
+
+def bench_layout(args, rng):
+    pool = LayoutPool(seed=0)
+    for boxes in args.boxes:
+        size = f"상자 {boxes}개"
+        report('layout random_layout', size, bench(lambda: random_layout(boxes, rng=rng), 10, args.repeat))
+        report('layout make_layout', size, bench(lambda: make_layout(boxes, rng=rng), 10, args.repeat))
+        pool.warm([boxes])
+        report('layout pool.get', size, bench(lambda: pool.get(boxes, rng=rng), 1000, args.repeat))
+
+
+def bench_stroop(args, rng):
+    for trials in args.trials:
+        payload = make_stroop_payload(rng, trials)
+        report('stroop', f"시행 {trials}개", bench(lambda: process_stroop_result(payload), 20, args.repeat))
+
+
+def int_list(text):
+    return [int(value) for value in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', default='store_load,store_save,layout,stroop', help="실행할 항목 (쉼표로 구분)")
+    parser.add_argument('--users', type=int_list, default=[100, 1000, 5000], help="저장소 참가자 수")
+    parser.add_argument('--tests-per-user', type=int, default=4)
+    parser.add_argument('--fsync', action='store_true', help="store_save에서 fsync까지 잽니다")
+    parser.add_argument('--boxes', type=int_list, default=[4, 8, 12, 16], help="상자 수")
+    parser.add_argument('--trials', type=int_list, default=[60, 120, 1000, 10000], help="스트룹 본 검사 시행 수")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    only = set(args.only.split(','))
+    rng = random.Random(args.seed)
+
+    if only & {'store_load', 'store_save'}:
+        bench_store(args, rng, only)
+    if 'layout' in only:
+        bench_layout(args, rng)
+    if 'stroop' in only:
+        bench_stroop(args, rng)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+세션 크기/지연 시간 벤치마크
+
+순서 기억 검사를 최고 레벨까지 모두 맞히는 참가자 흐름을 Flask 기본 쿠키 세션과
+서버 측 세션 저장소로 각각 실행하고, 요청마다 보내는 세션 쿠키 크기와 응답 시간을 비교합니다.
+
+사용법:
+    python benchmarks/session_payload.py --runs 20 --max-level 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.sessions import SecureCookieSessionInterface  # noqa: E402
+
+import app as app_module  # noqa: E402
+from server_session import ServerSideSessionInterface, make_backend  # noqa: E402
+from storage import ResultStore  # noqa: E402
+
+
+def run_flow(client, name):
+    """(세션 쿠키 크기 목록, 요청별 소요 시간 목록)을 돌려줍니다."""
+    cookie_sizes, timings = [], []
+
+    def request(method, path, **kwargs):
+        cookie = client.get_cookie(app_module.app.config['SESSION_COOKIE_NAME'])
+        cookie_sizes.append(len(cookie.value) if cookie else 0)
+        start = time.perf_counter()
+        response = getattr(client, method)(path, **kwargs)
+        timings.append(time.perf_counter() - start)
+        return response
+
+    request('post', '/start-test', data={'name': name, 'age': '70', 'gender': 'male'})
+    request('get', '/test')
+    while True:
+        request('get', '/intermission')
+        problem = request('get', '/api/get-current-problem').get_json()
+        result = request('post', '/api/submit-answer',
+                         json={"answer": problem['flash_sequence'], "time_taken": 1.0}).get_json()
+        if result['status'] == 'test_complete':
+            return cookie_sizes, timings
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--max-level', type=int, default=8, help="흐름을 끝낼 레벨")
+    args = parser.parse_args()
+    app_module.SEQUENCE_MAX_LEVEL = args.max_level
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app_module.store = ResultStore(os.path.join(tmp, 'store'), fsync=False)
+        interfaces = {
+            "cookie": SecureCookieSessionInterface(),
+            "sqlite": ServerSideSessionInterface(make_backend('sqlite', tmp)),
+        }
+        for label, interface in interfaces.items():
+            app_module.app.session_interface = interface
+            sizes, timings = [], []
+            for run in range(args.runs):
+                client = app_module.app.test_client()
+                run_sizes, run_timings = run_flow(client, f"{label}-{run}")
+                sizes.extend(run_sizes)
+                timings.extend(run_timings)
+            print(f"{label:7s} 세션 쿠키 평균 {sum(sizes) / len(sizes):7.0f}B  최대 {max(sizes):5d}B  "
+                  f"요청 p50 {percentile(timings, 0.5) * 1000:6.2f}ms  p99 {percentile(timings, 0.99) * 1000:6.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+gunicorn 시작 시간과 워커 메모리 비교 (preload 사용 / 미사용)
+
+가상 참가자를 채운 임시 instance 폴더로 gunicorn(gunicorn.conf.py)을 두 번 띄워 다음을 비교합니다.
+
+- 모든 워커가 준비될 때까지 걸린 시간, 워커별 준비 시간(fork 후)
+- 마스터와 워커의 RSS, PSS(나눠 쓰는 페이지를 나눠 센 값), 다른 프로세스와 나눠 쓰는 양
+
+워커들의 PSS 합이 실제로 쓰는 메모리에 가깝습니다. 리눅스에서만 메모리를 잴 수 있습니다.
+
+사용법:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --prefill 20000 --workers 4
+"""
+import argparse
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from metrics import process_memory  # noqa: E402
+
+WORKER_READY = re.compile(r'워커 (\d+) 준비: fork 후 ([\d.]+)초')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def prefill(instance, users, tests_per_user):
+    """임시 instance 폴더의 저장소를 채웁니다. (별도 프로세스에서 app을 불러와 채움)"""
+    code = ("import sys; sys.path.insert(0, 'benchmarks'); import app; from full_flow import prefill; "
+            f"app.app.app_context().push(); prefill(app, {users}, {tests_per_user})")
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=dict(os.environ, INSTANCE_FOLDER=instance), check=True)
+
+
+def children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def start(instance, preload, workers, timeout):
+    """gunicorn을 띄워 모든 워커가 준비될 때까지 기다린 뒤 결과를 돌려줍니다."""
+    port = free_port()
+    log_path = os.path.join(instance, f'gunicorn-{preload}.log')
+    env = dict(os.environ, INSTANCE_FOLDER=instance, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_PRELOAD='1' if preload else '0')
+    started = time.perf_counter()
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()'],
+                                   cwd=ROOT, env=env, stdout=log, stderr=log)
+    try:
+        ready = []
+        while len(ready) < workers:
+            if process.poll() is not None or time.perf_counter() - started > timeout:
+                with open(log_path) as f:
+                    sys.exit(f"gunicorn이 준비되지 않았습니다:\n{f.read()[-2000:]}")
+            time.sleep(0.05)
+            with open(log_path) as f:
+                ready = WORKER_READY.findall(f.read())
+        all_ready = time.perf_counter() - started
+        urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=10).read()
+        return {
+            "all_ready": all_ready,
+            "worker_init": [float(seconds) for _, seconds in ready],
+            "master": process_memory(process.pid),
+            "workers": [process_memory(pid) for pid in children(process.pid)],
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+def report(name, result):
+    workers = [usage for usage in result["workers"] if usage]
+    init = result["worker_init"]
+    print(f"{name}")
+    print(f"  모든 워커 준비 {result['all_ready']:.2f}초, 워커 준비(fork 후) 평균 {sum(init) / len(init):.3f}초 "
+          f"최대 {max(init):.3f}초")
+    if result["master"]:
+        print(f"  마스터 RSS {result['master']['rss'] / 1024:.1f}MB")
+    if workers:
+        def total(key):
+            return sum(usage[key] for usage in workers) / 1024
+        print(f"  워커 {len(workers)}개 RSS 합 {total('rss'):.1f}MB, PSS 합 {total('pss'):.1f}MB, "
+              f"공유 {total('shared'):.1f}MB, 전용 {total('private'):.1f}MB")
+        for usage in workers:
+            print(f"    RSS {usage['rss'] / 1024:7.1f}MB  PSS {usage['pss'] / 1024:7.1f}MB  "
+                  f"공유 {usage['shared'] / 1024:7.1f}MB  전용 {usage['private'] / 1024:7.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--prefill', type=int, default=5000, help="미리 채울 가상 참가자 수")
+    parser.add_argument('--prefill-tests', type=int, default=4, help="가상 참가자당 검사 기록 수")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=300, help="워커 준비를 기다리는 최대 시간(초)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as instance:
+        start_time = time.perf_counter()
+        prefill(instance, args.prefill, args.prefill_tests)
+        print(f"가상 참가자 {args.prefill}명, 검사 {args.prefill * args.prefill_tests}건 채움 "
+              f"({time.perf_counter() - start_time:.2f}초)")
+        report("preload 미사용 (워커마다 앱을 불러옴)", start(instance, False, args.workers, args.timeout))
+        report("preload 사용 (마스터에서 한 번 불러와 fork)", start(instance, True, args.workers, args.timeout))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+결과 저장 동시성 스트레스 벤치마크
+
+여러 프로세스(gunicorn 워커 대신)가 같은 저장소 디렉터리에 동시에 결과를 제출하고,
+끝난 뒤 저장된 검사 수가 제출 수와 같은지(유실 없음) 확인합니다.
+INGEST_MODE=sync로 실행하면 요청 안에서 바로 저장하는 방식을 잽니다.
+
+사용법:
+    python benchmarks/stress_submissions.py --workers 4 --participants 25
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+from ingest import IngestQueue  # noqa: E402
+from storage import ResultStore  # noqa: E402
+
+STROOP_TRIALS = [
+    {"word": "빨강", "color": "blue", "user_response": True, "response_time": 800, "correct_answer": False},
+    {"word": "파랑", "color": "blue", "user_response": True, "response_time": 650, "correct_answer": True},
+]
+
+
+def submit_all(client, name):
+    """참가자 한 명이 네 가지 결과 엔드포인트에 한 번씩 제출합니다. (경로, 소요 시간) 목록을 돌려줍니다."""
+    timings = []
+
+    def timed(path, **kwargs):
+        start = time.perf_counter()
+        response = client.post(path, **kwargs)
+        timings.append((path, time.perf_counter() - start))
+        assert response.status_code == 200, (path, response.status_code, response.data[:200])
+        return response
+
+    client.post('/start-test', data={'name': name, 'age': '70', 'gender': 'female'})
+    # 순서 기억 검사: 레벨 1에서 두 번 틀려 결과가 저장되게 한다.
+    client.get('/test')
+    for _ in range(2):
+        client.get('/intermission')
+        timed('/api/submit-answer', json={"answer": [], "time_taken": 1.0})
+    timed('/save_trail_making_results', json={"testA_time": 30, "testA_errors": 0,
+                                             "testB_time": 60, "testB_errors": 1,
+                                             "consonant_check_failures": 0})
+    timed('/api/submit-card-result', json=[{"level": "1단계", "pairs": 2, "time_taken": 3.0,
+                                            "correct_card_pairs": [[0, 1]], "user_click_sequence": [0, 1]}])
+    timed('/api/submit-stroop-result', json={"practice_trials": STROOP_TRIALS,
+                                             "test_trials": STROOP_TRIALS * 20})
+    return timings
+
+
+def worker(args):
+    store_dir, worker_id, participants = args
+    app_module.store = ResultStore(store_dir)
+    app_module.ingest = IngestQueue(os.path.join(store_dir, 'ingest'), app_module.store, app_module.build_test_record)
+    client = app_module.app.test_client()
+    timings = []
+    for i in range(participants):
+        timings.extend(submit_all(client, f"stress-{worker_id}-{i}"))
+    # 수집 대기열을 쓰는 경우 처리 담당 워커가 저널을 모두 반영할 때까지 기다린다.
+    app_module.ingest.wait_idle()
+    return timings
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--participants', type=int, default=25, help="워커당 참가자 수")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.map(worker, [(store_dir, w, args.participants) for w in range(args.workers)])
+        elapsed = time.perf_counter() - start
+
+        timings = [t for result in results for t in result]
+        by_path = {}
+        for path, seconds in timings:
+            by_path.setdefault(path, []).append(seconds * 1000)
+
+        expected_users = args.workers * args.participants
+        expected_tests = expected_users * 4   # sequence, trail_making, card_matching, stroop
+        store = ResultStore(store_dir)
+        stored_users = len(store.users())
+        stored_tests = sum(len(store.user_test_entries(u['id'])) for u in store.users())
+
+    print(f"{len(timings)}건 제출, {elapsed:.2f}초 ({len(timings) / elapsed:.1f} req/s)")
+    for path, values in sorted(by_path.items()):
+        print(f"  {path:32s} p50 {percentile(values, 0.5):7.2f}ms  p99 {percentile(values, 0.99):7.2f}ms")
+    print(f"참가자 {stored_users}/{expected_users}, 검사 {stored_tests}/{expected_tests}")
+    if stored_users != expected_users or stored_tests != expected_tests:
+        print("유실된 결과가 있습니다!")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+스트룹 재채점 벤치마크
+
+합성 세션 N개를 만들어 기존 시행별 반복문(stroop.score_trials)과
+NumPy 일괄 재채점(stroop_rescore.score_sessions)의 처리 시간을 비교하고, 두 결과가 같은지 확인합니다.
+응답 시간 제한(rt_cutoff_ms) 규칙도 정해 둔 시행으로 확인합니다.
+
+사용법:
+    python benchmarks/stroop_rescoring.py --sessions 20000 --trials 60
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stroop import get_trial_columns, process_stroop_result, score_trials  # noqa: E402
+from stroop_rescore import packed_columns, score_columns, score_sessions, trial_columns  # noqa: E402
+
+WORDS = ["빨강", "파랑", "초록", "노랑"]
+COLORS = ["red", "blue", "green", "yellow"]
+
+
+def make_trial(rng):
+    correct = rng.random() < 0.5
+    roll = rng.random()
+    response = correct if roll < 0.85 else (None if roll < 0.92 else not correct)
+    return {"word": rng.choice(WORDS), "color": rng.choice(COLORS), "user_response": response,
+            "response_time": rng.randint(300, 2500), "correct_answer": correct}
+
+
+def make_sessions(count, trials, seed=0):
+    rng = random.Random(seed)
+    return [{"practice_trials": [make_trial(rng) for _ in range(6)],
+             "test_trials": [make_trial(rng) for _ in range(trials)]} for _ in range(count)]
+
+
+def check_rt_cutoff():
+    """응답 시간 제한은 늦게 누른 응답에만 적용되는지 확인합니다. 틀린 항목 목록을 돌려줍니다."""
+    withheld = {"user_response": False, "correct_answer": False, "response_time": 2000}   # 제대로 참은 시행
+    correct = {"user_response": True, "correct_answer": True, "response_time": 600}
+    late_hit = {"user_response": True, "correct_answer": True, "response_time": 1500}
+    late_false_alarm = {"user_response": True, "correct_answer": False, "response_time": 1500}
+    cases = [
+        ([withheld, correct], {"total_incorrect": 0, "overall_error_rate_percent": 0.0}),
+        ([late_hit, correct], {"total_incorrect": 1, "no_response_errors": 1, "false_positive_errors": 0}),
+        ([late_false_alarm, correct], {"total_incorrect": 0, "false_positive_errors": 0}),
+    ]
+    failures = []
+    for trials, expected in cases:
+        summary = score_sessions([([], trials)], rt_cutoff_ms=1000)[0]
+        wrong = {key: summary[key] for key, value in expected.items() if summary[key] != value}
+        if wrong:
+            failures.append((trials, wrong))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=20000)
+    parser.add_argument('--trials', type=int, default=60)
+    args = parser.parse_args()
+
+    sessions = make_sessions(args.sessions, args.trials)
+    print(f"세션 {args.sessions}개 x 본 검사 {args.trials}문항")
+
+    start = time.perf_counter()
+    loop_summaries = [score_trials(session['practice_trials'], session['test_trials']) for session in sessions]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    practice_columns = trial_columns([s['practice_trials'] for s in sessions])
+    test_columns = trial_columns([s['test_trials'] for s in sessions])
+    convert_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vector_summaries = score_columns(practice_columns, test_columns)
+    vector_seconds = time.perf_counter() - start
+
+    stored = [get_trial_columns(process_stroop_result(session)) for session in sessions]
+    start = time.perf_counter()
+    packed_summaries = score_columns(packed_columns([practice for practice, _ in stored]),
+                                     packed_columns([test for _, test in stored]))
+    packed_seconds = time.perf_counter() - start
+
+    print(f"  시행별 반복문      : {loop_seconds:.3f}초")
+    print(f"  열 배열 변환       : {convert_seconds:.3f}초")
+    print(f"  NumPy 일괄 채점    : {vector_seconds:.3f}초 (반복문 대비 {loop_seconds / vector_seconds:.1f}배)")
+    print(f"  저장 형식(열 배열)에서 변환+채점 : {packed_seconds:.3f}초 (반복문 대비 {loop_seconds / packed_seconds:.1f}배)")
+    mismatches = sum(1 for a, b, c in zip(loop_summaries, vector_summaries, packed_summaries) if not a == b == c)
+    print(f"  요약 불일치        : {mismatches}건")
+    cutoff_failures = check_rt_cutoff()
+    print(f"  응답 시간 제한 확인: {'통과' if not cutoff_failures else cutoff_failures}")
+    if mismatches or cutoff_failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+gevent 워커에서 기다리는 작업
+
+GUNICORN_WORKER_CLASS=gevent면(gunicorn.conf.py) 워커 프로세스 하나의 여러 요청이 greenlet으로 한 스레드에서 번갈아 돕니다.
+소켓과 time.sleep은 gevent가 바꿔 끼운 것이라 기다리는 동안 다른 요청이 돌지만, 파일 잠금(flock), fsync,
+SQLite 잠금 대기는 C 함수 안에서 기다리므로 그동안 워커 전체가 멈춥니다.
+
+여기의 함수들은 gevent 워커에서는 그런 대기를 다른 요청에 양보하는 방식으로 하고,
+그 밖의 경우(sync 워커, 개발 서버, CLI 명령)에는 원래 호출을 그대로 합니다.
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경
+    fcntl = None
+
+# 잠금을 다시 시도하는 최대 간격 (초)
+POLL_MAX = 0.02
+# SQLite 잠금을 기다리는 최대 시간 (초). sqlite3.connect(timeout=)과 같은 뜻
+SQLITE_TIMEOUT = 10
+# 최근 fsync 시간의 평균이 이보다 길면 스레드 풀에서 기다린다 (초)
+FSYNC_OFFLOAD = 0.002
+
+_fsync_seconds = 0.0   # 최근 fsync 시간의 지수 이동 평균
+
+
+def active():
+    """gevent가 monkey patch한 프로세스인지"""
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('time')
+
+
+def _backoff():
+    delay = 0.0005
+    while True:
+        yield delay
+        delay = min(delay * 2, POLL_MAX)
+
+
+def flock(fd, mode):
+    """
+    fcntl.flock(fd, mode)과 같습니다.
+
+    flock은 같은 프로세스 안에서도 열린 파일마다 따로 잡히므로, gevent 워커에서 그냥 기다리면
+    잠금을 쥔 다른 요청이 돌지 못해 워커가 멈춥니다. 잠금을 얻을 때까지 잠깐씩 쉬며 다시 시도하고,
+    쉬는 동안에는 그 요청이 돌아 잠금을 풉니다.
+    """
+    if not active():
+        fcntl.flock(fd, mode)
+        return
+    for delay in _backoff():
+        try:
+            fcntl.flock(fd, mode | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            time.sleep(delay)
+
+
+def _timed_fsync(fd):
+    global _fsync_seconds
+    start = time.perf_counter()
+    os.fsync(fd)
+    _fsync_seconds += (time.perf_counter() - start - _fsync_seconds) * 0.1
+
+
+def fsync(fd):
+    """
+    os.fsync(fd)와 같습니다.
+
+    gevent 워커에서 fsync가 오래 걸리는 디스크면 스레드 풀에서 기다려 그동안 다른 요청이 돌게 합니다.
+    빠른 디스크에서는 스레드 풀로 넘기고 돌려받는 비용이 fsync보다 커서 그대로 호출합니다.
+    """
+    if active() and _fsync_seconds > FSYNC_OFFLOAD:
+        from gevent import get_hub
+        get_hub().threadpool.apply(_timed_fsync, (fd,))
+    else:
+        _timed_fsync(fd)
+
+
+def thread_local():
+    """
+    threading.local()과 같습니다. gevent 워커에서는 요청(greenlet)마다가 아니라 워커 스레드마다 하나입니다.
+
+    SQLite 연결을 요청마다 새로 열지 않고 같은 워커의 요청들이 함께 쓰게 할 때 씁니다. 한 문장을 실행하는 동안이나
+    BEGIN부터 COMMIT까지는 다른 요청으로 넘어가지 않으므로 한 연결을 함께 써도 됩니다.
+    """
+    if active():
+        from gevent import monkey
+        return monkey.get_original('threading', 'local')()
+    return threading.local()
+
+
+def sqlite_connect(path):
+    """
+    autocommit SQLite 연결을 엽니다.
+
+    gevent 워커에서는 SQLite가 안에서 잠금을 기다리지 않게 timeout을 0으로 두고, sqlite_execute()가 기다립니다.
+    """
+    return sqlite3.connect(path, timeout=0 if active() else SQLITE_TIMEOUT, isolation_level=None)
+
+
+def sqlite_execute(conn, sql, params=()):
+    """conn.execute()와 같습니다. 다른 연결이 잠금을 쥐고 있으면 SQLITE_TIMEOUT초까지 잠깐씩 쉬며 다시 시도합니다."""
+    deadline = None
+    for delay in _backoff():
+        try:
+            return conn.execute(sql, params)
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            if deadline is None:
+                deadline = time.monotonic() + SQLITE_TIMEOUT
+            elif time.monotonic() > deadline:
+                raise
+            time.sleep(delay)
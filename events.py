@@ -0,0 +1,281 @@
+"""
+검사 중 이벤트 기록 (트레일 메이킹, 스트룹)
+
+브라우저(static/js/telemetry.js)는 클릭·응답 이벤트마다 performance.now() 시각과 좌표를 모아 두었다가
+단계 사이의 쉬는 시점이나 페이지를 떠날 때 묶음으로 보냅니다. 묶음은 열(column) 배열 형식이고
+시각 열(dt)은 바로 앞 이벤트와의 차이를 0.1ms 단위 정수로 담습니다.
+
+    {"v": 1, "stream": "<페이지마다 새 ID>", "seq": 0, "origin": <performance.timeOrigin>, "t0": <첫 기준 시각>,
+     "cols": {"dt": [0, 5123, ...], "k": ["phase_start", "click", ...], "phase": [...], "x": [...], ...}}
+
+묶음은 결과 저장소와 별도로 세션마다 파일 하나(instance/events/<세션 이벤트 ID>.jsonl)에 한 줄씩 덧붙입니다.
+재전송이나 sendBeacon으로 같은 묶음이 두 번 와도 읽을 때 (stream, seq)로 한 번만 씁니다.
+기록 파일 하나는 MAX_LOG_BYTES까지만 받습니다.
+
+결과를 저장할 때 derive()가 결과를 제출한 페이지(stream)의 이벤트로 요약 지표를 다시 계산합니다.
+그 페이지가 보낸 묶음이 다 있을 때만 계산하고(read_stream), 스트룹은 다시 만든 시행 목록이
+제출된 시행 목록과 순서까지 같을 때만 씁니다(matches_client).
+"""
+import json
+import os
+import re
+import time
+
+import cooperative
+from metrics import registry as metrics
+from storage import _dump_line, _locked
+
+FORMAT_VERSION = 1
+EVENT_TEST_TYPES = ("trail_making", "stroop")
+# 시각 열의 단위 (1ms를 몇 칸으로 나누는지)
+TIME_SCALE = 10
+MAX_BATCH_EVENTS = 1000
+# 기록 파일(세션 하나) 최대 크기. 넘는 묶음은 받지 않는다.
+MAX_LOG_BYTES = 4 * 1024 * 1024
+
+_LOG_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+def valid_log_id(log_id):
+    return isinstance(log_id, str) and bool(_LOG_ID.match(log_id))
+
+
+def decode_batch(batch):
+    """
+    묶음 하나를 이벤트 목록으로 풉니다. 이벤트의 "t"는 페이지 기준 ms, "at"은 epoch ms입니다.
+
+    형식이 맞지 않으면 ValueError를 냅니다.
+    """
+    if not isinstance(batch, dict) or batch.get('v') != FORMAT_VERSION:
+        raise ValueError("지원하지 않는 이벤트 묶음 형식입니다.")
+    columns = batch.get('cols')
+    if not isinstance(columns, dict) or not isinstance(columns.get('dt'), list) or not isinstance(columns.get('k'), list):
+        raise ValueError("이벤트 묶음에 dt, k 열이 없습니다.")
+    count = len(columns['dt'])
+    if count > MAX_BATCH_EVENTS:
+        raise ValueError(f"이벤트 묶음은 {MAX_BATCH_EVENTS}개까지 보낼 수 있습니다.")
+    if any(not isinstance(values, list) or len(values) != count for values in columns.values()):
+        raise ValueError("이벤트 묶음의 열 길이가 서로 다릅니다.")
+    try:
+        t = float(batch.get('t0') or 0) * TIME_SCALE
+        origin = float(batch.get('origin') or 0)
+        events = []
+        for i in range(count):
+            t += int(columns['dt'][i])
+            event = {key: values[i] for key, values in columns.items() if key != 'dt' and values[i] is not None}
+            event['t'] = t / TIME_SCALE
+            event['at'] = origin + event['t']
+            events.append(event)
+    except (TypeError, ValueError):
+        raise ValueError("이벤트 묶음의 시각 값이 올바르지 않습니다.")
+    return events
+
+
+class EventLogFull(ValueError):
+    """기록 파일이 MAX_LOG_BYTES를 넘게 되는 묶음"""
+
+
+class EventLog:
+    """세션별 이벤트 기록 파일"""
+
+    def __init__(self, root, fsync=False, max_bytes=MAX_LOG_BYTES):
+        self.root = root
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, log_id):
+        if not valid_log_id(log_id):
+            raise ValueError(f"올바르지 않은 이벤트 기록 ID: {log_id!r}")
+        return os.path.join(self.root, f"{log_id}.jsonl")
+
+    def append(self, log_id, test_type, batch):
+        """
+        묶음을 검사한 뒤 기록 파일에 덧붙이고 이벤트 수를 돌려줍니다.
+
+        형식이 맞지 않으면 ValueError, 기록 파일이 max_bytes를 넘게 되면 EventLogFull을 냅니다.
+        """
+        if test_type not in EVENT_TEST_TYPES:
+            raise ValueError(f"이벤트를 기록하지 않는 검사 유형입니다: {test_type}")
+        count = len(decode_batch(batch))
+        line = _dump_line({"test_type": test_type, "received_at": time.time(), "batch": batch})
+        start = time.perf_counter()
+        with open(self.path(log_id), 'ab') as f, _locked(f):
+            if os.fstat(f.fileno()).st_size + len(line) > self.max_bytes:
+                raise EventLogFull("이 검사 회차의 이벤트 기록이 너무 큽니다.")
+            f.write(line)
+            f.flush()
+            if self.fsync:
+                cooperative.fsync(f.fileno())
+        # 세션마다 파일이 달라 레이블은 하나로 묶는다.
+        metrics.observe('store_io_seconds', time.perf_counter() - start, op='save', file='events')
+        metrics.observe('store_io_bytes', len(line), op='save', file='events')
+        return count
+
+    def _batches(self, log_id, test_type=None, stream=None):
+        """기록된 묶음을 (seq, 이벤트 목록)으로 돌려줍니다. 같은 (stream, seq) 묶음은 한 번만 씁니다."""
+        try:
+            f = open(self.path(log_id), 'rb')
+        except FileNotFoundError:
+            return []
+        start = time.perf_counter()
+        seen, batches, nbytes = set(), [], 0
+        with f, _locked(f, shared=True):
+            for line in f:
+                nbytes += len(line)
+                try:
+                    entry = json.loads(line)
+                    batch = entry['batch']
+                    if test_type is not None and entry.get('test_type') != test_type:
+                        continue
+                    if stream is not None and batch.get('stream') != stream:
+                        continue
+                    key = (entry.get('test_type'), batch.get('stream'), batch.get('seq'))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    batches.append((batch.get('seq'), decode_batch(batch)))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    continue   # 쓰다 끊긴 마지막 줄
+        metrics.observe('store_io_seconds', time.perf_counter() - start, op='load', file='events')
+        metrics.observe('store_io_bytes', nbytes, op='load', file='events')
+        return batches
+
+    def read(self, log_id, test_type=None, stream=None):
+        """기록된 이벤트를 시각 순서로 돌려줍니다. stream을 주면 그 페이지가 보낸 묶음만 씁니다."""
+        events = [event for _, batch in self._batches(log_id, test_type, stream) for event in batch]
+        events.sort(key=lambda event: event['at'])
+        return events
+
+    def read_stream(self, log_id, test_type, stream, batch_count):
+        """
+        한 페이지(stream)가 보낸 이벤트를 시각 순서로 돌려줍니다.
+
+        페이지가 보냈다고 한 묶음(seq 0 ~ batch_count-1) 가운데 빠진 것이 있으면 None을 돌려줍니다.
+        """
+        batches = self._batches(log_id, test_type, stream)
+        if {seq for seq, _ in batches} != set(range(batch_count)):
+            return None
+        events = [event for _, batch in batches for event in batch]
+        events.sort(key=lambda event: event['at'])
+        return events
+
+
+# --- 트레일 메이킹 ---
+# 단계 -> (소요 시간, 오류 수, 완료, 중지) 결과 키
+TRAIL_PHASES = {
+    "A_PRACTICE": ("testA_practice_time", "testA_practice_errors", None, "testA_practice_terminated"),
+    "A_MAIN": ("testA_time", "testA_errors", "testA_completed", "testA_terminated"),
+    "CONSONANT_CHECK": ("consonant_check_time", "consonant_check_failures",
+                        "consonant_check_completed", "consonant_check_terminated"),
+    "B_PRACTICE": ("testB_practice_time", "testB_practice_errors", None, "testB_practice_terminated"),
+    "B_MAIN": ("testB_time", "testB_errors", "testB_completed", "testB_terminated"),
+}
+
+
+def derive_trail_making(events):
+    """
+    트레일 메이킹 이벤트로 단계별 소요 시간(초)과 오류 수를 계산합니다.
+
+    원 잇기 단계는 첫 번째 원을 맞게 누른 때부터, 자음 순서 맞추기는 단계가 시작된 때부터 잽니다.
+    같은 단계가 두 번 시작되면(새로고침 등) 마지막 것을 씁니다.
+    """
+    phases = {}
+    for event in events:
+        phase = event.get('phase')
+        if phase not in TRAIL_PHASES:
+            continue
+        kind = event.get('k')
+        if kind == 'phase_start':
+            start = event['at'] if phase == 'CONSONANT_CHECK' else None
+            phases[phase] = {"start": start, "last": None, "end": None, "errors": 0, "status": None}
+            continue
+        state = phases.get(phase)
+        if state is None or state['status'] is not None:
+            continue
+        if kind == 'click':
+            if event.get('ok'):
+                if state['start'] is None:
+                    state['start'] = event['at']
+                state['last'] = event['at']
+            else:
+                state['errors'] += 1
+        elif kind == 'phase_end':
+            state['status'], state['end'] = event.get('status'), event['at']
+
+    result = {}
+    for phase, state in phases.items():
+        time_key, errors_key, completed_key, terminated_key = TRAIL_PHASES[phase]
+        completed = state['status'] == 'completed'
+        end = state['last'] if completed else state['end']
+        seconds = (end - state['start']) / 1000 if state['start'] is not None and end is not None else 0
+        result[time_key] = round(seconds, 2)
+        result[errors_key] = state['errors']
+        if completed_key:
+            result[completed_key] = completed
+        result[terminated_key] = state['status'] == 'terminated'
+    return result
+
+
+# --- 스트룹 ---
+def stroop_trials(events):
+    """스트룹 이벤트(stimulus, response)를 (연습, 본 검사) 시행 목록으로 묶습니다. 응답 시간은 ms입니다."""
+    trials = {"practice": [], "test": []}
+    shown = {}
+    for event in events:
+        phase = event.get('phase')
+        if phase not in trials:
+            continue
+        if event.get('k') == 'stimulus':
+            shown[phase] = event
+        elif event.get('k') == 'response' and shown.get(phase) is not None:
+            stimulus = shown.pop(phase)
+            trial = {"round": stimulus.get('round'), "word": stimulus.get('word'), "color": stimulus.get('color'),
+                     "user_response": bool(event.get('pressed')),
+                     "response_time": round(event['at'] - stimulus['at'], 1),
+                     "correct_answer": bool(stimulus.get('target'))}
+            trial["is_correct"] = trial["user_response"] == trial["correct_answer"]
+            if phase == 'test':
+                trial["trial_number"] = stimulus.get('i', 0) + 1
+            trials[phase].append(trial)
+    return trials["practice"], trials["test"]
+
+
+# 이벤트로 다시 만든 시행과 제출된 시행이 같은 시행인지 볼 때 비교하는 키
+STROOP_TRIAL_KEYS = ("round", "word", "color", "user_response", "correct_answer")
+
+
+def matches_client(test_type, derived, reported):
+    """
+    derive()로 다시 만든 결과가 제출된 결과와 같은 시행들인지 확인합니다.
+
+    스트룹은 연습과 본 검사 시행의 수와 순서(회차, 단어, 색, 응답 여부, 정답)가 같아야 합니다.
+    시행 목록이 없는 검사(트레일 메이킹)는 항상 True입니다.
+    """
+    if test_type != 'stroop':
+        return True
+    for key in ('practice_trials', 'test_trials'):
+        client_trials = reported.get(key) or []
+        if len(derived[key]) != len(client_trials):
+            return False
+        for trial, client_trial in zip(derived[key], client_trials):
+            if not isinstance(client_trial, dict) or any(
+                    trial.get(name) != client_trial.get(name) for name in STROOP_TRIAL_KEYS):
+                return False
+    return True
+
+
+def derive(test_type, events):
+    """
+    이벤트 기록으로 결과를 다시 계산합니다. 계산할 이벤트가 없으면 None.
+
+    트레일 메이킹은 결과 키 -> 값, 스트룹은 {"practice_trials", "test_trials"}를 돌려줍니다.
+    """
+    if test_type == 'trail_making':
+        return derive_trail_making(events) or None
+    if test_type == 'stroop':
+        practice_trials, test_trials = stroop_trials(events)
+        if not test_trials:
+            return None
+        return {"practice_trials": practice_trials, "test_trials": test_trials}
+    return None
@@ -0,0 +1,144 @@
+"""
+결과 내보내기
+
+검사 유형마다 평평한(flat) 행 구조를 정의하고, 저장소에서 레코드를 하나씩 읽어
+NDJSON 또는 CSV 행으로 바로 내보냅니다. 전체 데이터를 메모리에 올리지 않으므로
+데이터 크기와 관계없이 메모리 사용량이 일정합니다.
+
+응답을 보내기 시작한 뒤에는 오류를 알릴 수 없으므로, 형식이 맞지 않는 레코드(채점 오류로 원본만 남은 스트룹 결과 등)와
+시행은 건너뛰고 사유별로 세어 로그와 export_skipped_total 지표에 남깁니다.
+"""
+import csv
+import io
+import json
+from collections import Counter
+
+import problems
+from metrics import registry as metrics
+from stroop import PHASES, get_trials
+
+PARTICIPANT_FIELDS = ["test_id", "participant_id", "name", "age", "gender", "timestamp"]
+
+# 검사 유형별 행 구조: 한 행이 무엇을 나타내는지와 열 목록
+SCHEMAS = {
+    # 순서 기억 검사: 문항(history 항목) 1개당 1행
+    "sequence": PARTICIPANT_FIELDS + ["final_level", "level", "correct", "user_answer",
+                                      "correct_answer", "time_taken", "seed"],
+    # 카드 짝 맞추기: 단계 1개당 1행
+    "card_matching": PARTICIPANT_FIELDS + ["level", "pairs", "time_taken", "user_click_sequence",
+                                           "correct_card_pairs"],
+    # 트레일 메이킹: 검사 1회당 1행
+    "trail_making": PARTICIPANT_FIELDS + ["testA_time", "testA_errors", "testB_time", "testB_errors",
+                                          "consonant_check_failures"],
+    # 스트룹: 시행(trial) 1개당 1행
+    "stroop": PARTICIPANT_FIELDS + ["phase", "trial_index", "word", "color", "user_response",
+                                    "response_time", "correct_answer"],
+    # 도형 패턴 인지: 레벨 1개당 1행
+    "pattern": PARTICIPANT_FIELDS + ["level", "score", "total_problems", "times"],
+}
+
+
+def _join(values):
+    return ' '.join(str(v) for v in values) if isinstance(values, list) else values
+
+
+def flatten_test(test, participant, skipped=None):
+    """
+    검사 레코드 하나를 검사 유형의 행 구조에 맞는 dict 행들로 펼칩니다.
+
+    skipped(Counter)를 주면 건너뛴 레코드('records')와 시행('trials') 수를 셉니다.
+    """
+    skipped = Counter() if skipped is None else skipped
+    base = {
+        "test_id": test.get('id'),
+        "participant_id": test.get('user_id'),
+        "name": participant.get('name'),
+        "age": participant.get('age'),
+        "gender": participant.get('gender'),
+        "timestamp": test.get('timestamp'),
+    }
+    test_type = test.get('test_type')
+    result = test.get('result')
+
+    if test_type == 'sequence':
+        # 정답은 seed로 다시 만든다. (seed가 없는 이전 기록은 저장된 정답을 그대로 씀)
+        for item in problems.history_with_answers(test):
+            yield dict(base, final_level=test.get('final_level'), level=item.get('level'),
+                       correct=item.get('correct'), user_answer=_join(item.get('user_answer')),
+                       correct_answer=_join(item.get('correct_answer')), time_taken=item.get('time_taken'),
+                       seed=item.get('seed'))
+    elif test_type == 'card_matching':
+        for level_result in result or []:
+            yield dict(base, level=level_result.get('level'), pairs=level_result.get('pairs'),
+                       time_taken=level_result.get('time_taken'),
+                       user_click_sequence=_join(level_result.get('user_click_sequence')),
+                       correct_card_pairs=json.dumps(level_result.get('correct_card_pairs'), ensure_ascii=False))
+    elif test_type == 'trail_making':
+        result = result or {}
+        yield dict(base, **{key: result.get(key) for key in SCHEMAS['trail_making'][len(base):]})
+    elif test_type == 'stroop':
+        summary = result.get('summary') if isinstance(result, dict) else None
+        if not isinstance(result, dict) or (isinstance(summary, dict) and 'processing_error' in summary):
+            # 채점하지 못해 원본 제출 데이터만 남은 결과
+            skipped['records'] += 1
+            return
+        for phase, trials in zip(PHASES, get_trials(result)):
+            for index, trial in enumerate(trials):
+                if not isinstance(trial, dict):
+                    skipped['trials'] += 1
+                    continue
+                yield dict(base, phase=phase, trial_index=index, word=trial.get('word'),
+                           color=trial.get('color'), user_response=trial.get('user_response'),
+                           response_time=trial.get('response_time'), correct_answer=trial.get('correct_answer'))
+    elif test_type == 'pattern':
+        for level_result in (result or {}).get('levels', []):
+            yield dict(base, level=level_result.get('level'), score=level_result.get('score'),
+                       total_problems=level_result.get('total_problems'), times=_join(level_result.get('times')))
+
+
+def iter_rows(store, test_type, date_from=None, date_to=None, skipped=None):
+    """
+    조건에 맞는 검사 레코드를 행으로 펼쳐 하나씩 돌려줍니다.
+
+    레코드 하나를 펼치다 오류가 나면 그 레코드의 행은 하나도 내보내지 않고 건너뛰어, 나머지 레코드는 계속 내보냅니다.
+    다 내보낸 뒤 건너뛴 수를 로그와 지표에 남깁니다. skipped(Counter)를 주면 거기에도 셉니다.
+    """
+    skipped = Counter() if skipped is None else skipped
+    for test in store.iter_tests(test_type=test_type, date_from=date_from, date_to=date_to):
+        participant = store.get_user(test.get('user_id')) or {}
+        try:
+            rows = list(flatten_test(test, participant, skipped))
+        except (AttributeError, TypeError, ValueError, KeyError) as e:
+            print(f"내보낼 수 없는 레코드를 건너뜁니다: {test.get('id')} ({e!r})")
+            skipped['records'] += 1
+            continue
+        yield from rows
+    for kind, count in skipped.items():
+        metrics.inc('export_skipped_total', count, test_type=test_type, kind=kind)
+    if skipped:
+        print(f"{test_type} 내보내기에서 건너뛴 항목: {dict(skipped)}")
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def stream_csv(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    buffer.write('\ufeff')  # 엑셀에서 한글이 깨지지 않도록 BOM을 붙인다.
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_tests_ndjson(store, date_from=None, date_to=None):
+    """검사 레코드 전체(원본 구조)를 참가자 정보와 함께 한 줄씩 내보냅니다."""
+    for test in store.iter_tests(date_from=date_from, date_to=date_to):
+        participant = store.get_user(test.get('user_id')) or {}
+        yield json.dumps(dict(test, participant=participant), ensure_ascii=False) + '\n'
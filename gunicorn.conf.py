@@ -0,0 +1,68 @@
+"""
+gunicorn 설정
+
+    gunicorn -c gunicorn.conf.py 'app:create_app()'
+
+preload_app이면 마스터 프로세스가 앱을 한 번 불러와 캐시(상자 배치 묶음, 저장소 인덱스, 검사 통계, 참가자 요약)를
+채운 뒤 워커를 fork 합니다. 워커들은 그 메모리를 copy-on-write로 나눠 쓰고, 워커마다 다시 불러오지 않으므로
+워커 시작과 재시작이 빨라집니다. 수집 대기열 스레드와 파일 잠금은 fork 뒤 워커에서 시작합니다(app.start_worker).
+
+마스터 준비 시간과 워커별 시작 시간, 메모리(RSS, PSS, 다른 프로세스와 나눠 쓰는 양)를 로그에 남깁니다.
+GUNICORN_PRELOAD=0으로 preload 없이 띄워 비교할 수 있습니다. (benchmarks/startup.py)
+
+GUNICORN_WORKER_CLASS=gevent면 워커 하나가 요청마다 greenlet을 만들어 최대 GUNICORN_WORKER_CONNECTIONS개
+요청을 함께 처리합니다. 소켓 읽기·쓰기, 파일 잠금과 SQLite 잠금 대기(cooperative.py), PostgreSQL 질의를 기다리는 동안
+같은 워커의 다른 요청이 돌므로, 느린 제출이 워커를 통째로 붙잡지 않습니다. 동시 요청 수를 워커 수로 늘릴 필요가 없어
+WEB_CONCURRENCY를 주지 않으면 워커를 CPU 수만큼 띄웁니다. (benchmarks/async_serving.py)
+앱을 불러오기 전에 monkey patch 해야 앱이 만드는 잠금과 스레드도 gevent용이 되므로 이 파일 맨 앞에서 합니다.
+"""
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+if worker_class == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 200))
+    try:
+        # psycopg2는 C 라이브러리 안에서 응답을 기다리므로, 기다리는 동안 다른 요청에 양보하도록 select로 기다리게 한다.
+        from psycopg2 import extensions, extras
+        extensions.set_wait_callback(extras.wait_select)
+    except ImportError:
+        pass
+
+import gc  # noqa: E402
+import time  # noqa: E402
+
+from metrics import process_memory  # noqa: E402
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', (os.cpu_count() or 1) if worker_class == 'gevent' else 4))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+_started = time.monotonic()
+
+
+def _memory_text(usage):
+    if usage is None:
+        return "메모리 정보 없음"
+    return (f"RSS {usage['rss'] / 1024:.1f}MB, PSS {usage['pss'] / 1024:.1f}MB, "
+            f"공유 {usage['shared'] / 1024:.1f}MB, 전용 {usage['private'] / 1024:.1f}MB")
+
+
+def when_ready(server):
+    # 워커를 fork 하기 직전. 지금까지 만든 객체를 GC 추적 대상에서 빼서,
+    # 워커에서 GC가 돌 때 객체 헤더를 건드려 공유 페이지가 복사되는 일을 줄인다.
+    gc.freeze()
+    server.log.info("마스터 준비: %.2f초 (preload=%s, worker_class=%s), %s",
+                    time.monotonic() - _started, preload_app, worker_class, _memory_text(process_memory()))
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.monotonic()
+
+
+def post_worker_init(worker):
+    import app
+    app.start_worker()
+    worker.log.info("워커 %s 준비: fork 후 %.3f초, %s",
+                    worker.pid, time.monotonic() - worker.forked_at, _memory_text(process_memory()))
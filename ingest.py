@@ -0,0 +1,265 @@
+"""
+검사 결과 수집 대기열
+
+결과 제출 요청은 받은 데이터를 저널 파일(journal.jsonl)에 한 줄 추가하고 디스크에 내려 쓴 뒤 바로 응답합니다.
+백그라운드 스레드가 저널을 묶음 단위로 읽어 채점(스트룹 등)한 뒤 결과 저장소에 넣고,
+어디까지 처리했는지를 checkpoint 파일에 기록합니다.
+
+- 여러 워커(프로세스)가 같은 저널에 쓰고, 처리는 worker.lock을 쥔 한 워커만 합니다.
+  그 워커가 죽으면 잠금이 풀리고 다른 워커가 이어서 처리합니다.
+- 저널 항목의 id가 그대로 검사 레코드 id가 되고 저장소는 이미 있는 id를 건너뛰므로,
+  저장 후 checkpoint를 쓰기 전에 멈췄더라도 다시 시작할 때 중복 없이 이어서 처리합니다.
+- 처리 중 예외가 난 항목은 failed.jsonl로 옮기고 다음 항목으로 넘어갑니다.
+- gevent 워커에서는 처리 스레드도 greenlet으로 돕니다. 파일 잠금과 fsync는 cooperative.py를 거쳐 기다립니다.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경
+    fcntl = None
+
+import cooperative
+from storage import _dump_line, _locked, _observe_io
+
+
+def make_entry(user_id, test_type, payload, entry_id=None):
+    """저널에 넣을 항목을 만듭니다. entry_id를 주지 않으면 새로 만듭니다."""
+    return {"id": entry_id or uuid.uuid4().hex, "user_id": user_id, "test_type": test_type,
+            "timestamp": datetime.now().isoformat(), "payload": payload}
+
+
+class IngestQueue:
+    """
+    저널 기반 결과 수집 대기열
+
+    build_record(entry)는 저널 항목을 저장소 레코드({"id", "user_id", "test_type", "timestamp", ...})로 만들고,
+    context()는 저장소를 쓸 때 필요한 컨텍스트(예: Flask 앱 컨텍스트)를 돌려줍니다.
+    """
+
+    def __init__(self, root, store, build_record, context=None, batch_size=200, poll_interval=0.5, fsync=True):
+        self.root = root
+        self.store = store
+        self.build_record = build_record
+        self.context = context
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.fsync = fsync
+        self.journal_path = os.path.join(root, 'journal.jsonl')
+        self.checkpoint_path = os.path.join(root, 'checkpoint')
+        self.failed_path = os.path.join(root, 'failed.jsonl')
+        self.lock_path = os.path.join(root, 'worker.lock')
+        self.stats = {"submitted": 0, "processed": 0, "batches": 0, "failed": 0, "truncations": 0}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    # --- 제출 (요청 처리 경로) ---
+    def submit(self, user_id, test_type, payload, entry_id=None):
+        """결과를 저널에 추가하고 항목 id를 돌려줍니다. 반환 시점에 저널은 디스크에 기록되어 있습니다."""
+        entry = make_entry(user_id, test_type, payload, entry_id)
+        line = _dump_line(entry)
+        os.makedirs(self.root, exist_ok=True)
+        start = time.perf_counter()
+        with open(self.journal_path, 'ab') as f:
+            with _locked(f):
+                end = f.seek(0, os.SEEK_END)
+                if end and not self._ends_with_newline(end):
+                    f.write(b'\n')
+                f.write(line)
+                f.flush()
+            if self.fsync:
+                cooperative.fsync(f.fileno())
+        _observe_io('save', self.journal_path, time.perf_counter() - start, len(line))
+        self.stats["submitted"] += 1
+        self.start()
+        self._wake.set()
+        return entry['id']
+
+    def _ends_with_newline(self, end):
+        with open(self.journal_path, 'rb') as r:
+            r.seek(end - 1)
+            return r.read(1) == b'\n'
+
+    # --- checkpoint ---
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_checkpoint(self, offset):
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(str(offset))
+            f.flush()
+            if self.fsync:
+                cooperative.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def pending_bytes(self):
+        """아직 저장소에 반영되지 않은 저널 크기"""
+        try:
+            size = os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return 0
+        return max(0, size - self._read_checkpoint())
+
+    def pending_entries(self, user_id):
+        """
+        저널에서 아직 처리하지 않은 user_id의 항목 목록 (같은 id는 한 번만).
+
+        제출과 같은 잠금을 공유로 쥐고 읽으므로 저널을 비우는 도중의 상태를 보지 않습니다. 처리 담당 워커가
+        저장한 뒤 checkpoint를 쓰기 전이면 이미 저장된 항목이 섞일 수 있어, 필요하면 저장소에서 id로 확인합니다.
+        """
+        try:
+            f = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return []
+        needle = user_id.encode('utf-8')
+        entries = {}
+        with f, _locked(f, shared=True):
+            f.seek(self._read_checkpoint())
+            for line in f:
+                if not line.endswith(b'\n') or needle not in line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('user_id') == user_id:
+                    entries.setdefault(entry['id'], entry)
+        return list(entries.values())
+
+    # --- 처리 ---
+    def _read_batch(self, offset):
+        """offset부터 완전한 줄을 최대 batch_size개 읽어 ([(항목, 줄 원문)], 다음 offset)을 돌려줍니다."""
+        entries = []
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            while len(entries) < self.batch_size:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break   # 쓰는 중인 줄 (다음 차례에 읽음)
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    entries.append((json.loads(line), line))
+                except ValueError:
+                    # 이전 쓰기가 중간에 끊겨 남은 조각
+                    self._fail(line, "invalid json")
+        return entries, offset
+
+    def _fail(self, line, error):
+        self.stats["failed"] += 1
+        print(f"결과 수집 처리 실패: {error}")
+        with open(self.failed_path, 'ab') as f:
+            f.write(_dump_line({"error": error, "line": line.decode('utf-8', 'replace').rstrip('\n')}))
+
+    def drain(self):
+        """저널에 쌓인 항목을 모두 저장소에 반영합니다. 반영한 항목 수를 돌려줍니다."""
+        if not os.path.exists(self.journal_path):
+            return 0
+        processed = 0
+        offset = self._read_checkpoint()
+        if offset > os.path.getsize(self.journal_path):
+            offset = 0   # 저널을 비운 뒤 checkpoint를 쓰기 전에 멈춘 경우 (중복은 id로 걸러짐)
+        while True:
+            entries, next_offset = self._read_batch(offset)
+            if next_offset == offset:
+                break
+            records = []
+            for entry, line in entries:
+                try:
+                    records.append(self.build_record(entry))
+                except Exception as e:
+                    self._fail(line, str(e))
+            if records:
+                if self.context is not None:
+                    with self.context():
+                        self.store.append_tests(records)
+                else:
+                    self.store.append_tests(records)
+            self._write_checkpoint(next_offset)
+            offset = next_offset
+            processed += len(records)
+            self.stats["processed"] += len(records)
+            self.stats["batches"] += 1
+        self._truncate_if_done(offset)
+        return processed
+
+    def _truncate_if_done(self, offset):
+        """모두 처리했으면 저널을 비웁니다. 제출과 같은 잠금 안에서 크기를 다시 확인합니다."""
+        if offset == 0:
+            return
+        with open(self.journal_path, 'ab') as f, _locked(f):
+            if f.seek(0, os.SEEK_END) != offset:
+                return
+            # checkpoint를 먼저 0으로 돌려 두면, 그 사이에 멈춰도 다시 처리할 뿐 항목을 건너뛰지 않는다.
+            self._write_checkpoint(0)
+            f.truncate(0)
+            self.stats["truncations"] += 1
+
+    # --- 백그라운드 스레드 ---
+    def start(self):
+        """이 프로세스의 처리 스레드를 시작합니다. (fork 뒤에는 새로 시작)"""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='ingest-worker', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            while not self._stop.is_set():
+                if self._acquire(lock_file):
+                    break
+                self._stop.wait(self.poll_interval)
+            # 처리 담당 워커: 시작할 때 남은 저널을 먼저 다시 처리하고, 새 제출을 기다린다.
+            while not self._stop.is_set():
+                self._wake.clear()
+                try:
+                    self.drain()
+                except Exception as e:
+                    print(f"결과 수집 처리 중 오류: {e}")
+                self._wake.wait(self.poll_interval)
+
+    @staticmethod
+    def _acquire(lock_file):
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def wait_idle(self, timeout=30):
+        """저널이 모두 처리될 때까지 기다립니다. 시간 안에 끝나면 True"""
+        deadline = time.monotonic() + timeout
+        while self.pending_bytes():
+            if time.monotonic() > deadline:
+                return False
+            self._wake.set()
+            time.sleep(0.01)
+        return True
+
+    def status(self):
+        return dict(self.stats, pending_bytes=self.pending_bytes(), pid=os.getpid(),
+                    running=self._thread is not None and self._thread.is_alive())
@@ -0,0 +1,165 @@
+"""
+순서 기억 검사 상자 배치
+
+상자 배치는 상자 수마다 미리 만들어 둔 배치 묶음(pool)에서 골라 씁니다.
+한 번 고를 때마다 좌우/상하 뒤집기와 대각선 대칭을 무작위로 적용하므로
+묶음 하나로 최대 8배의 서로 다른 배치가 나옵니다.
+
+배치를 만들 때는 먼저 기존과 같은 무작위 배치(rejection sampling)를 정해진 횟수만큼 시도하고,
+실패하면 격자 칸에 상자를 하나씩 넣고 칸 안에서 조금씩 흔드는 방식으로 만듭니다.
+격자 방식은 항상 한 번에 끝나므로 상자가 많은 레벨에서도 배치가 무한히 반복되지 않습니다.
+"""
+import math
+import random
+import threading
+
+from metrics import registry as metrics
+
+BOX_SIZE = 80
+MIN_GAP = 10
+CANVAS_SIZE = 500
+
+# 무작위 배치에서 상자 하나를 놓기 위한 최대 시도 횟수와 처음부터 다시 시작하는 최대 횟수
+MAX_ATTEMPTS_PER_BOX = 200
+MAX_RESTARTS = 3
+
+
+def _overlaps(box, other, gap):
+    return not (box['x2'] < other['x1'] - gap or box['x1'] > other['x2'] + gap
+                or box['y2'] < other['y1'] - gap or box['y1'] > other['y2'] + gap)
+
+
+def _box(i, x1, y1, size):
+    return {"id": i, "x1": x1, "y1": y1, "x2": x1 + size, "y2": y1 + size}
+
+
+def random_layout(num_boxes, canvas_size=CANVAS_SIZE, box_size=BOX_SIZE, gap=MIN_GAP, rng=random):
+    """기존 방식의 무작위 배치를 시도합니다. 정해진 횟수 안에 놓지 못하면 None을 돌려줍니다."""
+    high = canvas_size - box_size - gap
+    attempts = 0
+    for _ in range(MAX_RESTARTS):
+        boxes = []
+        for i in range(num_boxes):
+            for _ in range(MAX_ATTEMPTS_PER_BOX):
+                attempts += 1
+                box = _box(i, rng.randint(gap, high), rng.randint(gap, high), box_size)
+                if not any(_overlaps(box, other, gap) for other in boxes):
+                    boxes.append(box)
+                    break
+            else:
+                break
+        if len(boxes) == num_boxes:
+            metrics.observe('layout_placement_attempts', attempts, boxes=num_boxes)
+            return boxes
+    metrics.observe('layout_placement_attempts', attempts, boxes=num_boxes)
+    return None
+
+
+def grid_layout(num_boxes, canvas_size=CANVAS_SIZE, box_size=BOX_SIZE, gap=MIN_GAP, rng=random):
+    """
+    격자 칸 중 num_boxes개를 무작위로 골라 상자를 놓고, 칸 안에서 겹치지 않는 범위로 흔듭니다.
+
+    들어갈 수 없는 상자 수면 ValueError를 냅니다.
+    """
+    low, high = gap, canvas_size - box_size - gap
+    pitch = box_size + gap + 1          # 이웃한 상자 왼쪽 위 좌표의 최소 간격
+    max_cells = (high - low) // pitch + 1
+    if num_boxes > max_cells * max_cells:
+        raise ValueError(f"{canvas_size}px 화면에 상자 {num_boxes}개를 놓을 수 없습니다.")
+    # 상자 수를 담을 수 있는 가장 성긴 격자 중 하나를 고른다 (가로/세로 칸 수는 무작위로 바꿈)
+    cols = max(1, math.ceil(math.sqrt(num_boxes)))
+    rows = max(1, math.ceil(num_boxes / cols))
+    if rng.random() < 0.5:
+        cols, rows = rows, cols
+
+    def axis(count):
+        if count == 1:
+            origins = [(low + high) // 2]
+            return origins, (high - low) // 2
+        origins = [low + round(i * (high - low) / (count - 1)) for i in range(count)]
+        step = min(b - a for a, b in zip(origins, origins[1:]))
+        return origins, (step - pitch) // 2
+
+    xs, x_jitter = axis(cols)
+    ys, y_jitter = axis(rows)
+    cells = rng.sample([(x, y) for x in xs for y in ys], num_boxes)
+    boxes = []
+    for i, (x, y) in enumerate(cells):
+        x1 = min(high, max(low, x + rng.randint(-x_jitter, x_jitter)))
+        y1 = min(high, max(low, y + rng.randint(-y_jitter, y_jitter)))
+        boxes.append(_box(i, x1, y1, box_size))
+    return boxes
+
+
+def make_layout(num_boxes, canvas_size=CANVAS_SIZE, box_size=BOX_SIZE, gap=MIN_GAP, rng=random):
+    """무작위 배치를 먼저 시도하고, 실패하면 격자 배치로 만듭니다. 항상 끝납니다."""
+    return (random_layout(num_boxes, canvas_size, box_size, gap, rng)
+            or grid_layout(num_boxes, canvas_size, box_size, gap, rng))
+
+
+def _transform(boxes, canvas_size, flip_x, flip_y, transpose):
+    result = []
+    for box in boxes:
+        x1, y1 = box['x1'], box['y1']
+        size = box['x2'] - x1
+        if transpose:
+            x1, y1 = y1, x1
+        if flip_x:
+            x1 = canvas_size - size - x1
+        if flip_y:
+            y1 = canvas_size - size - y1
+        result.append(_box(box['id'], x1, y1, size))
+    return result
+
+
+class LayoutPool:
+    """
+    상자 수별로 미리 만든 배치 묶음. 배치 하나를 꺼내는 데 상자 수에 비례하는 시간만 듭니다.
+
+    seed를 주면 상자 수마다 (seed, 상자 수)로 정해진 난수로 묶음을 만들므로,
+    어떤 순서로 만들든 어느 프로세스에서 만들든 같은 상자 수의 묶음 내용이 같습니다.
+    """
+
+    def __init__(self, pool_size=64, canvas_size=CANVAS_SIZE, box_size=BOX_SIZE, gap=MIN_GAP, seed=None):
+        self.pool_size = pool_size
+        self.canvas_size = canvas_size
+        self.box_size = box_size
+        self.gap = gap
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._pools = {}
+        self._lock = threading.Lock()
+        self.stats = {"built": 0, "grid_fallbacks": 0, "served": 0}
+
+    def _build(self, num_boxes):
+        rng = self._rng if self.seed is None else random.Random(f"{self.seed}:{num_boxes}")
+        layouts = []
+        for _ in range(self.pool_size):
+            layout = random_layout(num_boxes, self.canvas_size, self.box_size, self.gap, rng)
+            if layout is None:
+                layout = grid_layout(num_boxes, self.canvas_size, self.box_size, self.gap, rng)
+                self.stats["grid_fallbacks"] += 1
+                metrics.inc('layout_grid_fallbacks_total', boxes=num_boxes)
+            layouts.append(layout)
+        self.stats["built"] += len(layouts)
+        return layouts
+
+    def warm(self, box_counts):
+        """지정한 상자 수의 배치 묶음을 미리 만듭니다. (앱 시작 시 호출)"""
+        for num_boxes in box_counts:
+            self._pool(num_boxes)
+
+    def _pool(self, num_boxes):
+        pool = self._pools.get(num_boxes)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(num_boxes)
+                if pool is None:
+                    pool = self._pools[num_boxes] = self._build(num_boxes)
+        return pool
+
+    def get(self, num_boxes, rng=random):
+        """상자 num_boxes개의 배치를 무작위로 하나 골라 대칭 변환한 사본을 돌려줍니다."""
+        layout = rng.choice(self._pool(num_boxes))
+        self.stats["served"] += 1
+        return _transform(layout, self.canvas_size, rng.random() < 0.5, rng.random() < 0.5, rng.random() < 0.5)
@@ -0,0 +1,180 @@
+"""
+참가자별 종단(반복 검사) 요약
+
+검사 결과가 저장소 인덱스에 반영될 때마다 참가자의 요약 문서 하나를 갱신합니다.
+검사 유형마다 횟수, 처음/마지막 검사 일시, 지표별 최근 값·최고 기록·추세 기울기를 담습니다.
+추세는 (검사 일시, 값)의 최소제곱 직선 기울기이며, 합계만 누적하므로 검사가 도착하는 순서와 관계없이
+같은 값이 되고 갱신 비용은 참가자의 검사 수와 관계없이 일정합니다.
+
+지표 정의는 aggregates.METRICS를 그대로 씁니다. 요약 문서는 검사 통계와 같은 체크포인트에 저장됩니다.
+"""
+import threading
+from datetime import datetime
+
+from aggregates import METRICS, STATE_VERSION
+
+# 값이 클수록 좋은 지표. 나머지(시간, 오류 수, 오답률)는 작을수록 좋다.
+HIGHER_IS_BETTER = {("sequence", "final_level"), ("pattern", "total_score")}
+
+# 추세 기울기 단위 (일). 30일당 변화량으로 보여 준다.
+TREND_DAYS = 30
+
+
+def _days(timestamp):
+    """ISO 형식 검사 일시를 일 단위 실수로 바꿉니다. 읽을 수 없으면 None."""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp() / 86400
+    except (TypeError, ValueError):
+        return None
+
+
+class MetricTrend:
+    """지표 하나의 최근 값, 최고 기록, 최소제곱 추세"""
+
+    def __init__(self, higher_is_better):
+        self.higher_is_better = higher_is_better
+        self.latest = self.latest_at = None
+        self.best = self.best_at = None
+        self.origin = None     # 수치 오차를 줄이려고 첫 검사 일시를 원점으로 쓴다
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = 0.0
+
+    def add(self, value, timestamp):
+        if self.latest_at is None or (timestamp or '') >= self.latest_at:
+            self.latest, self.latest_at = value, timestamp or ''
+        if self.best is None or (value > self.best if self.higher_is_better else value < self.best) \
+                or (value == self.best and (timestamp or '') < (self.best_at or '')):
+            # 같은 기록이면 먼저 세운 날짜를 남겨 검사가 도착하는 순서와 관계없게 한다.
+            self.best, self.best_at = value, timestamp
+        days = _days(timestamp)
+        if days is None:
+            return
+        if self.origin is None:
+            self.origin = days
+        x = days - self.origin
+        self.n += 1
+        self.sx += x
+        self.sy += value
+        self.sxx += x * x
+        self.sxy += x * value
+
+    def state(self):
+        return {key: value for key, value in vars(self).items() if key != 'higher_is_better'}
+
+    @classmethod
+    def from_state(cls, higher_is_better, state):
+        trend = cls(higher_is_better)
+        for key in vars(trend):
+            if key != 'higher_is_better':
+                setattr(trend, key, state[key])
+        return trend
+
+    def slope(self):
+        """30일당 변화량. 검사가 두 번 미만이거나 모두 같은 날이면 None."""
+        denominator = self.n * self.sxx - self.sx * self.sx
+        if self.n < 2 or denominator <= 1e-9:
+            return None
+        return round((self.n * self.sxy - self.sx * self.sy) / denominator * TREND_DAYS, 3)
+
+    def to_dict(self):
+        return {"latest": self.latest, "latest_at": self.latest_at or None,
+                "best": self.best, "best_at": self.best_at,
+                "trend_per_30_days": self.slope(),
+                "higher_is_better": self.higher_is_better}
+
+
+class ParticipantSummaries:
+    """참가자별 요약 문서. ResultStore에 구독자로 등록해서 사용합니다."""
+
+    checkpoint_name = "participant_summaries"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """저장소 인덱스를 처음부터 다시 만들 때 호출됩니다."""
+        self._summaries = {}   # participant_id -> {"sessions": {...}, "first_at", "last_at", ...}
+
+    def add(self, test, participant):
+        """검사 레코드 한 건을 반영합니다."""
+        participant_id = test.get('user_id')
+        test_type = test.get('test_type')
+        if not participant_id or not test_type:
+            return
+        timestamp = test.get('timestamp')
+        with self._lock:
+            summary = self._summaries.get(participant_id)
+            if summary is None:
+                summary = self._summaries[participant_id] = {
+                    "sessions": {}, "first_at": None, "last_at": None, "last_test_type": None, "metrics": {}}
+            summary["sessions"][test_type] = summary["sessions"].get(test_type, 0) + 1
+            if timestamp:
+                if summary["first_at"] is None or timestamp < summary["first_at"]:
+                    summary["first_at"] = timestamp
+                if summary["last_at"] is None or timestamp >= summary["last_at"]:
+                    summary["last_at"], summary["last_test_type"] = timestamp, test_type
+            for metric, (extract, _, _, _) in METRICS.get(test_type, {}).items():
+                try:
+                    value = extract(test)
+                    value = float(value) if value is not None else None
+                except (TypeError, ValueError, AttributeError):
+                    value = None
+                if value is None:
+                    continue
+                trends = summary["metrics"].setdefault(test_type, {})
+                trend = trends.get(metric)
+                if trend is None:
+                    trend = trends[metric] = MetricTrend((test_type, metric) in HIGHER_IS_BETTER)
+                trend.add(value, timestamp)
+
+    def state(self):
+        """체크포인트에 저장할 요약 문서"""
+        with self._lock:
+            return {"version": STATE_VERSION, "summaries": {
+                participant_id: dict(summary, metrics={
+                    test_type: {metric: trend.state() for metric, trend in trends.items()}
+                    for test_type, trends in summary["metrics"].items()})
+                for participant_id, summary in self._summaries.items()}}
+
+    def load_state(self, state):
+        """state()로 저장한 요약 문서를 되살립니다. 형식이 맞지 않으면 ValueError."""
+        if state.get('version') != STATE_VERSION:
+            raise ValueError("체크포인트 형식 버전이 다릅니다.")
+        summaries = {}
+        try:
+            for participant_id, summary in state['summaries'].items():
+                summaries[participant_id] = dict(summary, sessions=dict(summary['sessions']), metrics={
+                    test_type: {metric: MetricTrend.from_state((test_type, metric) in HIGHER_IS_BETTER, trend)
+                                for metric, trend in trends.items()}
+                    for test_type, trends in summary['metrics'].items()})
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"체크포인트를 읽을 수 없습니다: {e!r}")
+        with self._lock:
+            self._summaries = summaries
+
+    def session_counts(self, participant_id):
+        """검사 유형별 완료 횟수"""
+        with self._lock:
+            summary = self._summaries.get(participant_id)
+            return dict(summary["sessions"]) if summary else {}
+
+    def get(self, participant_id):
+        """참가자 요약 문서. 검사 기록이 없으면 빈 요약을 돌려줍니다."""
+        with self._lock:
+            summary = self._summaries.get(participant_id)
+            if summary is None:
+                return {"total_sessions": 0, "sessions": {}, "first_at": None, "last_at": None,
+                        "last_test_type": None, "tests": {}}
+            return {
+                "total_sessions": sum(summary["sessions"].values()),
+                "sessions": dict(summary["sessions"]),
+                "first_at": summary["first_at"],
+                "last_at": summary["last_at"],
+                "last_test_type": summary["last_test_type"],
+                "tests": {test_type: {metric: trend.to_dict() for metric, trend in trends.items()}
+                          for test_type, trends in summary["metrics"].items()},
+            }
+
+    def __len__(self):
+        return len(self._summaries)
@@ -0,0 +1,263 @@
+"""
+요청 지연 시간과 저장소 I/O 측정
+
+각 워커(프로세스)는 측정값을 메모리에 모으고 flush_interval마다 자기 스냅숏을
+metrics 폴더의 파일(워커당 1개)에 씁니다. /metrics 엔드포인트는 모든 워커의 파일을 합쳐
+Prometheus 텍스트 형식으로 내보냅니다. 카운터와 히스토그램만 쓰므로 워커별 값을 더하면 전체 값이 됩니다.
+워커는 끝날 때 자기 파일을 지우고, 합칠 때 이미 끝난 워커의 파일이 남아 있으면 지웁니다.
+
+저장소 모듈은 모듈 전역 registry에 기록하고, 앱이 시작할 때 configure()로 폴더를 정합니다.
+폴더를 정하지 않으면 현재 프로세스의 값만 내보냅니다.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _key(labels):
+    return json.dumps(sorted(labels.items()), ensure_ascii=False)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(items, extra=None):
+    items = list(items) + ([extra] if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in items) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# /proc/<pid>/smaps_rollup 항목 -> process_memory() 키
+_SMAPS_FIELDS = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+                 "Private_Clean": "private", "Private_Dirty": "private"}
+
+
+def process_memory(pid='self'):
+    """
+    프로세스 메모리(KB) {"rss", "pss", "shared", "private"}. 리눅스가 아니거나 읽을 수 없으면 None.
+
+    pss는 다른 프로세스와 나눠 쓰는 페이지를 나눠 센 값이라 워커들의 pss 합이 실제 사용량에 가깝습니다.
+    """
+    usage = dict.fromkeys(("rss", "pss", "shared", "private"), 0)
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in _SMAPS_FIELDS:
+                    usage[_SMAPS_FIELDS[name]] += int(value.split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return usage
+
+
+class Registry:
+    """카운터와 히스토그램 모음"""
+
+    def __init__(self, flush_interval=1.0):
+        self.flush_interval = flush_interval
+        self.directory = None
+        self._meta = {}          # 이름 -> (종류, 설명, 버킷)
+        self._values = {}        # 이름 -> {레이블 키: 값 또는 [버킷별 개수..., 합계, 개수]}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._file = None
+        self._pid = None
+
+    def configure(self, directory):
+        """워커별 스냅숏을 쓸 폴더를 정합니다."""
+        if self.directory is None:
+            atexit.register(self.remove)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def remove(self):
+        """이 워커의 스냅숏 파일을 지웁니다. 워커가 끝날 때 부릅니다."""
+        if self._file is None or self._pid != os.getpid():
+            return   # fork 전에 부모가 등록한 것이면 부모의 파일은 건드리지 않는다
+        try:
+            os.remove(self._file)
+        except FileNotFoundError:
+            pass
+        self._file = None
+
+    # --- 정의 ---
+    def counter(self, name, help_text):
+        self._meta[name] = ('counter', help_text, None)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ('histogram', help_text, tuple(buckets))
+
+    # --- 기록 ---
+    def _values_for(self, name):
+        """잠금을 쥔 상태에서 호출합니다. fork 뒤 첫 기록이면 부모에게서 물려받은 값을 비웁니다."""
+        if self._pid != os.getpid():
+            # 워커마다 새 파일을 쓴다. (pid가 재사용돼도 이전 워커 파일을 덮어쓰지 않음)
+            self._pid = os.getpid()
+            self._file = None
+            self._values = {}
+        return self._values.setdefault(name, {})
+
+    def inc(self, name, amount=1, **labels):
+        key = _key(labels)
+        with self._lock:
+            values = self._values_for(name)
+            values[key] = values.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        buckets = self._meta[name][2]
+        key = _key(labels)
+        with self._lock:
+            values = self._values_for(name)
+            counts = values.get(key)
+            if counts is None:
+                counts = values[key] = [0] * len(buckets) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    # --- 워커 간 공유 ---
+    def snapshot(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                return {}
+            return {name: {key: (list(value) if isinstance(value, list) else value)
+                           for key, value in values.items()}
+                    for name, values in self._values.items()}
+
+    def flush(self, force=False):
+        """flush_interval이 지났으면 이 워커의 스냅숏을 파일에 씁니다."""
+        if self.directory is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        snapshot = self.snapshot()
+        if not snapshot:
+            return
+        if self._file is None:
+            self._file = os.path.join(self.directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json')
+        tmp_path = self._file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self._file)
+
+    def _live_files(self):
+        """
+        살아 있는 워커의 스냅숏 파일 목록. 끝난 워커의 파일은 지웁니다.
+
+        파일 이름의 pid로 프로세스가 있는지 봅니다. 워커가 비정상 종료해 atexit이 돌지 못한 파일이 남고,
+        그 pid를 새 워커가 다시 받으면 같은 pid의 파일이 둘이 되므로 가장 최근에 쓴 것만 남깁니다.
+        한가한 워커는 파일을 오래 쓰지 않으므로 수정 시각만으로는 지우지 않습니다.
+        """
+        newest = {}
+        stale = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                pid = int(os.path.basename(path).split('-', 1)[0])
+                mtime = os.stat(path).st_mtime
+            except (ValueError, OSError):
+                continue
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                stale.append(path)
+                continue
+            except PermissionError:
+                pass   # 다른 사용자의 프로세스: 살아 있음
+            if pid in newest:
+                stale.append(min(newest[pid], (mtime, path))[1])
+                newest[pid] = max(newest[pid], (mtime, path))
+            else:
+                newest[pid] = (mtime, path)
+        for path in stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass   # 다른 워커가 먼저 지움
+        return [path for _, path in newest.values()]
+
+    def collect(self):
+        """모든 워커의 값을 합칩니다."""
+        if self.directory is None:
+            return self.snapshot()
+        self.flush(force=True)
+        merged = {}
+        for path in self._live_files():
+            try:
+                with open(path, encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, values in snapshot.items():
+                target = merged.setdefault(name, {})
+                for key, value in values.items():
+                    if isinstance(value, list):
+                        current = target.get(key)
+                        target[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                    else:
+                        target[key] = target.get(key, 0) + value
+        return merged
+
+    def render(self):
+        """Prometheus 텍스트 형식"""
+        lines = []
+        merged = self.collect()
+        for name in sorted(merged):
+            kind, help_text, buckets = self._meta.get(name, ('counter', '', None))
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for key, value in sorted(merged[name].items()):
+                labels = [tuple(item) for item in json.loads(key)]
+                if kind == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(buckets, value):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_format_labels(labels, ("le", _format_number(bound)))} {cumulative}')
+                    lines.append(f'{name}_bucket{_format_labels(labels, ("le", "+Inf"))} {value[-1]}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_number(value[-2])}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+                else:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+registry.histogram('http_request_duration_seconds', "라우트별 요청 처리 시간")
+registry.histogram('store_io_seconds', "저장소 읽기(load)/쓰기(save) 시간")
+registry.histogram('store_io_bytes', "저장소 읽기(load)/쓰기(save) 크기", BYTES_BUCKETS)
+registry.histogram('session_cookie_bytes', "요청에 담겨 온 세션 쿠키 크기", BYTES_BUCKETS)
+registry.histogram('session_data_bytes', "서버 측 세션에 저장한 세션 내용 크기", BYTES_BUCKETS)
+registry.histogram('layout_placement_attempts', "상자 배치 1개를 만드는 데 든 무작위 시도 횟수", COUNT_BUCKETS)
+registry.counter('layout_grid_fallbacks_total', "무작위 배치에 실패해 격자 배치로 만든 횟수")
+registry.counter('client_events_total', "검사 화면에서 받은 이벤트 수 (트레일 메이킹, 스트룹)")
+registry.counter('export_skipped_total', "내보내기에서 형식이 맞지 않아 건너뛴 레코드(records)·시행(trials) 수")
@@ -0,0 +1,101 @@
+"""
+관계형 데이터베이스 모델
+
+STORAGE_BACKEND=sql일 때 검사 결과를 저장하는 테이블입니다.
+로컬에서는 instance/results.db(SQLite), 운영 환경에서는 DATABASE_URL(PostgreSQL)을 사용하며,
+스키마는 migrations/ 의 Alembic 마이그레이션(`flask db upgrade`)으로 만듭니다.
+"""
+from flask_sqlalchemy import SQLAlchemy
+
+db = SQLAlchemy()
+
+# 참가자 이름의 최대 길이. 등록 화면(app.start_test)도 이 길이로 검사합니다.
+NAME_MAX_LENGTH = 100
+
+
+class Participant(db.Model):
+    __tablename__ = 'participants'
+
+    id = db.Column(db.String(32), primary_key=True)
+    name = db.Column(db.String(NAME_MAX_LENGTH))
+    age = db.Column(db.String(20))
+    gender = db.Column(db.String(20))
+    # participants.participant_key()로 정규화한 (이름, 나이) 조회 키
+    lookup_key = db.Column(db.String(200), nullable=False, unique=True)
+
+
+class TestSession(db.Model):
+    __tablename__ = 'test_sessions'
+
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)   # 저장 순서
+    id = db.Column(db.String(32), nullable=False, unique=True)
+    participant_id = db.Column(db.String(32), db.ForeignKey('participants.id'), nullable=False, index=True)
+    test_type = db.Column(db.String(30), nullable=False)
+    timestamp = db.Column(db.String(32), nullable=False)
+    # 시행 단위 데이터를 제외한 나머지 결과 필드
+    data = db.Column(db.JSON, nullable=False, default=dict)
+
+    __table_args__ = (
+        db.Index('ix_test_sessions_type_timestamp', 'test_type', 'timestamp'),
+        db.Index('ix_test_sessions_timestamp', 'timestamp'),
+    )
+
+
+class StroopTrial(db.Model):
+    __tablename__ = 'stroop_trials'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    session_seq = db.Column(db.Integer, db.ForeignKey('test_sessions.seq', ondelete='CASCADE'),
+                            nullable=False, index=True)
+    phase = db.Column(db.String(10), nullable=False)      # practice / test
+    position = db.Column(db.Integer, nullable=False)
+    round = db.Column(db.Integer)
+    trial_number = db.Column(db.Integer)
+    word = db.Column(db.String(20))
+    color = db.Column(db.String(40))
+    user_response = db.Column(db.Boolean)
+    response_time = db.Column(db.Float)
+    correct_answer = db.Column(db.Boolean)
+    is_correct = db.Column(db.Boolean)
+    extra = db.Column(db.JSON)                             # 위 항목 외의 값
+
+
+class SequenceTrial(db.Model):
+    __tablename__ = 'sequence_trials'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    session_seq = db.Column(db.Integer, db.ForeignKey('test_sessions.seq', ondelete='CASCADE'),
+                            nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    level = db.Column(db.Integer)
+    correct = db.Column(db.Boolean)
+    user_answer = db.Column(db.JSON)
+    correct_answer = db.Column(db.JSON)
+    time_taken = db.Column(db.Float)
+    extra = db.Column(db.JSON)
+
+
+class ArchivedTrials(db.Model):
+    """SqlResultStore.archive()가 오래된 세션에서 떼어 내 압축해 둔 시행 행"""
+    __tablename__ = 'archived_trials'
+
+    session_seq = db.Column(db.Integer, db.ForeignKey('test_sessions.seq', ondelete='CASCADE'), primary_key=True)
+    payload = db.Column(db.LargeBinary, nullable=False)   # gzip으로 압축한 {"stroop": [행, ...], "sequence": [행, ...]}
+
+
+class ScoringSummary(db.Model):
+    __tablename__ = 'scoring_summaries'
+
+    test_id = db.Column(db.String(32), db.ForeignKey('test_sessions.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.String(40), primary_key=True)
+    data = db.Column(db.JSON, nullable=False)   # {"rules", "scored_at", "summary"}
+
+
+class AggregateCheckpoint(db.Model):
+    """구독자(검사 통계, 참가자 요약)의 누적 상태와 그 상태가 반영한 마지막 test_sessions.seq"""
+    __tablename__ = 'aggregate_checkpoints'
+
+    name = db.Column(db.String(40), primary_key=True)
+    last_seq = db.Column(db.Integer, nullable=False)
+    state = db.Column(db.JSON, nullable=False)   # {checkpoint_name: state}
+    gaps = db.Column(db.JSON)                    # [[last_seq 아래에서 아직 커밋되지 않은 seq, 처음 본 시각], ...]
@@ -0,0 +1,51 @@
+"""
+참가자 식별
+
+참가자는 등록 시 부여되는 고정 ID로 구분하고, (이름, 나이) 키에 대한 해시 인덱스로 찾으므로
+조회는 등록된 참가자 수와 관계없이 일정한 시간이 걸립니다.
+검사 유형별 완료 횟수는 참가자 요약(longitudinal.ParticipantSummaries)에 있습니다.
+"""
+import unicodedata
+import uuid
+
+
+def normalize_field(value):
+    """입력값의 앞뒤 공백과 유니코드 조합 방식 차이를 없앱니다."""
+    if value is None:
+        return None
+    return unicodedata.normalize('NFC', str(value)).strip()
+
+
+def participant_key(name, age):
+    """참가자를 찾는 데 쓰는 인덱스 키"""
+    return (normalize_field(name), normalize_field(age))
+
+
+def new_participant(name, age, gender):
+    return {"id": uuid.uuid4().hex, "name": name, "age": age, "gender": gender}
+
+
+class ParticipantIndex:
+    """참가자 레코드와 (이름, 나이) 해시 인덱스"""
+
+    def __init__(self):
+        self._by_id = {}       # participant_id -> 참가자 레코드
+        self._by_key = {}      # participant_key -> participant_id
+
+    def add(self, participant):
+        self._by_id[participant['id']] = participant
+        self._by_key.setdefault(participant_key(participant.get('name'), participant.get('age')),
+                                participant['id'])
+
+    def get(self, participant_id):
+        return self._by_id.get(participant_id)
+
+    def lookup(self, name, age):
+        participant_id = self._by_key.get(participant_key(name, age))
+        return self._by_id.get(participant_id) if participant_id else None
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
@@ -0,0 +1,84 @@
+"""
+순서 기억 검사 문제 생성
+
+문제는 (생성기 버전, 레벨, seed)로 정해집니다. 같은 세 값이면 언제 어느 워커에서 만들어도
+상자 배치와 깜빡이는 순서가 똑같으므로, 세션과 검사 기록에는 문제 전체 대신 seed만 저장하고
+필요할 때(정답 확인, 내보내기, 다시 보기) 다시 만듭니다.
+
+생성 규칙(상자 수, 배치 묶음 seed와 크기, 난수 사용 순서)을 바꿀 때는 GENERATOR_VERSION을 올리고
+이전 버전의 생성기는 GENERATORS에 남겨 둡니다. 저장된 기록은 기록 당시 버전으로 다시 만듭니다.
+"""
+import random
+
+from layouts import LayoutPool
+
+GENERATOR_VERSION = "1"
+
+# 버전 1의 상자 배치 묶음. seed와 크기가 같으면 상자 수별 묶음 내용이 항상 같다.
+LAYOUT_POOL_SEED = 20240501
+LAYOUT_POOL_SIZE = 64
+layout_pool = LayoutPool(pool_size=LAYOUT_POOL_SIZE, seed=LAYOUT_POOL_SEED)
+
+
+def problem_size(level):
+    """레벨의 (상자 수, 깜빡이는 횟수). 레벨 0은 연습 문제입니다."""
+    if level == 0:
+        return 4, 2
+    return level + 4, level + 1
+
+
+def _sequence_v1(level, seed):
+    num_boxes, sequence_length = problem_size(level)
+    rng = random.Random(f"sequence:1:{level}:{seed}")
+    flash_sequence = rng.sample(range(num_boxes), sequence_length)
+    boxes = layout_pool.get(num_boxes, rng=rng)
+    return {"boxes": boxes, "flash_sequence": flash_sequence, "flash_count": sequence_length}
+
+
+GENERATORS = {"1": _sequence_v1}
+
+
+def new_seed():
+    return random.getrandbits(32)
+
+
+def new_problem_ref(level):
+    """새 문제의 (버전, 레벨, seed). 세션에는 이것만 저장합니다."""
+    return {"version": GENERATOR_VERSION, "level": level, "seed": new_seed()}
+
+
+def sequence_problem(level, seed, version=GENERATOR_VERSION):
+    """(버전, 레벨, seed)로 문제를 만듭니다. 알 수 없는 버전이면 ValueError를 냅니다."""
+    generator = GENERATORS.get(str(version))
+    if generator is None:
+        raise ValueError(f"알 수 없는 문제 생성기 버전: {version}")
+    return dict(generator(level, seed), version=str(version), level=level, seed=seed)
+
+
+def resolve(problem):
+    """세션에 저장된 문제를 전체 문제로 바꿉니다. 이전 형식(문제 전체를 저장)은 그대로 돌려줍니다."""
+    if not problem or 'boxes' in problem:
+        return problem
+    return sequence_problem(problem['level'], problem['seed'], problem['version'])
+
+
+def replay(test):
+    """순서 기억 검사 기록의 문항마다 당시 문제를 다시 만듭니다. seed가 없는 이전 기록 문항은 None입니다."""
+    version = test.get('generator_version')
+    problems = []
+    for item in test.get('history') or []:
+        if version is None or item.get('seed') is None:
+            problems.append(None)
+        else:
+            problems.append(sequence_problem(item.get('level'), item['seed'], version))
+    return problems
+
+
+def history_with_answers(test):
+    """정답(correct_answer)을 seed로 다시 만들어 채운 history 사본을 돌려줍니다."""
+    history = []
+    for item, problem in zip(test.get('history') or [], replay(test)):
+        if problem is not None and item.get('correct_answer') is None:
+            item = dict(item, correct_answer=problem['flash_sequence'])
+        history.append(item)
+    return history
@@ -0,0 +1,179 @@
+"""
+서버 측 세션 저장소
+
+Flask 기본 세션은 세션 내용 전체(현재 문제의 상자 좌표, 순서 기억 검사 history 등)를
+서명된 쿠키에 담아 요청마다 주고받습니다. 여기서는 쿠키에 임의의 세션 ID만 담고
+내용은 서버의 저장소에 둡니다.
+
+- sqlite : instance 폴더의 SQLite 파일. 여러 gunicorn 워커가 함께 씁니다. (기본값)
+- memory : 프로세스 메모리. 단일 프로세스 개발 서버용입니다.
+
+세션은 app.permanent_session_lifetime이 지나면 만료됩니다.
+"""
+import os
+import secrets
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+import cooperative
+from metrics import registry as metrics
+
+# 만료된 세션을 정리하는 주기 (저장 횟수 기준)
+PURGE_EVERY = 500
+# 내용이 그대로일 때 만료 시각만 연장하는 최소 간격 (초)
+TOUCH_INTERVAL = 60
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False, serialized=None, expires=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.serialized = serialized   # 불러올 때의 직렬화 결과 (변경 여부 비교용)
+        self.expires = expires         # 불러올 때의 만료 시각
+        self.modified = False
+
+
+class MemoryBackend:
+    """프로세스 메모리 세션 저장소"""
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        with self._lock:
+            item = self._items.get(sid)
+            if item is None or item[1] < time.time():
+                return None, None
+            return item
+
+    def save(self, sid, data, expires):
+        with self._lock:
+            self._items[sid] = (data, expires)
+
+    def touch(self, sid, expires):
+        with self._lock:
+            if sid in self._items:
+                self._items[sid] = (self._items[sid][0], expires)
+
+    def delete(self, sid):
+        with self._lock:
+            self._items.pop(sid, None)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for sid in [sid for sid, (_, expires) in self._items.items() if expires < now]:
+                del self._items[sid]
+
+
+class SqliteBackend:
+    """SQLite 세션 저장소. 워커(프로세스)와 스레드마다 연결을 따로 엽니다. (gevent 워커에서는 요청들이 함께 씀)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = cooperative.thread_local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = cooperative.sqlite_connect(self.path)
+            cooperative.sqlite_execute(conn, "PRAGMA journal_mode=WAL")
+            cooperative.sqlite_execute(conn, "PRAGMA synchronous=NORMAL")
+            cooperative.sqlite_execute(conn, "CREATE TABLE IF NOT EXISTS sessions ("
+                                       "sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _execute(self, sql, params=()):
+        return cooperative.sqlite_execute(self._connect(), sql, params)
+
+    def load(self, sid):
+        row = self._execute("SELECT data, expires FROM sessions WHERE sid = ? AND expires >= ?",
+                            (sid, time.time())).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def save(self, sid, data, expires):
+        self._execute("INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)",
+                      (sid, data, expires))
+
+    def touch(self, sid, expires):
+        self._execute("UPDATE sessions SET expires = ? WHERE sid = ?", (expires, sid))
+
+    def delete(self, sid):
+        self._execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def purge_expired(self):
+        self._execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+
+
+def make_backend(name, instance_folder):
+    if name == 'sqlite':
+        return SqliteBackend(os.path.join(instance_folder, 'sessions.sqlite3'))
+    if name == 'memory':
+        return MemoryBackend()
+    raise ValueError(f"알 수 없는 세션 저장소: {name}")
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """쿠키에는 세션 ID만 담고 세션 내용은 backend에 저장합니다."""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._saves = 0
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            serialized, expires = self.backend.load(sid)
+            if serialized is not None:
+                return ServerSession(self.serializer.loads(serialized), sid=sid,
+                                     serialized=serialized, expires=expires)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if not session.new:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        expires = time.time() + lifetime
+        # 중첩된 값(history 목록 등)을 직접 고친 경우도 잡도록 modified 대신 직렬화 결과를 비교한다.
+        serialized = self.serializer.dumps(dict(session))
+        if serialized != session.serialized:
+            self.backend.save(session.sid, serialized, expires)
+            metrics.observe('session_data_bytes', len(serialized))
+        elif expires - session.expires >= TOUCH_INTERVAL:
+            self.backend.touch(session.sid, expires)
+        else:
+            return
+
+        self._saves += 1
+        if self._saves % PURGE_EVERY == 0:
+            self.backend.purge_expired()
+
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name, session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain, path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
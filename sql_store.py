@@ -0,0 +1,543 @@
+"""
+관계형 데이터베이스 결과 저장소
+
+storage.ResultStore와 같은 메서드를 SQLAlchemy 모델(models.py) 위에 구현합니다.
+스트룹 시행과 순서 기억 검사 history는 시행 1개당 1행으로 저장하며, 한 세션의 시행은
+한 번의 executemany(bulk insert)로 넣습니다. 모든 메서드는 Flask 앱 컨텍스트 안에서 호출해야 합니다.
+
+구독자(검사 통계, 참가자 요약)의 누적 상태는 반영한 마지막 seq와 함께 aggregate_checkpoints 테이블에 저장해 두고,
+워커가 시작하면 그 상태를 되살린 뒤 그 seq 이후의 세션만 읽어 전달합니다.
+
+archive()는 오래된 세션의 시행 행을 세션마다 gzip으로 압축한 한 행(archived_trials)으로 옮깁니다.
+세션 행은 그대로 두므로 목록·통계는 달라지지 않고, 상세 보기나 내보내기에서 그 세션을 읽을 때 압축을 풉니다.
+
+PostgreSQL에서 seq는 행을 넣을 때 정해지지만 트랜잭션은 다른 순서로 커밋될 수 있습니다. 그래서 읽은 seq 사이에
+빠진 번호(아직 커밋되지 않았을 수 있는 행)는 GAP_TIMEOUT초 동안 refresh()마다 다시 확인합니다.
+롤백된 트랜잭션의 번호는 끝내 나타나지 않으므로 시간이 지나면 버립니다.
+"""
+import gzip
+import json
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from itertools import islice
+from types import SimpleNamespace
+
+from sqlalchemy import delete, func, insert, or_, select, text, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from archive import COMPRESS_LEVEL
+from metrics import registry as metrics
+from models import (db, AggregateCheckpoint, ArchivedTrials, Participant, TestSession, StroopTrial,
+                    SequenceTrial, ScoringSummary)
+from participants import participant_key
+from storage import CHECKPOINT_EVERY, TestEntry, restore_subscribers, subscriber_states
+from stroop import PHASES
+
+STROOP_FIELDS = ('round', 'trial_number', 'word', 'color', 'user_response',
+                 'response_time', 'correct_answer', 'is_correct')
+SEQUENCE_FIELDS = ('level', 'correct', 'user_answer', 'correct_answer', 'time_taken')
+# 시행 행이 있는 검사 종류
+TRIAL_TEST_TYPES = ('stroop', 'sequence')
+CHECKPOINT_NAME = 'subscribers'
+# 빠진 seq를 다시 확인하는 시간 (초). 한 트랜잭션이 열려 있는 시간보다 넉넉히 길게 둔다.
+GAP_TIMEOUT = 300
+# 빠진 seq로 기억하는 범위. 동시에 열려 있는 트랜잭션들의 seq는 새로 읽은 가장 큰 seq 가까이에 있다.
+GAP_WINDOW = 2000
+
+
+def _lookup_key(name, age):
+    return '\x1f'.join(value or '' for value in participant_key(name, age))
+
+
+def _participant_dict(row):
+    return {"id": row.id, "name": row.name, "age": row.age, "gender": row.gender} if row else None
+
+
+def _split_trials(test_type, fields):
+    """
+    결과 필드에서 시행 단위 데이터를 떼어 내 (나머지 필드, 스트룹 시행, 순서 기억 시행)으로 나눕니다.
+
+    떼어 낸 자리에는 None을 남겨 두어 읽을 때 시행 테이블에서 다시 채울 곳을 표시합니다.
+    """
+    data = dict(fields)
+    stroop_rows, sequence_rows = [], []
+    result = data.get('result')
+    if test_type == 'stroop' and isinstance(result, dict) and isinstance(result.get('trials'), dict):
+        for phase in PHASES:
+            columns = result['trials'].get(phase) or {}
+            count = len(next(iter(columns.values()))) if columns else 0
+            for position in range(count):
+                row = {"phase": phase, "position": position}
+                extra = {}
+                for key, values in columns.items():
+                    (row if key in STROOP_FIELDS else extra)[key] = values[position]
+                row["extra"] = extra or None
+                stroop_rows.append(row)
+        data['result'] = dict(result, trials=None)
+    if test_type == 'sequence' and isinstance(data.get('history'), list):
+        for position, item in enumerate(data['history']):
+            row = {"position": position, "extra": None}
+            extra = {}
+            for key, value in item.items():
+                (row if key in SEQUENCE_FIELDS else extra)[key] = value
+            row["extra"] = extra or None
+            sequence_rows.append(row)
+        data['history'] = None
+    return data, stroop_rows, sequence_rows
+
+
+def _stroop_columns(rows):
+    """스트룹 시행 행을 단계별 열 배열({항목: [값, ...]})로 되돌립니다."""
+    trials = {}
+    for phase in PHASES:
+        phase_rows = [row for row in rows if row.phase == phase]
+        keys = [key for key in STROOP_FIELDS if any(getattr(row, key) is not None for row in phase_rows)]
+        for row in phase_rows:
+            for key in row.extra or {}:
+                if key not in keys:
+                    keys.append(key)
+        trials[phase] = {
+            key: [(row.extra or {}).get(key) if key not in STROOP_FIELDS else getattr(row, key)
+                  for row in phase_rows]
+            for key in keys
+        }
+    return trials
+
+
+def _sequence_history(rows):
+    history = []
+    for row in rows:
+        item = {key: getattr(row, key) for key in SEQUENCE_FIELDS}
+        item.update(row.extra or {})
+        history.append(item)
+    return history
+
+
+def _trial_dicts(rows, fields):
+    return [dict({key: getattr(row, key) for key in fields}, position=row.position, extra=row.extra)
+            for row in rows]
+
+
+def _pack_archive(stroop_rows, sequence_rows):
+    """세션 하나의 시행 행을 archived_trials.payload로 압축합니다. (압축한 값, 압축 전 크기)"""
+    data = json.dumps({"stroop": _trial_dicts(stroop_rows, ('phase',) + STROOP_FIELDS),
+                       "sequence": _trial_dicts(sequence_rows, SEQUENCE_FIELDS)},
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL), len(data)
+
+
+def _unpack_archive(payload):
+    """archived_trials.payload를 (스트룹 시행 행, 순서 기억 시행 행)으로 되돌립니다. 행은 모델처럼 속성으로 읽습니다."""
+    data = json.loads(gzip.decompress(payload))
+    return ([SimpleNamespace(**row) for row in data['stroop']],
+            [SimpleNamespace(**row) for row in data['sequence']])
+
+
+class SqlResultStore:
+    """SQLAlchemy 기반 검사 결과 저장소"""
+
+    def __init__(self, batch_size=500, checkpoint_every=CHECKPOINT_EVERY):
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        self._subscribers = []
+        self._last_seq = 0
+        self._gaps = {}             # _last_seq 아래에서 빠진 seq -> 처음 빠진 것을 본 시각 (epoch 초)
+        self._restored = False
+        self._uncheckpointed = 0    # 마지막 체크포인트 뒤로 구독자에게 전달한 세션 수
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber):
+        """storage.ResultStore.subscribe()와 같습니다. 새 세션은 refresh() 때 저장 순서대로 전달됩니다."""
+        self._subscribers.append(subscriber)
+
+    def refresh(self):
+        """
+        다른 워커가 저장한 세션을 구독자에게 전달합니다. (seq 인덱스로 새 행과 빠졌던 seq의 행만 조회)
+
+        처음 호출할 때는 체크포인트로 구독자 상태를 되살리고 그 seq 이후의 세션만 읽습니다.
+        """
+        if not self._subscribers:
+            return
+        with self._lock:
+            if not self._restored:
+                self._restored = True
+                self._restore_checkpoint()
+            condition = TestSession.seq > self._last_seq
+            if self._gaps:
+                condition = or_(condition, TestSession.seq.in_(list(self._gaps)))
+            rows = db.session.execute(
+                select(TestSession, Participant)
+                .join(Participant, Participant.id == TestSession.participant_id)
+                .where(condition)
+                .order_by(TestSession.seq)
+            ).all()
+            now = time.time()
+            previous = self._last_seq
+            seen = set()
+            for session_row, participant_row in rows:
+                record = self._record(session_row)
+                for subscriber in self._subscribers:
+                    subscriber.add(record, _participant_dict(participant_row))
+                self._gaps.pop(session_row.seq, None)
+                seen.add(session_row.seq)
+                self._last_seq = max(self._last_seq, session_row.seq)
+                self._uncheckpointed += 1
+            for seq in range(max(previous, self._last_seq - GAP_WINDOW) + 1, self._last_seq):
+                if seq not in seen:
+                    self._gaps[seq] = now
+            self._gaps = {seq: since for seq, since in self._gaps.items() if now - since < GAP_TIMEOUT}
+            if self._uncheckpointed >= self.checkpoint_every:
+                self.save_checkpoint()
+
+    def _restore_checkpoint(self):
+        """체크포인트가 있으면 구독자 상태를 되살리고 그 seq부터 이어서 읽습니다. 잠금을 쥔 상태에서 호출합니다."""
+        try:
+            with db.engine.connect() as conn:
+                row = conn.execute(select(AggregateCheckpoint.last_seq, AggregateCheckpoint.state,
+                                          AggregateCheckpoint.gaps)
+                                   .where(AggregateCheckpoint.name == CHECKPOINT_NAME)).first()
+        except DBAPIError as e:
+            # 마이그레이션(flask db upgrade)을 아직 하지 않은 DB
+            print(f"체크포인트를 읽지 못해 모든 세션을 다시 읽습니다: {e}")
+            return
+        if row is not None and restore_subscribers(self._subscribers, row.state):
+            self._last_seq = row.last_seq
+            self._gaps = {seq: since for seq, since in row.gaps or []}
+
+    def save_checkpoint(self):
+        """
+        구독자 상태를 반영한 마지막 seq와 함께 저장합니다. 마지막 체크포인트 뒤로 전달한 세션이 없으면 쓰지 않습니다.
+
+        아직 다시 확인하고 있는 빠진 seq도 함께 저장해, 되살린 뒤에도 그 행들을 놓치지 않게 합니다.
+        세션 저장과 섞이지 않게 별도 연결의 트랜잭션으로 쓰고, 다른 워커가 더 뒤의 seq까지 저장해 두었으면 덮어쓰지 않습니다.
+        """
+        with self._lock:
+            states = subscriber_states(self._subscribers)
+            if not self._uncheckpointed or states is None:
+                return
+            values = {"last_seq": self._last_seq, "state": states,
+                      "gaps": sorted([seq, since] for seq, since in self._gaps.items())}
+            try:
+                with db.engine.begin() as conn:
+                    updated = conn.execute(update(AggregateCheckpoint)
+                                           .where(AggregateCheckpoint.name == CHECKPOINT_NAME,
+                                                  AggregateCheckpoint.last_seq <= self._last_seq)
+                                           .values(**values)).rowcount
+                    if not updated and conn.execute(select(AggregateCheckpoint.name).where(
+                            AggregateCheckpoint.name == CHECKPOINT_NAME)).first() is None:
+                        conn.execute(insert(AggregateCheckpoint).values(name=CHECKPOINT_NAME, **values))
+            except IntegrityError:
+                return   # 다른 워커가 방금 처음 저장했다. 다음 체크포인트 때 갱신한다.
+            except DBAPIError as e:
+                print(f"체크포인트를 저장하지 못했습니다: {e}")
+                return
+            self._uncheckpointed = 0
+
+    # --- 참가자 ---
+    def find_user(self, name, age):
+        row = db.session.execute(
+            select(Participant).where(Participant.lookup_key == _lookup_key(name, age))
+        ).scalar_one_or_none()
+        return _participant_dict(row)
+
+    def add_user(self, name, age, gender):
+        """참가자를 등록합니다. 다른 워커가 먼저 등록했다면 그 레코드를 돌려줍니다."""
+        row = Participant(id=uuid.uuid4().hex, name=name, age=age, gender=gender,
+                          lookup_key=_lookup_key(name, age))
+        db.session.add(row)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return self.find_user(name, age)
+        return _participant_dict(row)
+
+    def get_user(self, user_id):
+        return _participant_dict(db.session.get(Participant, user_id)) if user_id else None
+
+    def users(self):
+        return [_participant_dict(row) for row in db.session.execute(select(Participant)).scalars()]
+
+    # --- 검사 결과 ---
+    @staticmethod
+    def _fields(record):
+        return {k: v for k, v in record.items() if k not in ('id', 'user_id', 'test_type', 'timestamp')}
+
+    @staticmethod
+    def _insert_trials(seq, stroop_rows, sequence_rows):
+        if stroop_rows:
+            db.session.execute(insert(StroopTrial), [dict(r, session_seq=seq) for r in stroop_rows])
+        if sequence_rows:
+            db.session.execute(insert(SequenceTrial), [dict(r, session_seq=seq) for r in sequence_rows])
+
+    def _insert_test(self, record):
+        data, stroop_rows, sequence_rows = _split_trials(record['test_type'], self._fields(record))
+        row = TestSession(id=record['id'], participant_id=record['user_id'], test_type=record['test_type'],
+                          timestamp=record['timestamp'] or '', data=data)
+        db.session.add(row)
+        db.session.flush()
+        self._insert_trials(row.seq, stroop_rows, sequence_rows)
+        return row
+
+    def append_test(self, user_id, test_type, timestamp, **fields):
+        """검사 결과 한 건과 그 시행 행들을 한 트랜잭션으로 저장합니다."""
+        record = {"id": uuid.uuid4().hex, "user_id": user_id,
+                  "test_type": test_type, "timestamp": timestamp}
+        record.update(fields)
+        with metrics.time('store_io_seconds', op='save', file='sql'):
+            self._insert_test(record)
+            db.session.commit()
+        return record
+
+    def append_tests(self, records):
+        """storage.ResultStore.append_tests()와 같습니다. 이미 있는 id는 건너뜁니다."""
+        ids = [record['id'] for record in records]
+        with metrics.time('store_io_seconds', op='save', file='sql'):
+            existing = set(db.session.execute(select(TestSession.id).where(TestSession.id.in_(ids))).scalars())
+            new = []
+            for record in records:
+                if record['id'] not in existing:
+                    existing.add(record['id'])
+                    self._insert_test(record)
+                    new.append(record)
+            db.session.commit()
+        return new
+
+    def _record(self, row, stroop_rows=None, sequence_rows=None):
+        """세션 행을 저장소 레코드 dict로 바꿉니다. 시행 행을 주면 떼어 냈던 자리에 다시 채웁니다."""
+        record = {"id": row.id, "user_id": row.participant_id,
+                  "test_type": row.test_type, "timestamp": row.timestamp}
+        record.update(row.data or {})
+        result = record.get('result')
+        if stroop_rows is not None and isinstance(result, dict) and 'trials' in result and result['trials'] is None:
+            record['result'] = dict(result, trials=_stroop_columns(stroop_rows))
+        if sequence_rows is not None and 'history' in record and record['history'] is None:
+            record['history'] = _sequence_history(sequence_rows)
+        return record
+
+    def _records_with_trials(self, rows):
+        """세션 행 목록의 시행 행을 테이블마다 한 번의 쿼리로 불러와 레코드로 만듭니다."""
+        with metrics.time('store_io_seconds', op='load', file='sql'):
+            return self._load_trials(rows)
+
+    @staticmethod
+    def _trial_rows(rows):
+        """세션 행들의 시행 행을 테이블마다 한 번의 쿼리로 읽어 ({seq: 스트룹 시행}, {seq: 순서 기억 시행})으로 돌려줍니다."""
+        seqs = [row.seq for row in rows]
+        stroop, sequence = {}, {}
+        if any(row.test_type == 'stroop' for row in rows):
+            for trial in db.session.execute(select(StroopTrial).where(StroopTrial.session_seq.in_(seqs))
+                                            .order_by(StroopTrial.session_seq, StroopTrial.position)).scalars():
+                stroop.setdefault(trial.session_seq, []).append(trial)
+        if any(row.test_type == 'sequence' for row in rows):
+            for trial in db.session.execute(select(SequenceTrial).where(SequenceTrial.session_seq.in_(seqs))
+                                            .order_by(SequenceTrial.session_seq, SequenceTrial.position)).scalars():
+                sequence.setdefault(trial.session_seq, []).append(trial)
+        return stroop, sequence
+
+    def _load_trials(self, rows):
+        stroop, sequence = self._trial_rows(rows)
+        # 시행 행이 없는 세션은 archive()로 옮겨졌을 수 있다.
+        missing = [row.seq for row in rows
+                   if row.test_type in TRIAL_TEST_TYPES and row.seq not in stroop and row.seq not in sequence]
+        if missing:
+            for archived in db.session.execute(select(ArchivedTrials)
+                                               .where(ArchivedTrials.session_seq.in_(missing))).scalars():
+                stroop[archived.session_seq], sequence[archived.session_seq] = _unpack_archive(archived.payload)
+        return [self._record(row, stroop.get(row.seq, []), sequence.get(row.seq, [])) for row in rows]
+
+    def get_test(self, test_id):
+        row = db.session.execute(select(TestSession).where(TestSession.id == test_id)).scalar_one_or_none()
+        return self._records_with_trials([row])[0] if row else None
+
+    def user_tests(self, user_id):
+        rows = db.session.execute(select(TestSession).where(TestSession.participant_id == user_id)
+                                  .order_by(TestSession.seq)).scalars().all()
+        return self._records_with_trials(rows)
+
+    def _filtered(self, statement, test_type=None, date_from=None, date_to=None, name=None):
+        if test_type:
+            statement = statement.where(TestSession.test_type == test_type)
+        if date_from:
+            statement = statement.where(TestSession.timestamp >= date_from)
+        if date_to:
+            # 날짜만 비교하도록 다음 날 0시 전까지 포함
+            next_day = (date.fromisoformat(date_to) + timedelta(days=1)).isoformat()
+            statement = statement.where(TestSession.timestamp < next_day)
+        if name:
+            statement = statement.join(Participant, Participant.id == TestSession.participant_id) \
+                .where(func.lower(Participant.name).contains(name.strip().lower()))
+        return statement
+
+    def query_tests(self, name=None, test_type=None, date_from=None, date_to=None, offset=0, limit=20):
+        """storage.ResultStore.query_tests()와 같습니다. 인덱스 (test_type, timestamp)를 사용합니다."""
+        filters = dict(test_type=test_type, date_from=date_from, date_to=date_to, name=name)
+        total = db.session.execute(self._filtered(select(func.count(TestSession.seq)), **filters)).scalar()
+        rows = db.session.execute(
+            self._filtered(select(TestSession.id, TestSession.participant_id, TestSession.test_type,
+                                  TestSession.timestamp), **filters)
+            .order_by(TestSession.timestamp.desc(), TestSession.seq.desc())
+            .offset(offset).limit(limit)
+        ).all()
+        return total, [TestEntry(row.id, row.participant_id, row.test_type, row.timestamp, None, None)
+                       for row in rows]
+
+    def iter_tests(self, test_type=None, date_from=None, date_to=None):
+        """조건에 맞는 검사 레코드를 오래된 순으로 batch_size개씩 읽어 하나씩 돌려줍니다."""
+        rows = db.session.execute(
+            self._filtered(select(TestSession), test_type=test_type, date_from=date_from, date_to=date_to)
+            .order_by(TestSession.timestamp, TestSession.seq)
+            .execution_options(yield_per=self.batch_size)
+        ).scalars()
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return
+            yield from self._records_with_trials(batch)
+
+    def append_summaries(self, summaries):
+        if not summaries:
+            return
+        for summary in summaries:
+            db.session.merge(ScoringSummary(test_id=summary['test_id'], version=summary['version'],
+                                            data={k: v for k, v in summary.items()
+                                                  if k not in ('test_id', 'version')}))
+        db.session.commit()
+
+    def summaries(self, test_id):
+        rows = db.session.execute(select(ScoringSummary).where(ScoringSummary.test_id == test_id)).scalars()
+        return {row.version: dict(row.data, test_id=row.test_id, version=row.version) for row in rows}
+
+    def is_empty(self):
+        return db.session.execute(select(Participant.id).limit(1)).first() is None
+
+    def rewrite_tests(self, transform):
+        """모든 세션을 transform(record) 결과로 바꿉니다. 바뀐 세션만 다시 씁니다. (바뀐 수, 전체 수)를 돌려줍니다."""
+        changed = total = 0
+        seqs = db.session.execute(select(TestSession.seq).order_by(TestSession.seq)).scalars().all()
+        for start in range(0, len(seqs), self.batch_size):
+            rows = db.session.execute(select(TestSession).where(
+                TestSession.seq.in_(seqs[start:start + self.batch_size]))).scalars().all()
+            for row, record in zip(rows, self._records_with_trials(rows)):
+                total += 1
+                new_record = transform(dict(record))
+                if new_record == record:
+                    continue
+                data, stroop_rows, sequence_rows = _split_trials(row.test_type, self._fields(new_record))
+                db.session.execute(StroopTrial.__table__.delete().where(StroopTrial.session_seq == row.seq))
+                db.session.execute(SequenceTrial.__table__.delete().where(SequenceTrial.session_seq == row.seq))
+                db.session.execute(ArchivedTrials.__table__.delete().where(ArchivedTrials.session_seq == row.seq))
+                row.data = data
+                self._insert_trials(row.seq, stroop_rows, sequence_rows)
+                changed += 1
+            db.session.commit()
+        if changed:
+            # 바뀐 세션은 체크포인트 상태와 맞지 않으므로 다음 시작 때 모든 세션을 다시 읽게 한다.
+            db.session.execute(delete(AggregateCheckpoint))
+            db.session.commit()
+        return changed, total
+
+    def compact(self, keep_months=3, today=None):
+        """
+        storage.ResultStore.compact()에 해당하는 정비 작업입니다. 행을 다시 쓰지는 않습니다.
+
+        데이터베이스는 기간 조회를 (test_type, timestamp) 인덱스로 읽으므로 세그먼트를 합칠 필요가 없고,
+        대신 테이블 통계를 갱신(ANALYZE)해 플래너가 그 인덱스를 고르게 합니다. keep_months개월보다 오래된 해의
+        세션 수와 관리자 기간 조회의 실행 계획을 함께 돌려줍니다. {"rolled_up": {연도: 세션 수}, "plan": [줄, ...]}
+        """
+        today = today or date.today()
+        year, month = today.year, today.month - keep_months
+        while month <= 0:
+            year, month = year - 1, month + 12
+        year_of = func.substr(TestSession.timestamp, 1, 4)
+        rolled_up = dict(db.session.execute(
+            select(year_of, func.count(TestSession.seq)).where(TestSession.timestamp < f"{year:04d}")
+            .group_by(year_of).order_by(year_of)).all())
+        for model in (TestSession, StroopTrial, SequenceTrial):
+            db.session.execute(text(f"ANALYZE {model.__tablename__}"))
+        explain = 'EXPLAIN QUERY PLAN' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN'
+        query = self._filtered(select(TestSession.seq), test_type='stroop', date_from=f"{year:04d}-01-01") \
+            .order_by(TestSession.timestamp)
+        compiled = query.compile(db.engine, compile_kwargs={"literal_binds": True})
+        plan = [row[-1] for row in db.session.execute(text(f"{explain} {compiled}"))]
+        db.session.commit()
+        return {"rolled_up": rolled_up, "plan": plan}
+
+    def _archive_candidates(self, cutoff):
+        """검사 일시가 cutoff보다 이르고 아직 시행 행을 옮기지 않은 세션"""
+        return select(TestSession.seq).where(
+            TestSession.timestamp < cutoff, TestSession.test_type.in_(TRIAL_TEST_TYPES),
+            ~select(ArchivedTrials.session_seq).where(ArchivedTrials.session_seq == TestSession.seq).exists())
+
+    def archive(self, older_than_months=12, today=None, max_sessions=None):
+        """
+        storage.ResultStore.archive()에 해당합니다. 오래된 세션의 시행 행을 세션마다 압축해 archived_trials로 옮깁니다.
+
+        batch_size개 세션씩 짧은 트랜잭션으로 옮기므로 실행 중에도 결과 저장이 막히지 않습니다.
+        max_sessions를 주면 그만큼만 옮기고 멈추며, 다시 실행하면 남은 세션부터 이어서 옮깁니다.
+        {"archived": {연도: 세션 수}, "remaining": 남은 대상 세션 수, "bytes_before", "bytes_after"}를 돌려줍니다.
+        bytes_before는 옮긴 시행 행을 JSON으로 쓴 크기, bytes_after는 압축한 크기입니다.
+        """
+        today = today or date.today()
+        year, month = today.year, today.month - older_than_months
+        while month <= 0:
+            year, month = year - 1, month + 12
+        cutoff = f"{year:04d}-{month:02d}-01"
+        archived = {}
+        moved = bytes_before = bytes_after = 0
+        while max_sessions is None or moved < max_sessions:
+            limit = self.batch_size if max_sessions is None else min(self.batch_size, max_sessions - moved)
+            seqs = db.session.execute(self._archive_candidates(cutoff).order_by(TestSession.seq)
+                                      .limit(limit)).scalars().all()
+            if not seqs:
+                break
+            rows = db.session.execute(select(TestSession).where(TestSession.seq.in_(seqs))).scalars().all()
+            stroop, sequence = self._trial_rows(rows)
+            batch, sizes = [], []
+            for row in rows:
+                payload, size = _pack_archive(stroop.get(row.seq, []), sequence.get(row.seq, []))
+                batch.append({"session_seq": row.seq, "payload": payload})
+                sizes.append((size, len(payload)))
+            try:
+                db.session.execute(insert(ArchivedTrials), batch)
+                db.session.execute(delete(StroopTrial).where(StroopTrial.session_seq.in_(seqs)))
+                db.session.execute(delete(SequenceTrial).where(SequenceTrial.session_seq.in_(seqs)))
+                db.session.commit()
+            except IntegrityError:
+                # 다른 보관 작업이 같은 세션을 먼저 옮겼다. 남은 세션을 다시 고른다.
+                db.session.rollback()
+                continue
+            for row, (size, compressed) in zip(rows, sizes):
+                archived[row.timestamp[:4]] = archived.get(row.timestamp[:4], 0) + 1
+                bytes_before += size
+                bytes_after += compressed
+            moved += len(seqs)
+        remaining = db.session.execute(select(func.count()).select_from(
+            self._archive_candidates(cutoff).subquery())).scalar()
+        return {"archived": archived, "remaining": remaining,
+                "bytes_before": bytes_before, "bytes_after": bytes_after}
+
+    def import_legacy(self, data):
+        """기존 database.json 내용을 가져옵니다. 가져온 (참가자 수, 검사 수)를 돌려줍니다."""
+        user_count = test_count = 0
+        for legacy_user in data.get('users', []):
+            user = self.find_user(legacy_user.get('name'), legacy_user.get('age'))
+            if user is None:
+                user = self.add_user(legacy_user.get('name'), legacy_user.get('age'),
+                                     legacy_user.get('gender', 'N/A'))
+                user_count += 1
+            for test in legacy_user.get('tests', []):
+                record = {"id": uuid.uuid4().hex, "user_id": user['id'],
+                          "test_type": test.get('test_type'), "timestamp": test.get('timestamp')}
+                record.update({k: v for k, v in test.items() if k not in ('test_type', 'timestamp')})
+                self._insert_test(record)
+                test_count += 1
+            db.session.commit()
+        return user_count, test_count
+
+    def cache_stats(self):
+        """연결 풀 상태"""
+        return {"backend": "sql", "pool": db.engine.pool.status(), "last_seq": self._last_seq,
+                "pending_gaps": len(self._gaps), "uncheckpointed": self._uncheckpointed}
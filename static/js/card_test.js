@@ -27,6 +27,7 @@ let matchedPairs = 0;
 let lockBoard = false;
 let timerInterval;
 let gameResults = [];
+let submissionId = null; // 결과 제출 ID ('다시 시도'를 눌러도 같은 ID로 보냄)
 let levelStartTime; // [신규] 레벨 시작 시간 기록
 
 // --- 이벤트 리스너 ---
@@ -168,11 +169,8 @@ async function finishGameAndSubmit() {
     startBtn.disabled = true;
 
     try {
-        const response = await fetch('/api/submit-card-result', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(gameResults)
-        });
+        submissionId = submissionId || newSubmissionId();
+        const response = await postWithRetry('/api/submit-card-result', gameResults, { submissionId });
 
         if (!response.ok) {
             throw new Error(`서버 응답 오류: ${response.status}`);
@@ -247,63 +247,52 @@ function checkAnswer(userAnswer) {
     }
 }
 
-// API 요청 함수 (타임아웃 및 재시도 로직 추가)
-async function submitLevelResultsAndProceed() {
+// API 요청 함수 (타임아웃 및 재시도는 postWithRetry가 처리)
+// 레벨 결과는 서버 세션에 모아 두었다가, final이 true인 요청에서 한 건의 검사 결과로 저장된다.
+async function submitLevelResultsAndProceed(isFinal = false) {
+    const final = isFinal || currentLevel >= MAX_LEVEL;
     const resultData = {
         level: currentLevel,
         score: levelScore,
         total_problems: LEVEL_CONFIG[currentLevel].totalProblems,
-        times: answerTimes
+        times: answerTimes,
+        final: final
     };
 
-    const maxRetries = 3;
-    let attempt = 0;
-
-    while (attempt < maxRetries) {
-        try {
-            const controller = new AbortController();
-            const timeoutId = setTimeout(() => controller.abort(), 10000); // 10초 타임아웃
-
-            const response = await fetch('/api/submit-pattern-result', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(resultData),
-                signal: controller.signal
-            });
-
-            clearTimeout(timeoutId);
-
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-            }
-
-            console.log(`레벨 ${currentLevel} 결과 저장 성공`);
-            
-            // 다음 단계로 진행
-            currentLevel++;
-            if (currentLevel > MAX_LEVEL) {
-                finishAllTests();
-            } else {
-                startLevel(currentLevel);
-            }
-            return;
+    try {
+        const response = await postWithRetry('/api/submit-pattern-result', resultData);
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+        const result = await response.json();
+        console.log(`레벨 ${currentLevel} 결과 저장 성공`);
 
-        } catch (error) {
-            attempt++;
-            console.error(`결과 저장 시도 ${attempt}/${maxRetries} 실패:`, error);
-            
-            if (attempt >= maxRetries) {
-                elements.feedbackEl.textContent = '결과 저장에 실패했습니다. 인터넷 연결을 확인해주세요.';
-                elements.feedbackEl.className = 'text-red-500';
-                // 실패 시에도 계속 진행할 수 있도록 버튼 표시
-                elements.nextBtn.textContent = "다음 레벨로 (결과 저장 실패)";
-                elements.nextBtn.classList.remove('hidden');
-                return;
-            }
-            
-            // 재시도 전 잠시 대기
-            await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+        // 다음 단계로 진행
+        currentLevel++;
+        if (final) {
+            finishAllTests(result.next_url);
+        } else {
+            startLevel(currentLevel);
         }
+    } catch (error) {
+        console.error('결과 저장 실패:', error);
+        elements.feedbackEl.textContent = '결과 저장에 실패했습니다. 인터넷 연결을 확인해주세요.';
+        elements.feedbackEl.className = 'text-red-500';
+        // 실패 시에도 계속 진행할 수 있도록 버튼 표시
+        elements.nextBtn.textContent = "다음 레벨로 (결과 저장 실패)";
+        elements.nextBtn.classList.remove('hidden');
+    }
+}
+
+// 진행 중인 레벨 없이 테스트를 끝낼 때, 지금까지 모은 레벨 결과를 저장하도록 요청
+async function finalizeResults() {
+    try {
+        const response = await postWithRetry('/api/submit-pattern-result', { final: true });
+        const result = await response.json();
+        finishAllTests(result.next_url);
+    } catch (error) {
+        console.error('결과 저장 실패:', error);
+        finishAllTests();
     }
 }
 
@@ -324,7 +313,7 @@ function startLevel(level) {
     }
 }
 
-function finishAllTests() {
+function finishAllTests(nextUrl = '/final_finish') {
     try {
         const gameContainer = document.getElementById('game-container');
         if (gameContainer) {
@@ -332,12 +321,12 @@ function finishAllTests() {
                 <div class="text-center p-10">
                     <h2 class="text-3xl font-bold text-blue-600 mb-4">모든 검사가 완료되었습니다.</h2>
                     <p class="text-xl text-gray-700">수고하셨습니다. 결과가 모두 저장되었습니다.</p>
-                    <p class="text-lg text-gray-500 mt-8">잠시 후 첫 화면으로 돌아갑니다.</p>
+                    <p class="text-lg text-gray-500 mt-8">잠시 후 다음 화면으로 이동합니다.</p>
                 </div>
             `;
             
             setTimeout(() => {
-                window.location.href = "/";
+                window.location.href = nextUrl || '/final_finish';
             }, 4000);
         }
     } catch (error) {
@@ -371,10 +360,10 @@ function setupEventListeners() {
         if (confirmExit) {
             // 진행 중인 문제가 있으면 현재 레벨 결과 저장
             if (answerTimes.length > 0) {
-                await submitLevelResultsAndProceed();
+                await submitLevelResultsAndProceed(true);
             } else {
                 // 모든 테스트 종료 처리
-                finishAllTests();
+                await finalizeResults();
             }
         }
     });
@@ -63,11 +63,7 @@ async function submitAnswer() {
     messageLabel.textContent = "채점 중입니다...";
 
     try {
-        const response = await fetch('/api/submit-answer', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ answer: userSequence })
-        });
+        const response = await postWithRetry('/api/submit-answer', { answer: userSequence });
         const result = await response.json();
 
         if (result.status === 'correct_practice') {
@@ -68,6 +68,16 @@ document.addEventListener('DOMContentLoaded', () => {
     let allTestTrials = [];     // 전체 본 검사 시행 데이터
     let practiceFailures = 0;   // 연습에서 실패한 총 횟수
 
+    // 자극 제시와 응답마다 시각을 기록하고 쉬는 화면에서 보낸다. (telemetry.js)
+    const telemetry = new Telemetry('stroop');
+
+    function recordStimulus(phase, index, trial, t = performance.now()) {
+        telemetry.record('stimulus', {
+            phase, round: currentRound, i: index, word: trial.word,
+            color: trial.color.replace('text-', ''), target: trial.isTarget
+        }, t);
+    }
+
     // --- 유틸리티 및 문항 생성 ---
     function shuffleArray(array) { for (let i = array.length - 1; i > 0; i--) { const j = Math.floor(Math.random() * (i + 1)); [array[i], array[j]] = [array[j], array[i]]; } }
     function getRandomElement(arr, exclude = null) { let el; do { el = arr[Math.floor(Math.random() * arr.length)]; } while (exclude && el.name === exclude.name); return el; }
@@ -184,6 +194,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const trial = practiceTrials[currentPracticeIndex];
         practiceStimulusWord.textContent = trial.word;
         practiceStimulusWord.className = `text-8xl font-black ${trial.color}`;
+        recordStimulus('practice', currentPracticeIndex, trial);
         waitingForInput = true;
         startPracticeTimerBar();
         practiceResponseTimeout = setTimeout(() => handlePracticeResponse(false), PRACTICE_RESPONSE_WINDOW);
@@ -194,6 +205,7 @@ document.addEventListener('DOMContentLoaded', () => {
         clearTimeout(practiceResponseTimeout);
         clearInterval(timerInterval);
         waitingForInput = false;
+        telemetry.record('response', { phase: 'practice', round: currentRound, i: currentPracticeIndex, pressed: buttonPressed });
 
         const trial = practiceTrials[currentPracticeIndex];
         const correct = (trial.isTarget === buttonPressed);
@@ -243,9 +255,11 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         practiceFailText.innerHTML = alertMsg;
         practiceFailModal.classList.remove('hidden');
+        telemetry.flush();
     }
 
     function practiceSuccess() {
+        telemetry.flush();
         hideAllScreens();
         preRoundScreen.classList.remove('hidden');
         preRoundInstructionArea.innerHTML = prePracticeInstructionArea.innerHTML;
@@ -307,7 +321,8 @@ document.addEventListener('DOMContentLoaded', () => {
         stimulusWord.classList.remove('hidden');
 
         waitingForInput = true;
-        startTime = Date.now();
+        startTime = performance.now();
+        recordStimulus('test', mainTrialIndex, trial, startTime);
         startMainTimerBar(); // --- 본 검사 타이머 바 시작 호출 (신규 추가) ---
         responseTimeout = setTimeout(() => handleMainResponse(false), RESPONSE_WINDOW);
     }
@@ -319,7 +334,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
         const trial = trials[mainTrialIndex];
         const correct = (trial.isTarget === buttonPressed);
-        const responseTime = Date.now() - startTime;
+        const responseTime = Math.round(performance.now() - startTime);
+        telemetry.record('response', { phase: 'test', round: currentRound, i: mainTrialIndex, pressed: buttonPressed });
 
         // 본 검사 데이터 기록
         allTestTrials.push({
@@ -359,6 +375,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const accuracy = (correctCount / TOTAL_TRIALS_PER_ROUND) * 100;
         const avgReactionTime = reactionTimes.length > 0 ? (reactionTimes.reduce((a, b) => a + b, 0) / reactionTimes.length).toFixed(3) : 'N/A';
         roundResults[currentRound] = { correctCount, accuracy, avgReactionTime };
+        telemetry.flush();
         hideAllScreens();
         if (currentRound === 1) {
             showPrePracticeScreen(2);
@@ -389,11 +406,9 @@ document.addEventListener('DOMContentLoaded', () => {
 
         // 3. fetch를 사용하여 서버에 결과 전송
         try {
-            const response = await fetch('/api/submit-stroop-result', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(finalResultData)
-            });
+            // 결과를 저장할 때 서버가 이벤트 기록으로 시행 목록과 응답 시간을 다시 만들므로 남은 이벤트를 먼저 보낸다.
+            await telemetry.flush();
+            const response = await postWithRetry('/api/submit-stroop-result', telemetry.stamp(finalResultData));
 
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -0,0 +1,45 @@
+// 결과 제출 공통 함수
+// 제출 한 건마다 submission ID를 만들고 다시 보낼 때도 같은 ID를 보낸다.
+// 서버는 이미 처리한 ID면 다시 저장하지 않고 처음 응답을 돌려주므로, 재시도해도 결과가 중복 저장되지 않는다.
+
+function newSubmissionId() {
+    if (window.crypto && window.crypto.randomUUID) {
+        return window.crypto.randomUUID();
+    }
+    return 'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, c => {
+        const r = Math.random() * 16 | 0;
+        return (c === 'x' ? r : (r & 0x3 | 0x8)).toString(16);
+    });
+}
+
+// JSON을 POST로 보내고, 네트워크 오류·타임아웃·5xx·409(처리 중)이면 같은 ID로 다시 보낸다.
+// 그 밖의 응답(성공 또는 4xx)은 그대로 돌려준다.
+async function postWithRetry(url, data, { submissionId = newSubmissionId(), maxRetries = 3, timeoutMs = 10000 } = {}) {
+    let attempt = 0;
+    while (true) {
+        const controller = new AbortController();
+        const timeoutId = setTimeout(() => controller.abort(), timeoutMs);
+        try {
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', 'X-Submission-ID': submissionId },
+                body: JSON.stringify(data),
+                signal: controller.signal
+            });
+            clearTimeout(timeoutId);
+            if (response.status < 500 && response.status !== 409) {
+                return response;
+            }
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        } catch (error) {
+            clearTimeout(timeoutId);
+            attempt++;
+            console.error(`${url} 전송 시도 ${attempt}/${maxRetries} 실패:`, error);
+            if (attempt >= maxRetries) {
+                throw error;
+            }
+            // 재시도 전 잠시 대기
+            await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+        }
+    }
+}
@@ -0,0 +1,91 @@
+// 검사 중 이벤트 기록
+// 클릭·응답 이벤트마다 performance.now() 시각(ms)과 좌표 등을 모아 두었다가, 단계 사이처럼 쉬는 시점에
+// flush()로 한 묶음씩 보낸다. 페이지를 떠날 때는 남은 이벤트를 sendBeacon으로 보낸다.
+// 묶음은 열(column) 배열이고, 시각 열(dt)은 바로 앞 이벤트와의 차이를 0.1ms 단위 정수로 담는다. (서버: events.py)
+// 전송에 실패해도 검사 진행에는 영향을 주지 않는다.
+
+const TELEMETRY_TIME_SCALE = 10;
+const TELEMETRY_MAX_BUFFER = 500;
+
+class Telemetry {
+    constructor(testType) {
+        this.url = `/api/events/${testType}`;
+        this.stream = newSubmissionId();   // submission.js
+        this.seq = 0;
+        this.buffer = [];
+        this.sending = Promise.resolve();
+        window.addEventListener('pagehide', () => this.flush({ beacon: true }));
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') {
+                this.flush({ beacon: true });
+            }
+        });
+    }
+
+    // 이벤트 한 건을 기록한다. t를 주지 않으면 지금 시각. (클릭은 event.timeStamp를 넘기면 입력 시각이 된다)
+    record(kind, fields = {}, t = performance.now()) {
+        this.buffer.push(Object.assign({ t, k: kind }, fields));
+        if (this.buffer.length >= TELEMETRY_MAX_BUFFER) {
+            this.flush();
+        }
+    }
+
+    // 쌓인 이벤트를 열 배열 묶음으로 만든다.
+    encode(events) {
+        const keys = [];
+        events.forEach(event => Object.keys(event).forEach(key => {
+            if (key !== 't' && !keys.includes(key)) keys.push(key);
+        }));
+        const cols = { dt: [] };
+        keys.forEach(key => { cols[key] = []; });
+        const first = Math.round(events[0].t * TELEMETRY_TIME_SCALE);
+        let previous = first;
+        events.forEach(event => {
+            const t = Math.round(event.t * TELEMETRY_TIME_SCALE);
+            cols.dt.push(t - previous);
+            previous = t;
+            keys.forEach(key => cols[key].push(event[key] === undefined ? null : event[key]));
+        });
+        return { v: 1, stream: this.stream, seq: this.seq++, origin: performance.timeOrigin,
+                 t0: first / TELEMETRY_TIME_SCALE, cols };
+    }
+
+    // 결과에 이 페이지의 스트림 ID와 지금까지 보낸 묶음 수를 붙인다. 서버는 이 페이지의 묶음이 다 왔을 때만
+    // 이벤트로 결과를 다시 계산한다. flush()를 기다린 뒤에 부른다.
+    stamp(result) {
+        return Object.assign({}, result, { event_stream: this.stream, event_batches: this.seq });
+    }
+
+    // 쌓인 이벤트를 보낸다. 앞 묶음을 다 보낸 뒤에 끝나는 Promise를 돌려준다.
+    flush({ beacon = false } = {}) {
+        if (this.buffer.length === 0) {
+            return this.sending;
+        }
+        const body = JSON.stringify(this.encode(this.buffer.splice(0)));
+        if (beacon && navigator.sendBeacon) {
+            navigator.sendBeacon(this.url, new Blob([body], { type: 'application/json' }));
+            return this.sending;
+        }
+        this.sending = this.sending.then(() => this.send(body));
+        return this.sending;
+    }
+
+    async send(body, maxRetries = 3) {
+        for (let attempt = 1; attempt <= maxRetries; attempt++) {
+            try {
+                const response = await fetch(this.url, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body,
+                    keepalive: body.length < 60000
+                });
+                if (response.status < 500) {
+                    return;
+                }
+            } catch (error) {
+                console.error(`이벤트 전송 시도 ${attempt}/${maxRetries} 실패:`, error);
+            }
+            await new Promise(resolve => setTimeout(resolve, 500 * attempt));
+        }
+    }
+}
@@ -67,13 +67,9 @@ async function submitAnswer() {
     const timeTaken = (new Date().getTime() - levelStartTime) / 1000;
 
     try {
-        const res = await fetch('/api/submit-answer', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ 
-                answer: userSequence,
-                time_taken: parseFloat(timeTaken.toFixed(2))
-            })
+        const res = await postWithRetry('/api/submit-answer', {
+            answer: userSequence,
+            time_taken: parseFloat(timeTaken.toFixed(2))
         });
         const result = await res.json();
         
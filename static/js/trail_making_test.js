@@ -29,6 +29,9 @@ document.addEventListener('DOMContentLoaded', function() {
     let currentConsonantIndex = 0;
     let consonantCheckStartTime = 0;
 
+    // 클릭마다 시각과 좌표를 기록하고 단계가 끝날 때 보낸다. (telemetry.js)
+    const telemetry = new Telemetry('trail_making');
+
     // --- 화면 전환 함수 ---
     const screens = document.querySelectorAll('#app-container > div');
     function showScreen(screenId) {
@@ -72,10 +75,12 @@ document.addEventListener('DOMContentLoaded', function() {
     function terminateCurrentTest() {
         userResults.termination_reason = 'user_terminated';
         userResults.termination_stage = currentStage;
+        telemetry.record('phase_end', { phase: currentStage, status: 'terminated' });
+        telemetry.flush();
         
         // 현재 진행 중인 테스트의 중간 결과 저장
         if (currentTest) {
-            const currentTime = Date.now();
+            const currentTime = performance.now();
             const elapsedTime = currentTest.startTime > 0 ? (currentTime - currentTest.startTime) / 1000 : 0;
             
             switch (currentStage) {
@@ -115,7 +120,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // 자음 체크 중인 경우
         if (currentStage === 'CONSONANT_CHECK') {
-            const currentTime = Date.now();
+            const currentTime = performance.now();
             const elapsedTime = consonantCheckStartTime > 0 ? (currentTime - consonantCheckStartTime) / 1000 : 0;
             userResults.consonant_check_terminated = true;
             userResults.consonant_check_time = parseFloat(elapsedTime.toFixed(2));
@@ -135,7 +140,9 @@ document.addEventListener('DOMContentLoaded', function() {
             this.startTime = 0;
             this.lastClickedCircle = null;
             this.circles = [];
+            this.phase = currentStage;
             this.init();
+            telemetry.record('phase_start', { phase: this.phase, n: items.length });
         }
 
         init() {
@@ -191,10 +198,18 @@ document.addEventListener('DOMContentLoaded', function() {
 
             const clickedValue = e.target.dataset.value;
             const expectedValue = this.items[this.correctIndex];
+            const containerRect = this.container.getBoundingClientRect();
+            telemetry.record('click', {
+                phase: this.phase,
+                v: clickedValue,
+                x: Math.round(e.clientX - containerRect.left),
+                y: Math.round(e.clientY - containerRect.top),
+                ok: clickedValue == expectedValue
+            }, e.timeStamp);
             
             if (clickedValue == expectedValue) {
                 if (this.correctIndex === 0) {
-                    this.startTime = Date.now();
+                    this.startTime = performance.now();
                 }
 
                 e.target.classList.add('correct');
@@ -208,8 +223,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 this.correctIndex++;
                 
                 if (this.correctIndex === this.items.length) {
-                    const endTime = Date.now();
+                    const endTime = performance.now();
                     const duration = (endTime - this.startTime) / 1000;
+                    telemetry.record('phase_end', { phase: this.phase, status: 'completed' });
+                    telemetry.flush();
                     this.onComplete(duration, this.errorCount);
                 }
             } else {
@@ -265,13 +282,21 @@ document.addEventListener('DOMContentLoaded', function() {
             targetArea.appendChild(placeholder);
         }
 
-        consonantCheckStartTime = Date.now();
+        consonantCheckStartTime = performance.now();
+        telemetry.record('phase_start', { phase: 'CONSONANT_CHECK', n: KOREAN_CONSONANTS.length }, consonantCheckStartTime);
     }
 
     function handleConsonantClick(event) {
         const clickedBox = event.target;
         const clickedConsonant = clickedBox.dataset.value;
         const expectedConsonant = KOREAN_CONSONANTS[currentConsonantIndex];
+        telemetry.record('click', {
+            phase: 'CONSONANT_CHECK',
+            v: clickedConsonant,
+            x: Math.round(event.clientX),
+            y: Math.round(event.clientY),
+            ok: clickedConsonant === expectedConsonant
+        }, event.timeStamp);
 
         if (clickedConsonant === expectedConsonant) {
             const targetArea = document.getElementById('consonant-target-area');
@@ -286,9 +311,11 @@ document.addEventListener('DOMContentLoaded', function() {
             currentConsonantIndex++;
 
             if (currentConsonantIndex === KOREAN_CONSONANTS.length) {
-                const endTime = Date.now();
+                const endTime = performance.now();
                 userResults.consonant_check_time = parseFloat(((endTime - consonantCheckStartTime) / 1000).toFixed(2));
                 userResults.consonant_check_completed = true;
+                telemetry.record('phase_end', { phase: 'CONSONANT_CHECK', status: 'completed' });
+                telemetry.flush();
                 document.getElementById('start-test-b-practice-button').disabled = false;
             }
         } else {
@@ -368,13 +395,9 @@ document.addEventListener('DOMContentLoaded', function() {
         showScreen('loading-screen');
 
         try {
-            const response = await fetch('/save_trail_making_results', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(userResults),
-            });
+            // 결과를 저장할 때 서버가 이벤트 기록으로 소요 시간과 오류 수를 다시 계산하므로 남은 이벤트를 먼저 보낸다.
+            await telemetry.flush();
+            const response = await postWithRetry('/save_trail_making_results', telemetry.stamp(userResults));
             const data = await response.json();
             if (data.success && data.next_url) {
                 window.location.href = data.next_url;
@@ -0,0 +1,923 @@
+"""
+검사 결과 저장소
+
+참가자와 검사 결과를 instance/store/ 아래의 JSON Lines 파일에 한 줄씩 이어 붙여 저장합니다.
+- users.jsonl : 참가자 레코드 (한 줄에 한 명)
+- tests/ : 검사 결과 레코드 (한 줄에 검사 1회). 검사 일시의 월별 세그먼트 파일(2024-05.jsonl)에 나눠 저장하고,
+  오래된 해의 월별 세그먼트는 compact()로 연도별 파일(2023.jsonl)에 시간순으로 합칩니다.
+  세그먼트 목록과 각 세그먼트가 담는 기간은 tests/manifest.json에 있습니다.
+- summaries.jsonl : 일괄 재채점 등으로 나중에 계산한 버전별 요약 (한 줄에 검사 1회 x 버전 1개)
+- tests.jsonl : 세그먼트로 나누기 전의 단일 파일. 있으면 함께 읽고, compact()가 세그먼트로 옮깁니다.
+- tests/archive/ : archive()가 오래된 세그먼트를 옮겨 둔 연도별 압축 보관 세그먼트 (형식은 archive.py).
+  인덱스에는 상세 시행 데이터를 뺀 요약(digest)만 올리고, 본문은 상세 보기·내보내기에서 필요할 때 묶음 단위로 풀어 읽습니다.
+- tests/checkpoint.json : 구독자(검사 통계, 참가자 요약)의 누적 상태와 그 상태가 반영한 세그먼트별 위치.
+  인덱스를 처음부터 만들 때 세그먼트가 그 뒤로 덧붙이기만 했으면 상태를 되살리고 그 이후의 레코드만 구독자에게 전달합니다.
+
+결과 하나를 저장할 때는 해당 세그먼트에 레코드 한 줄만 추가하므로 저장 비용이 전체 기록 크기와 무관하고,
+서로 다른 세그먼트에 쓰는 워커끼리는 잠금을 다투지 않습니다. 날짜 조건이 있는 조회와 내보내기는
+기간이 겹치는 세그먼트만 읽습니다. 참가자 조회는 메모리 인덱스로, 검사 본문은 파일 오프셋으로 필요할 때만 읽습니다.
+
+여러 gunicorn 워커가 같은 파일에 쓰므로 추가 쓰기는 파일 잠금(flock) 안에서 한 번에 이루어지고,
+잠금은 한 줄을 쓰는 동안만 유지됩니다. 읽는 쪽은 줄바꿈으로 끝난 완전한 줄만 인덱스에 반영합니다.
+세그먼트에 쓰는 동안에는 manifest.lock의 공유 잠금을 쥐고, 세그먼트를 합치거나 다시 쓰는 작업은
+배타 잠금을 쥐므로 쓰는 도중에 파일이 바뀌지 않습니다.
+
+gevent 워커(gunicorn.conf.py의 GUNICORN_WORKER_CLASS=gevent)에서는 한 프로세스 안의 여러 요청이 번갈아 돌므로,
+파일 잠금과 fsync를 기다리는 동안 같은 워커의 다른 요청이 돌게 합니다. (cooperative.py)
+
+워커마다 인덱스와 파싱된 레코드를 메모리에 캐시합니다. 요청마다 파일의 (inode, 크기, mtime)만
+확인해서 바뀌지 않았으면 파일을 열지 않고, 늘어났으면 새 줄만 읽고, 교체되었으면 처음부터 다시 읽습니다.
+"""
+import heapq
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import namedtuple, OrderedDict
+from contextlib import contextmanager
+from datetime import date
+
+import cooperative
+from archive import ARCHIVE_DIR, BLOCK_RECORDS, ArchiveSegment
+from metrics import registry as metrics
+from participants import ParticipantIndex, new_participant
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 단일 프로세스 개발 서버에서는 프로세스 간 잠금이 필요 없음
+    fcntl = None
+
+# 검사 레코드 인덱스 항목: 본문은 segment 파일의 offset 위치에서 length 바이트만큼 읽는다.
+# 보관 세그먼트의 레코드는 offset/length가 압축 묶음의 위치와 크기이고, item이 묶음 안의 줄 번호이다.
+TestEntry = namedtuple('TestEntry', 'test_id user_id test_type timestamp offset length segment item',
+                       defaults=(None, None))
+
+SEGMENT_DIR = 'tests'
+UNDATED = 'undated'      # 검사 일시가 없거나 읽을 수 없는 레코드의 세그먼트
+LEGACY = 'legacy'        # 세그먼트로 나누기 전의 tests.jsonl
+ARCHIVE_PREFIX = 'archive:'   # 보관 세그먼트 이름 앞머리 ('archive:2023')
+_MONTH = re.compile(r'\d{4}-\d{2}')
+# 구독자 체크포인트를 새로 쓰기까지 구독자에게 전달한 레코드 수
+CHECKPOINT_EVERY = 2000
+
+
+def segment_key(timestamp):
+    """검사 일시가 속한 월별 세그먼트 이름 ('2024-05')"""
+    month = (timestamp or '')[:7]
+    return month if _MONTH.fullmatch(month) else UNDATED
+
+
+def _segment_meta(key, compacted=False, records=None):
+    """매니페스트 항목. from/to는 세그먼트가 담는 날짜 범위('YYYY-MM-DD')이며 비교는 문자열로 합니다."""
+    if key in (UNDATED, LEGACY):
+        first = last = None
+    elif len(key) == 4:
+        first, last = f"{key}-01-01", f"{key}-12-31"
+    else:
+        first, last = f"{key}-01", f"{key}-31"
+    return {"file": f"{key}.jsonl", "from": first, "to": last, "compacted": compacted, "records": records}
+
+
+def _archive_meta(year, records):
+    return {"file": f"{ARCHIVE_DIR}/{year}.jsonl.gz", "index": f"{ARCHIVE_DIR}/{year}.idx.jsonl",
+            "from": f"{year}-01-01", "to": f"{year}-12-31", "compacted": True, "archived": True, "records": records}
+
+
+def _is_archive(key):
+    return key.startswith(ARCHIVE_PREFIX)
+
+
+def _overlaps(meta, date_from, date_to):
+    if meta['from'] is None:
+        return True
+    return not ((date_from and meta['to'] < date_from) or (date_to and meta['from'] > date_to))
+
+
+def _timestamp_of(record):
+    return record.get('timestamp') or ''
+
+
+def _dump_line(record):
+    return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def _file_state(path):
+    """파일 변경 감지용 (inode, 크기, mtime). 파일이 없으면 None"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class RecordCache:
+    """크기가 제한된 LRU 캐시"""
+
+    def __init__(self, max_size, stats):
+        self.max_size = max_size
+        self.stats = stats
+        self._items = OrderedDict()
+
+    def get(self, key):
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.stats['hits'] += 1
+            return self._items[key]
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _observe_io(op, path, seconds, nbytes):
+    # 세그먼트 파일은 달마다 늘어나므로 레이블을 하나로 묶는다.
+    directory = os.path.basename(os.path.dirname(path))
+    name = directory if directory in (SEGMENT_DIR, ARCHIVE_DIR) else os.path.basename(path)
+    metrics.observe('store_io_seconds', seconds, op=op, file=name)
+    metrics.observe('store_io_bytes', nbytes, op=op, file=name)
+
+
+@contextmanager
+def _locked(f, shared=False):
+    """열린 파일에 배타적(shared=True면 공유) 잠금을 겁니다."""
+    if fcntl is not None:
+        cooperative.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+    try:
+        yield f
+    finally:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def subscriber_states(subscribers):
+    """구독자들의 누적 상태 {checkpoint_name: state}. 상태를 저장할 수 없는 구독자가 있으면 None"""
+    if not subscribers or not all(hasattr(subscriber, 'state') for subscriber in subscribers):
+        return None
+    return {subscriber.checkpoint_name: subscriber.state() for subscriber in subscribers}
+
+
+def restore_subscribers(subscribers, states):
+    """
+    subscriber_states()로 저장한 상태를 되살리고 True를 돌려줍니다.
+
+    되살리지 못한 구독자가 있으면 모두 처음 상태로 되돌리고 False를 돌려줍니다.
+    """
+    if subscriber_states(subscribers) is None:
+        return False
+    try:
+        for subscriber in subscribers:
+            subscriber.load_state(states[subscriber.checkpoint_name])
+    except (KeyError, TypeError, ValueError, AttributeError):
+        for subscriber in subscribers:
+            subscriber.reset()
+        return False
+    return True
+
+
+class ResultStore:
+    """append-only 검사 결과 저장소"""
+
+    def __init__(self, root, fsync=True, cache_size=2048, block_cache_size=16, checkpoint_every=CHECKPOINT_EVERY):
+        self.root = root
+        self.fsync = fsync
+        self.users_path = os.path.join(root, 'users.jsonl')
+        self.tests_path = os.path.join(root, 'tests.jsonl')          # 세그먼트 이전 형식 (읽기 전용)
+        self.segments_dir = os.path.join(root, SEGMENT_DIR)
+        self.manifest_path = os.path.join(self.segments_dir, 'manifest.json')
+        self.summaries_path = os.path.join(root, 'summaries.jsonl')
+        self.archive_dir = os.path.join(self.segments_dir, ARCHIVE_DIR)
+        self.checkpoint_path = os.path.join(self.segments_dir, 'checkpoint.json')
+        self.checkpoint_every = checkpoint_every
+        self._lock = threading.RLock()   # 같은 프로세스 안의 스레드끼리 인덱스 갱신을 보호
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "reloads": 0, "full_reloads": 0}
+        self._records = RecordCache(cache_size, self.stats)   # test_id -> 파싱된 레코드
+        self.block_stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._blocks = RecordCache(block_cache_size, self.block_stats)   # (세그먼트, 위치) -> 푼 묶음의 줄 목록
+        self._manifest = (None, {})      # (manifest.json 파일 상태, {세그먼트: 항목})
+        self._subscribers = []
+        self._reset_index()
+
+    def _reset_index(self):
+        self.participants = ParticipantIndex()
+        self._tests = {}            # test_id -> TestEntry
+        self._tests_by_user = {}    # user_id -> [test_id, ...] (저장 순서)
+        self._segments = {}         # 세그먼트 -> 매니페스트 항목 (인덱스에 반영한 것)
+        self._segment_tests = {}    # 세그먼트 -> [test_id, ...]
+        self._segment_sorted = {}   # 세그먼트 -> test_id 목록이 timestamp 오름차순인지
+        self._summaries = {}        # test_id -> {version: 요약 레코드}
+        self._offsets = {}          # 파일 경로 -> 읽은 위치
+        self._seen = {}             # 파일 경로 -> 마지막으로 반영한 파일 상태
+        self._covered = {}          # 세그먼트 파일 경로 -> 되살린 체크포인트가 이미 반영한 위치
+        self._uncheckpointed = 0    # 마지막 체크포인트 뒤로 구독자에게 전달한 레코드 수
+        self._records.clear()
+        self._blocks.clear()
+        self.generation = getattr(self, 'generation', 0) + 1
+        for subscriber in self._subscribers:
+            subscriber.reset()
+
+    def subscribe(self, subscriber):
+        """인덱스에 새 검사 레코드가 반영될 때마다 subscriber.add(record, participant)를 호출합니다.
+
+        인덱스를 처음부터 다시 만들 때는 subscriber.reset()이 먼저 호출됩니다.
+        이미 반영된 레코드는 등록 시점에 한 번씩 전달하지 않으므로, 첫 refresh() 전에 등록해야 합니다.
+
+        구독자가 checkpoint_name, state(), load_state(state)를 가지면 체크포인트로 상태를 저장하고 되살립니다.
+        하나라도 없으면 체크포인트를 쓰지 않고 인덱스를 만들 때마다 모든 레코드를 전달합니다.
+        """
+        self._subscribers.append(subscriber)
+
+    # --- 파일 읽기 ---
+    def _read_new_lines(self, path, offset):
+        """offset 이후에 추가된 완전한 줄을 (시작 위치, 레코드) 목록으로 읽습니다.
+
+        아직 쓰는 중인 마지막 줄(줄바꿈 없음)은 다음 갱신 때 읽습니다.
+        """
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            # 세그먼트를 합친 뒤 지운 파일이다. 다음 갱신 때 매니페스트를 보고 인덱스를 다시 만든다.
+            return [], offset
+        lines = []
+        start, start_offset = time.perf_counter(), offset
+        with f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                try:
+                    lines.append((offset, len(raw), json.loads(raw)))
+                except ValueError:
+                    # 쓰기 도중 중단되어 잘린 줄은 건너뛴다.
+                    print(f"손상된 레코드를 건너뜁니다: {path} @ {offset}")
+                offset += len(raw)
+        if offset > start_offset:
+            _observe_io('load', path, time.perf_counter() - start, offset - start_offset)
+        return lines, offset
+
+    @staticmethod
+    def _replaced(seen, current):
+        """파일이 통째로 교체되었거나(다른 inode) 줄어들었는지 확인합니다."""
+        return seen is not None and (current is None or current[0] != seen[0] or current[1] < seen[1])
+
+    def refresh(self):
+        """다른 워커에서 추가된 레코드를 인덱스에 반영합니다."""
+        with self._lock:
+            segments = self._all_segments()
+            paths = [self.users_path, self.summaries_path] + [self._segment_path(key) for key in segments]
+            current = {path: _file_state(path) for path in paths}
+            if current == self._seen:
+                return
+            if any(self._replaced(seen, current.get(path)) for path, seen in self._seen.items()):
+                self._reset_index()
+                self.stats['full_reloads'] += 1
+            else:
+                self.stats['reloads'] += 1
+            if not self._seen:
+                self._restore_checkpoint(segments, current)
+            lines, self._offsets[self.users_path] = self._read_new_lines(
+                self.users_path, self._offsets.get(self.users_path, 0))
+            for _, _, user in lines:
+                self._index_user(user)
+            for key in segments:
+                path = self._segment_path(key)
+                lines, self._offsets[path] = self._read_new_lines(path, self._offsets.get(path, 0))
+                covered = self._covered.get(path, 0)
+                if _is_archive(key):
+                    # 보관 세그먼트는 색인 파일의 요약만 읽는다.
+                    for offset, _, line in lines:
+                        self._index_test(key, line['digest'], line['block'], line['size'], line['item'],
+                                         notify=offset >= covered)
+                    continue
+                for offset, length, record in lines:
+                    self._index_test(key, record, offset, length, notify=offset >= covered)
+            lines, self._offsets[self.summaries_path] = self._read_new_lines(
+                self.summaries_path, self._offsets.get(self.summaries_path, 0))
+            for _, _, summary in lines:
+                self._summaries.setdefault(summary['test_id'], {})[summary['version']] = summary
+            self._segments = segments
+            self._seen = current
+            self.generation += 1
+            if self._uncheckpointed >= self.checkpoint_every:
+                self.save_checkpoint()
+
+    def _restore_checkpoint(self, segments, current):
+        """
+        인덱스를 처음부터 만들기 전에 체크포인트로 구독자 상태를 되살립니다.
+
+        체크포인트가 가리키는 세그먼트 파일이 모두 그대로(같은 inode, 그 위치 이상의 크기) 있을 때만 되살리고,
+        파일별로 그 위치 앞의 레코드는 인덱스에만 올리고 구독자에게는 다시 전달하지 않습니다.
+        세그먼트를 합치거나 다시 쓴 뒤라면 체크포인트를 버리고 모든 레코드를 전달합니다.
+        """
+        if not self._subscribers:
+            return
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            files = {os.path.join(self.root, name): (inode, offset)
+                     for name, (inode, offset) in checkpoint['files'].items()}
+            states = checkpoint['subscribers']
+        except FileNotFoundError:
+            return
+        except (ValueError, KeyError, TypeError):
+            print(f"읽을 수 없는 체크포인트를 버립니다: {self.checkpoint_path}")
+            return
+        paths = {self._segment_path(key) for key in segments}
+        for path, (inode, offset) in files.items():
+            state = current.get(path)
+            if path not in paths or state is None or state[0] != inode or state[1] < offset:
+                return
+        if restore_subscribers(self._subscribers, states):
+            self._covered = {path: offset for path, (_, offset) in files.items()}
+
+    def save_checkpoint(self):
+        """
+        구독자 상태를 지금까지 인덱스에 반영한 세그먼트별 위치와 함께 tests/checkpoint.json에 씁니다.
+
+        마지막 체크포인트 뒤로 전달한 레코드가 없으면 쓰지 않습니다. 워커마다 따로 쓰지만
+        어느 워커의 것이든 그 위치까지의 상태는 같으므로 마지막에 쓴 것이 남아도 됩니다.
+        """
+        with self._lock:
+            if not self._uncheckpointed:
+                return
+            states = subscriber_states(self._subscribers)
+            if states is None:
+                return
+            files = {}
+            for key in self._segments:
+                path = self._segment_path(key)
+                if self._seen.get(path) is not None:
+                    files[os.path.relpath(path, self.root)] = [self._seen[path][0], self._offsets.get(path, 0)]
+            os.makedirs(self.segments_dir, exist_ok=True)
+            tmp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+            start = time.perf_counter()
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "files": files, "subscribers": states}, f, ensure_ascii=False)
+                nbytes = f.tell()
+            os.replace(tmp_path, self.checkpoint_path)
+            metrics.observe('store_io_seconds', time.perf_counter() - start, op='save', file='checkpoint')
+            metrics.observe('store_io_bytes', nbytes, op='save', file='checkpoint')
+            self._uncheckpointed = 0
+
+    def _index_user(self, user):
+        self.participants.add(user)
+
+    def _index_test(self, segment, record, offset, length, item=None, notify=True):
+        if record['id'] in self._tests:
+            # 세그먼트를 합치거나 보관하는 도중에는 같은 레코드가 두 파일에 있을 수 있다. 처음 읽은 것만 쓴다.
+            return
+        entry = TestEntry(record['id'], record['user_id'], record.get('test_type'),
+                          record.get('timestamp'), offset, length, segment, item)
+        self._tests[entry.test_id] = entry
+        self._tests_by_user.setdefault(entry.user_id, []).append(entry.test_id)
+        order = self._segment_tests.setdefault(segment, [])
+        if order and (entry.timestamp or '') < (self._tests[order[-1]].timestamp or ''):
+            # 가져오기 등으로 시간 순서가 어긋난 경우에만 다음 조회 때 다시 정렬한다.
+            self._segment_sorted[segment] = False
+        order.append(entry.test_id)
+        if self._subscribers and notify:
+            participant = self.participants.get(entry.user_id)
+            for subscriber in self._subscribers:
+                subscriber.add(record, participant)
+            self._uncheckpointed += 1
+
+    # --- 세그먼트 ---
+    def _segment_path(self, key):
+        """세그먼트 파일 경로. 보관 세그먼트는 인덱스를 만들 때 읽는 색인 파일 경로입니다."""
+        if key == LEGACY:
+            return self.tests_path
+        if _is_archive(key):
+            return self._archive_segment(key).index_path
+        return os.path.join(self.segments_dir, f"{key}.jsonl")
+
+    def _archive_segment(self, key):
+        return ArchiveSegment(self.archive_dir, key[len(ARCHIVE_PREFIX):], fsync=self.fsync)
+
+    def _read_manifest(self):
+        """매니페스트를 읽습니다. 파일이 바뀌지 않았으면 이전에 읽은 내용을 돌려줍니다."""
+        with self._lock:
+            state = _file_state(self.manifest_path)
+            if state != self._manifest[0]:
+                segments = {}
+                if state is not None:
+                    with open(self.manifest_path, encoding='utf-8') as f:
+                        segments = json.load(f)['segments']
+                self._manifest = (state, segments)
+            return self._manifest[1]
+
+    def _write_manifest(self, segments):
+        """매니페스트를 원자적으로 교체합니다. 배타 잠금을 쥔 상태에서 호출합니다."""
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "segments": dict(sorted(segments.items()))}, f, ensure_ascii=False, indent=1)
+            f.flush()
+            if self.fsync:
+                cooperative.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def _all_segments(self):
+        """읽을 세그먼트 목록. 이전 형식 tests.jsonl이 있으면 맨 앞에 넣습니다."""
+        segments = {}
+        if os.path.exists(self.tests_path):
+            segments[LEGACY] = _segment_meta(LEGACY)
+        segments.update(self._read_manifest())
+        return segments
+
+    @staticmethod
+    def _route(month, segments):
+        """month 세그먼트의 레코드를 쓸 세그먼트. 연도 파일로 합쳐진 달이면 연도 세그먼트, 없으면 None"""
+        if month in segments:
+            return month
+        if month != UNDATED and month[:4] in segments:
+            return month[:4]
+        return None
+
+    @contextmanager
+    def _segments_locked(self, shared):
+        """세그먼트 쓰기(공유)와 세그먼트 합치기·다시 쓰기(배타)를 서로 막는 잠금"""
+        os.makedirs(self.segments_dir, exist_ok=True)
+        with open(os.path.join(self.segments_dir, 'manifest.lock'), 'ab') as f, _locked(f, shared=shared):
+            yield
+
+    def _add_segments(self, months):
+        """아직 없는 월별 세그먼트를 매니페스트에 추가합니다."""
+        with self._segments_locked(shared=False):
+            segments = dict(self._read_manifest())
+            added = [month for month in months if self._route(month, segments) is None]
+            for month in added:
+                segments[month] = _segment_meta(month)
+                open(self._segment_path(month), 'ab').close()
+            if added:
+                self._write_manifest(segments)
+
+    def _write_records(self, records, dedupe):
+        """레코드를 검사 일시에 맞는 세그먼트에 나눠 씁니다. dedupe면 이미 저장된 id는 건너뜁니다.
+
+        세그먼트마다 그 파일만 잠그고 쓰며, 새로 저장한 레코드 목록을 돌려줍니다.
+        """
+        by_month = OrderedDict()
+        for record in records:
+            by_month.setdefault(segment_key(record.get('timestamp')), []).append(record)
+        while True:
+            missing = [month for month in by_month if self._route(month, self._read_manifest()) is None]
+            if missing:
+                self._add_segments(missing)
+            with self._segments_locked(shared=True):
+                segments = self._read_manifest()
+                by_segment = OrderedDict()
+                for month, month_records in by_month.items():
+                    by_segment.setdefault(self._route(month, segments), []).extend(month_records)
+                if None in by_segment:
+                    continue   # 그 사이에 세그먼트가 바뀌었다. 다시 고른다.
+                new, written = [], []
+                for key, segment_records in by_segment.items():
+                    path = self._segment_path(key)
+                    with open(path, 'ab') as f, _locked(f):
+                        if dedupe:
+                            # 잠금을 쥔 상태에서 인덱스를 갱신하므로 다른 워커가 같은 id를 먼저 썼는지 확인할 수 있다.
+                            self.refresh()
+                            fresh, seen = [], set()
+                            for record in segment_records:
+                                if record['id'] not in self._tests and record['id'] not in seen:
+                                    seen.add(record['id'])
+                                    fresh.append(record)
+                            segment_records = fresh
+                        if segment_records:
+                            self._write_line(f, b''.join(_dump_line(record) for record in segment_records))
+                            new.extend(segment_records)
+                            written.append(path)
+            break
+        if self.fsync:
+            # 잠금을 푼 뒤에 디스크로 내보내므로 다른 워커의 쓰기를 붙잡지 않는다.
+            for path in written:
+                start = time.perf_counter()
+                with open(path, 'ab') as f:
+                    cooperative.fsync(f.fileno())
+                metrics.observe('store_io_seconds', time.perf_counter() - start, op='fsync', file=SEGMENT_DIR)
+        with self._lock:
+            for record in new:
+                self._records.put(record['id'], record)
+        return new
+
+    @staticmethod
+    def _read_records(path):
+        """파일의 완전한 레코드를 모두 읽습니다. 잘린 줄은 건너뜁니다."""
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                try:
+                    yield json.loads(raw)
+                except ValueError:
+                    continue
+
+    def compact(self, keep_months=3, today=None):
+        """
+        keep_months개월보다 오래된 해(1~12월 전체가 지난 해)의 월별 세그먼트를 연도별 파일 하나로 합칩니다.
+
+        합친 파일은 검사 일시 순으로 정렬되고 중복 id와 잘린 줄이 없으므로 기간 조회·내보내기가 파일을
+        순서대로 한 번만 읽습니다. 이전 형식 tests.jsonl이 있으면 세그먼트로 옮긴 뒤 tests.jsonl.migrated로 이름을 바꿉니다.
+        합치는 동안에는 결과 저장이 잠시 기다립니다. {"rolled_up": {연도: 레코드 수}, ...}를 돌려줍니다.
+        """
+        today = today or date.today()
+        year, month = today.year, today.month - keep_months
+        while month <= 0:
+            year, month = year - 1, month + 12
+        closed_before = f"{year:04d}"   # 이 해 이전의 해는 모두 보관 기간이 지났다
+        with self._segments_locked(shared=False):
+            segments = dict(self._read_manifest())
+            sources = [key for key in segments if len(key) == 7 and key[:4] < closed_before]
+            migrate_legacy = os.path.exists(self.tests_path)
+            bytes_before = bytes_after = 0
+            by_year, others = {}, OrderedDict()
+            for key in ([LEGACY] if migrate_legacy else []) + sources:
+                path = self._segment_path(key)
+                bytes_before += os.path.getsize(path)
+                for record in self._read_records(path):
+                    month_key = segment_key(record.get('timestamp'))
+                    if month_key != UNDATED and month_key[:4] < closed_before:
+                        by_year.setdefault(month_key[:4], []).append(record)
+                    else:
+                        others.setdefault(month_key, []).append(record)
+            rolled_up = {}
+            for year_key, records in sorted(by_year.items()):
+                path = self._segment_path(year_key)
+                existing = []
+                if year_key in segments:
+                    bytes_before += os.path.getsize(path)
+                    existing = list(self._read_records(path))
+                merged, seen = [], set()
+                for record in existing + records:
+                    if record['id'] not in seen:
+                        seen.add(record['id'])
+                        merged.append(record)
+                merged.sort(key=_timestamp_of)
+                tmp_path = path + '.compact'
+                with open(tmp_path, 'wb') as f:
+                    for record in merged:
+                        f.write(_dump_line(record))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    bytes_after += f.tell()
+                os.replace(tmp_path, path)
+                segments[year_key] = _segment_meta(year_key, compacted=True, records=len(merged))
+                rolled_up[year_key] = len(merged)
+            # 이전 형식 파일에 있던 최근 레코드는 월별 세그먼트 끝에 붙인다.
+            for month_key, records in others.items():
+                key = self._route(month_key, segments)
+                if key is None:
+                    key = month_key
+                    segments[key] = _segment_meta(key)
+                path = self._segment_path(key)
+                with open(path, 'ab') as f, _locked(f):
+                    self._write_line(f, b''.join(_dump_line(record) for record in records))
+                    os.fsync(f.fileno())
+            for key in sources:
+                del segments[key]
+            self._write_manifest(segments)
+            for key in sources:
+                os.remove(self._segment_path(key))
+            if migrate_legacy:
+                os.replace(self.tests_path, self.tests_path + '.migrated')
+        self.refresh()
+        return {"rolled_up": rolled_up, "removed_segments": sources, "migrated_legacy": migrate_legacy,
+                "bytes_before": bytes_before, "bytes_after": bytes_after}
+
+    def segment_stats(self):
+        """세그먼트별 매니페스트 항목, 인덱스에 반영된 검사 수, 파일 크기"""
+        self.refresh()
+        with self._lock:
+            stats = {}
+            for key, meta in self._segments.items():
+                paths = [self._segment_path(key)]
+                if _is_archive(key):
+                    paths.append(self._archive_segment(key).path)
+                stats[key] = dict(meta, indexed=len(self._segment_tests.get(key, [])),
+                                  bytes=sum((_file_state(path) or (0, 0))[1] for path in paths))
+            return stats
+
+    def archive(self, older_than_months=12, today=None, max_segments=None, block_records=BLOCK_RECORDS):
+        """
+        검사 일시가 older_than_months개월보다 오래된 세그먼트를 연도별 압축 보관 세그먼트로 옮깁니다.
+
+        세그먼트를 하나씩 옮깁니다. 레코드를 읽어 압축해 쓰는 동안에는 잠금을 쥐지 않아 결과 저장을 막지 않고,
+        세그먼트를 매니페스트에서 빼는 짧은 동안만 배타 잠금을 쥐며 그 사이 늦게 들어온 줄도 함께 옮깁니다.
+        max_segments를 주면 그만큼만 옮기고 멈춥니다. 중간에 멈췄더라도 다시 실행하면 이미 옮긴 레코드는 건너뛰고 이어서 옮깁니다.
+        {"archived": {세그먼트: 레코드 수}, "remaining": 남은 대상 세그먼트 수, "bytes_before", "bytes_after"}를 돌려줍니다.
+        """
+        today = today or date.today()
+        year, month = today.year, today.month - older_than_months
+        while month <= 0:
+            year, month = year - 1, month + 12
+        cutoff = f"{year:04d}-{month:02d}-01"
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archived, archived_ids = {}, {}   # 연도 -> 보관 세그먼트에 있는 id
+        bytes_before = bytes_after = 0
+        # 보관 작업끼리만 막는 잠금. 결과 저장과는 다투지 않는다.
+        with open(os.path.join(self.archive_dir, 'archive.lock'), 'ab') as lock_file, _locked(lock_file):
+            segments = self._all_segments()
+            sources = sorted(key for key, meta in segments.items()
+                             if key not in (LEGACY, UNDATED) and not meta.get('archived') and meta['to'] < cutoff)
+            selected = sources if max_segments is None else sources[:max_segments]
+            for key in selected:
+                path = self._segment_path(key)
+                lines, offset = self._read_new_lines(path, 0)
+                count, written = self._archive_records(key, [record for _, _, record in lines],
+                                                       archived_ids, block_records)
+                with self._segments_locked(shared=False):
+                    late, _ = self._read_new_lines(path, offset)
+                    late_count, late_written = self._archive_records(key, [record for _, _, record in late],
+                                                                     archived_ids, block_records)
+                    manifest = dict(self._read_manifest())
+                    manifest.pop(key, None)
+                    for year_key, ids in archived_ids.items():
+                        manifest[ARCHIVE_PREFIX + year_key] = _archive_meta(year_key, len(ids))
+                    self._write_manifest(manifest)
+                    bytes_before += os.path.getsize(path)
+                    os.remove(path)
+                archived[key] = count + late_count
+                bytes_after += written + late_written
+        self.refresh()
+        return {"archived": archived, "remaining": len(sources) - len(selected),
+                "bytes_before": bytes_before, "bytes_after": bytes_after}
+
+    def _archive_records(self, key, records, archived_ids, block_records):
+        """세그먼트 key의 레코드를 검사 일시 순으로 연도별 보관 세그먼트에 덧붙입니다. (옮긴 수, 압축 크기)"""
+        by_year = {}
+        for record in records:
+            month = segment_key(record.get('timestamp'))
+            by_year.setdefault(key[:4] if month == UNDATED else month[:4], []).append(record)
+        count = written = 0
+        for year_key, year_records in sorted(by_year.items()):
+            segment = self._archive_segment(ARCHIVE_PREFIX + year_key)
+            ids = archived_ids.get(year_key)
+            if ids is None:
+                ids = archived_ids[year_key] = segment.ids()
+            fresh = []
+            for record in sorted(year_records, key=_timestamp_of):
+                if record['id'] not in ids:
+                    ids.add(record['id'])
+                    fresh.append(record)
+            written += segment.append(fresh, block_records)
+            count += len(fresh)
+        return count, written
+
+    @contextmanager
+    def _open_for_append(self, path):
+        os.makedirs(self.root, exist_ok=True)
+        while True:
+            with open(path, 'ab') as f, _locked(f):
+                # 잠금을 기다리는 동안 파일이 교체되었다면 새 파일을 다시 연다.
+                if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                    continue
+                yield f
+                break
+        if self.fsync:
+            # 잠금을 푼 뒤에 디스크로 내보내므로 다른 워커의 쓰기를 붙잡지 않는다.
+            start = time.perf_counter()
+            with open(path, 'ab') as f:
+                cooperative.fsync(f.fileno())
+            metrics.observe('store_io_seconds', time.perf_counter() - start, op='fsync', file=os.path.basename(path))
+
+    @staticmethod
+    def _write_line(f, line):
+        """잠금을 쥔 상태에서 파일 끝에 한 줄을 씁니다."""
+        start = time.perf_counter()
+        end = f.seek(0, os.SEEK_END)
+        if end:
+            # 이전 쓰기가 중간에 끊겼다면 잘린 줄을 닫아 새 레코드와 섞이지 않게 한다.
+            with open(f.name, 'rb') as r:
+                r.seek(end - 1)
+                if r.read(1) != b'\n':
+                    f.write(b'\n')
+        f.write(line)
+        f.flush()
+        _observe_io('save', f.name, time.perf_counter() - start, len(line))
+
+    def _append_many(self, path, records):
+        """여러 레코드를 한 번의 잠금으로 파일 끝에 추가합니다."""
+        with self._open_for_append(path) as f:
+            self._write_line(f, b''.join(_dump_line(record) for record in records))
+
+    def rewrite_tests(self, transform):
+        """
+        모든 세그먼트의 레코드를 transform(record)의 결과로 바꿔 새 파일에 쓴 뒤 세그먼트마다 원자적으로 교체합니다.
+
+        교체하는 동안 세그먼트 배타 잠금을 쥐고 있으므로 그 사이의 결과 저장은 잠시 기다렸다가 새 파일에 추가됩니다.
+        다른 워커는 파일 교체(inode 변경)를 감지해 인덱스를 다시 만듭니다. (이전 크기, 새 크기)를 돌려줍니다.
+        보관 세그먼트는 덧붙이기만 하므로 바꾸지 않습니다. 형식 변환은 보관하기 전에 합니다.
+        """
+        before = after = 0
+        with self._segments_locked(shared=False):
+            for key in self._all_segments():
+                if _is_archive(key):
+                    continue
+                path = self._segment_path(key)
+                tmp_path = path + '.rewrite'
+                before += os.path.getsize(path)
+                with open(tmp_path, 'wb') as dst:
+                    # 잘린 줄은 새 파일로 옮기지 않는다.
+                    for record in self._read_records(path):
+                        dst.write(_dump_line(transform(record)))
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                    after += dst.tell()
+                os.replace(tmp_path, path)
+        self.refresh()
+        return before, after
+
+    # --- 참가자 ---
+    def find_user(self, name, age):
+        self.refresh()
+        return self.participants.lookup(name, age)
+
+    def add_user(self, name, age, gender):
+        """참가자를 등록합니다. 다른 워커가 먼저 등록했다면 그 레코드를 돌려줍니다."""
+        with self._open_for_append(self.users_path) as f:
+            existing = self.find_user(name, age)
+            if existing is not None:
+                return existing
+            user = new_participant(name, age, gender)
+            self._write_line(f, _dump_line(user))
+        self.refresh()
+        return user
+
+    def get_user(self, user_id):
+        self.refresh()
+        return self.participants.get(user_id)
+
+    def users(self):
+        self.refresh()
+        return list(self.participants)
+
+    # --- 검사 결과 ---
+    def append_test(self, user_id, test_type, timestamp, **fields):
+        """검사 결과 한 건을 저장합니다."""
+        record = {"id": uuid.uuid4().hex, "user_id": user_id,
+                  "test_type": test_type, "timestamp": timestamp}
+        record.update(fields)
+        self._write_records([record], dedupe=False)
+        return record
+
+    def append_tests(self, records):
+        """
+        id가 정해진 검사 레코드 여러 건을 한 번의 잠금으로 저장합니다. 이미 저장된 id는 건너뜁니다.
+
+        수집 대기열(ingest.py)이 저널을 다시 처리해도 같은 결과가 두 번 저장되지 않습니다.
+        새로 저장한 레코드 목록을 돌려줍니다.
+        """
+        return self._write_records(records, dedupe=True)
+
+    def _read_test(self, entry, cache=True):
+        with self._lock:
+            record = self._records.get(entry.test_id) if cache else None
+            if record is None and entry.item is not None:
+                record = json.loads(self._read_block(entry)[entry.item])
+                if cache:
+                    self._records.put(entry.test_id, record)
+            elif record is None:
+                path = self._segment_path(entry.segment)
+                start = time.perf_counter()
+                with open(path, 'rb') as f:
+                    f.seek(entry.offset)
+                    record = json.loads(f.read(entry.length))
+                _observe_io('load', path, time.perf_counter() - start, entry.length)
+                if cache:
+                    self._records.put(entry.test_id, record)
+            return record
+
+    def _read_block(self, entry):
+        """보관 세그먼트의 압축 묶음을 풀어 줄 목록으로 돌려줍니다. 잠금을 쥔 상태에서 호출합니다."""
+        key = (entry.segment, entry.offset)
+        lines = self._blocks.get(key)
+        if lines is None:
+            segment = self._archive_segment(entry.segment)
+            start = time.perf_counter()
+            lines = segment.read_block(entry.offset, entry.length)
+            _observe_io('load', segment.path, time.perf_counter() - start, entry.length)
+            self._blocks.put(key, lines)
+        return lines
+
+    def get_test(self, test_id):
+        self.refresh()
+        entry = self._tests.get(test_id)
+        return self._read_test(entry) if entry else None
+
+    def append_summaries(self, summaries):
+        """버전별 요약 레코드({"test_id", "version", "summary", ...})를 한꺼번에 저장합니다."""
+        if summaries:
+            self._append_many(self.summaries_path, summaries)
+
+    def summaries(self, test_id):
+        """검사 한 건에 대해 저장된 버전별 요약 {version: 요약 레코드}"""
+        self.refresh()
+        return dict(self._summaries.get(test_id, {}))
+
+    def user_test_entries(self, user_id):
+        """참가자의 검사 인덱스 항목을 본문을 읽지 않고 돌려줍니다."""
+        self.refresh()
+        return [self._tests[test_id] for test_id in self._tests_by_user.get(user_id, [])]
+
+    def user_tests(self, user_id):
+        """참가자의 검사 결과를 저장 순서대로 돌려줍니다."""
+        self.refresh()
+        return [self._read_test(self._tests[test_id]) for test_id in self._tests_by_user.get(user_id, [])]
+
+    def _sorted_segment(self, key):
+        """세그먼트의 test_id 목록 (timestamp 오름차순). 잠금을 쥔 상태에서 호출합니다."""
+        order = self._segment_tests.get(key, [])
+        if not self._segment_sorted.get(key, True):
+            order.sort(key=lambda test_id: self._tests[test_id].timestamp or '')
+            self._segment_sorted[key] = True
+        return order
+
+    def _relevant_segments(self, date_from, date_to):
+        return [key for key, meta in self._segments.items() if _overlaps(meta, date_from, date_to)]
+
+    def query_tests(self, name=None, test_type=None, date_from=None, date_to=None, offset=0, limit=20):
+        """조건에 맞는 검사 인덱스 항목을 최신순으로 찾습니다. (전체 개수, 해당 페이지 항목)을 돌려줍니다.
+
+        기간이 겹치는 세그먼트의 인덱스만 훑고 본문은 읽지 않습니다. 날짜는 'YYYY-MM-DD' 문자열로 비교합니다.
+        """
+        self.refresh()
+        name = name.strip().lower() if name else None
+        with self._lock:
+            streams = [reversed(self._sorted_segment(key)) for key in self._relevant_segments(date_from, date_to)]
+            matches = []
+            for test_id in heapq.merge(*streams, key=lambda test_id: self._tests[test_id].timestamp or '',
+                                       reverse=True):
+                entry = self._tests[test_id]
+                day = (entry.timestamp or '')[:10]
+                if test_type and entry.test_type != test_type:
+                    continue
+                if date_from and day < date_from:
+                    continue
+                if date_to and day > date_to:
+                    continue
+                if name:
+                    participant = self.participants.get(entry.user_id) or {}
+                    if name not in str(participant.get('name', '')).lower():
+                        continue
+                matches.append(entry)
+        return len(matches), matches[offset:offset + limit]
+
+    def iter_tests(self, test_type=None, date_from=None, date_to=None):
+        """조건에 맞는 검사 레코드를 오래된 순으로 하나씩 읽어 돌려줍니다.
+
+        기간이 겹치는 세그먼트 파일만 읽습니다. 내보내기처럼 전체를 훑는 용도라 읽은 레코드는 캐시에 넣지 않습니다.
+        """
+        self.refresh()
+        with self._lock:
+            streams = [list(self._sorted_segment(key)) for key in self._relevant_segments(date_from, date_to)]
+            entries = [self._tests[test_id] for test_id in
+                       heapq.merge(*streams, key=lambda test_id: self._tests[test_id].timestamp or '')]
+        for entry in entries:
+            day = (entry.timestamp or '')[:10]
+            if test_type and entry.test_type != test_type:
+                continue
+            if (date_from and day < date_from) or (date_to and day > date_to):
+                continue
+            yield self._read_test(entry, cache=False)
+
+    def cache_stats(self):
+        """캐시 적중/실패/재적재 횟수와 현재 상태"""
+        with self._lock:
+            return dict(self.stats, generation=self.generation, cached_records=len(self._records),
+                        indexed_users=len(self.participants), indexed_tests=len(self._tests),
+                        segments=len(self._segments), archive_segments=sum(map(_is_archive, self._segments)),
+                        archive_block_hits=self.block_stats['hits'], archive_block_misses=self.block_stats['misses'],
+                        cached_blocks=len(self._blocks), uncheckpointed=self._uncheckpointed)
+
+    def is_empty(self):
+        self.refresh()
+        return not len(self.participants) and not self._tests
+
+    # --- 기존 database.json 형식 호환 ---
+    def import_legacy(self, data):
+        """기존 database.json 내용을 저장소로 옮깁니다. 가져온 (참가자 수, 검사 수)를 돌려줍니다."""
+        user_count = test_count = 0
+        for legacy_user in data.get('users', []):
+            user = self.find_user(legacy_user.get('name'), legacy_user.get('age'))
+            if user is None:
+                user = self.add_user(legacy_user.get('name'), legacy_user.get('age'),
+                                     legacy_user.get('gender', 'N/A'))
+                user_count += 1
+            for test in legacy_user.get('tests', []):
+                fields = {k: v for k, v in test.items() if k not in ('test_type', 'timestamp')}
+                self.append_test(user['id'], test.get('test_type'), test.get('timestamp'), **fields)
+                test_count += 1
+        return user_count, test_count
@@ -0,0 +1,192 @@
+"""
+스트룹 테스트 채점과 결과 저장 형식
+
+시행(trial) 데이터는 세션마다 한 벌만, 항목별 열(column) 배열로 저장합니다.
+
+    {
+        "summary": {...},
+        "scoring_version": "1",
+        "trials": {
+            "practice": {"word": [...], "color": [...], "user_response": [...], ...},
+            "test": {"word": [...], "color": [...], "user_response": [...], "response_time": [...], ...}
+        },
+        "client_data": {...}   # 원본 제출 데이터 중 시행 목록을 제외한 나머지
+    }
+
+이전 형식(detailed_data와 raw_data에 같은 시행 목록이 두 번 들어 있음)은 compact_result()로 변환하며,
+expand_result()로 이전 형식의 상세 보기를 다시 만들 수 있습니다.
+"""
+
+# 제출 시점 채점 규칙의 버전. 일괄 재채점(stroop_rescore.py) 결과는 다른 버전으로 따로 저장된다.
+SCORING_VERSION = "1"
+
+PHASES = ("practice", "test")
+
+
+def pack_trials(trials):
+    """시행 목록을 {항목: [값, ...]} 열 배열로 바꿉니다. 없는 항목은 None으로 채웁니다."""
+    keys = []
+    for trial in trials:
+        for key in trial:
+            if key not in keys:
+                keys.append(key)
+    return {key: [trial.get(key) for trial in trials] for key in keys}
+
+
+def unpack_trials(columns):
+    """pack_trials()의 역변환"""
+    keys = list(columns)
+    count = len(columns[keys[0]]) if keys else 0
+    return [{key: columns[key][i] for key in keys} for i in range(count)]
+
+
+def is_compact(result):
+    return isinstance(result, dict) and 'trials' in result
+
+
+def get_trial_columns(result):
+    """저장된 스트룹 결과에서 (연습, 본 검사) 열 배열을 꺼냅니다."""
+    if is_compact(result):
+        return tuple(result['trials'].get(phase, {}) for phase in PHASES)
+    return tuple(pack_trials(trials) for trials in get_trials(result))
+
+
+def get_trials(result):
+    """저장된 스트룹 결과에서 (연습 문항, 본 검사 문항) 목록을 꺼냅니다. 두 저장 형식을 모두 읽습니다."""
+    if is_compact(result):
+        return tuple(unpack_trials(result['trials'].get(phase, {})) for phase in PHASES)
+    detailed = (result or {}).get('detailed_data') or (result or {}).get('raw_data') or {}
+    return detailed.get('practice_trials', []), detailed.get('test_trials', [])
+
+
+def compact_result(result):
+    """이전 형식의 결과를 열 배열 형식으로 바꿉니다. 이미 변환된 결과는 그대로 돌려줍니다."""
+    if is_compact(result) or not isinstance(result, dict):
+        return result
+    practice_trials, test_trials = get_trials(result)
+    raw_data = result.get('raw_data') or {}
+    return {
+        "summary": result.get('summary', {}),
+        "scoring_version": SCORING_VERSION,
+        "trials": {"practice": pack_trials(practice_trials), "test": pack_trials(test_trials)},
+        "client_data": {k: v for k, v in raw_data.items() if k not in ('practice_trials', 'test_trials')},
+    }
+
+
+def expand_result(result):
+    """열 배열 형식의 결과로 이전 형식의 상세 보기(detailed_data, raw_data)를 다시 만듭니다."""
+    if not is_compact(result):
+        return result
+    practice_trials, test_trials = get_trials(result)
+    raw_data = dict(result.get('client_data') or {}, practice_trials=practice_trials, test_trials=test_trials)
+    return {
+        "summary": result.get('summary', {}),
+        "detailed_data": {"practice_trials": practice_trials, "test_trials": test_trials},
+        "raw_data": raw_data,
+    }
+
+
+def score_trials(practice_trials, test_trials):
+    """연습/본 검사 시행 목록으로 요약 지표를 계산합니다. (제출 시점 채점 규칙, 버전 1)"""
+    # 연습 문항 분석
+    practice_failures = 0
+
+    for trial in practice_trials:
+        user_response = trial.get('user_response')
+        correct_answer = trial.get('correct_answer')
+
+        # 연습에서 실패한 경우 카운트 (정답과 다르게 응답한 경우)
+        if user_response != correct_answer:
+            practice_failures += 1
+
+    # 본 검사 분석
+    total_trials = len(test_trials)
+
+    if total_trials > 0:
+        # 평균 응답 시간 계산
+        total_response_time = sum(trial.get('response_time', 0) for trial in test_trials)
+        avg_response_time = total_response_time / total_trials
+
+        # 오답율 계산
+        incorrect_responses = 0
+        no_response_errors = 0  # 정답인데 미입력
+        false_positive_errors = 0  # 오답인데 입력
+
+        for trial in test_trials:
+            user_response = trial.get('user_response')
+            correct_answer = trial.get('correct_answer')
+
+            if user_response != correct_answer:
+                incorrect_responses += 1
+
+                # 세부 오답 유형 분류
+                if correct_answer and (user_response is False or user_response is None):
+                    no_response_errors += 1  # 정답인데 미입력
+                elif not correct_answer and user_response:
+                    false_positive_errors += 1  # 오답인데 입력
+
+        error_rate = (incorrect_responses / total_trials) * 100
+        no_response_error_rate = (no_response_errors / total_trials) * 100
+        false_positive_error_rate = (false_positive_errors / total_trials) * 100
+    else:
+        avg_response_time = 0
+        error_rate = 0
+        no_response_error_rate = 0
+        false_positive_error_rate = 0
+        incorrect_responses = 0
+        no_response_errors = 0
+        false_positive_errors = 0
+
+    return {
+        "practice_failures": practice_failures,
+        "total_practice_trials": len(practice_trials),
+        "total_test_trials": total_trials,
+        "avg_response_time_ms": round(avg_response_time, 2),
+        "overall_error_rate_percent": round(error_rate, 2),
+        "no_response_error_rate_percent": round(no_response_error_rate, 2),
+        "false_positive_error_rate_percent": round(false_positive_error_rate, 2),
+        "total_incorrect": incorrect_responses,
+        "no_response_errors": no_response_errors,
+        "false_positive_errors": false_positive_errors
+    }
+
+
+def process_stroop_result(raw_data):
+    """
+    스트룹 테스트 원본 데이터를 분석하여 정리된 결과 포맷으로 변환
+    
+    예상 입력 포맷:
+    {
+        "practice_trials": [
+            {"word": "빨강", "color": "blue", "user_response": true/false/null, "response_time": 1200, "correct_answer": false},
+            ...
+        ],
+        "test_trials": [
+            {"word": "파랑", "color": "red", "user_response": true/false/null, "response_time": 800, "correct_answer": false},
+            ...
+        ]
+    }
+    """
+    
+    try:
+        practice_trials = raw_data.get('practice_trials', [])
+        test_trials = raw_data.get('test_trials', [])
+        
+        # 정리된 결과 포맷
+        processed_result = {
+            "summary": score_trials(practice_trials, test_trials),
+            "scoring_version": SCORING_VERSION,
+            # 시행 데이터는 열 배열로 한 벌만 저장하고, 나머지 원본 데이터도 보존
+            "trials": {"practice": pack_trials(practice_trials), "test": pack_trials(test_trials)},
+            "client_data": {k: v for k, v in raw_data.items() if k not in ('practice_trials', 'test_trials')}
+        }
+        
+        return processed_result
+        
+    except Exception as e:
+        print(f"스트룹 결과 처리 중 오류: {str(e)}")
+        # 오류 발생 시 원본 데이터 반환
+        return {
+            "summary": {"processing_error": str(e)},
+            "raw_data": raw_data
+        }
@@ -0,0 +1,191 @@
+"""
+스트룹 결과 일괄 재채점
+
+저장된 세션들의 시행(trial) 데이터를 세션 번호와 함께 열(column) 배열로 모은 뒤,
+모든 세션의 요약 지표를 NumPy 벡터 연산으로 한 번에 계산합니다.
+채점 규칙을 바꾸면 새 버전 이름으로 요약을 다시 계산해 저장소의 summaries 로그에 추가합니다.
+(제출 시점에 저장된 원래 요약은 그대로 남습니다.)
+제출 시점에 채점하지 못해 원본만 남은 세션이나 시행 형식이 맞지 않는 세션은 건너뛰고 그 수를 알려 줍니다.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from stroop import PHASES, get_trial_columns, get_trials, is_compact
+
+# user_response / correct_answer 값 부호화: 참 1, 거짓 0, 미입력(None) -1
+NO_RESPONSE = -1
+
+
+def encode_responses(values):
+    """참/거짓/None 값 목록을 1/0/-1 int8 배열로 바꿉니다."""
+    if None not in values:
+        return np.array(values, dtype=np.int8)
+    return np.array([NO_RESPONSE if v is None else (1 if v else 0) for v in values], dtype=np.int8)
+
+
+def trial_columns(trial_lists):
+    """세션별 시행 목록을 (세션별 개수, 세션 번호, 응답, 정답, 응답 시간) 배열로 바꿉니다."""
+    counts = np.fromiter((len(trials) for trials in trial_lists), dtype=np.int64, count=len(trial_lists))
+    session = np.repeat(np.arange(len(trial_lists)), counts)
+    flat = [trial for trials in trial_lists for trial in trials]
+    response = encode_responses([t.get('user_response') for t in flat])
+    correct = encode_responses([t.get('correct_answer') for t in flat])
+    response_time = np.array([t.get('response_time') or 0 for t in flat], dtype=np.float64)
+    return counts, session, response, correct, response_time
+
+
+def _length(columns):
+    return len(next(iter(columns.values()))) if columns else 0
+
+
+def packed_columns(column_sets):
+    """저장된 열 배열 형식({항목: [값, ...]})의 세션 목록을 trial_columns()와 같은 배열 묶음으로 바꿉니다.
+
+    시행마다 dict를 거치지 않고 열 단위로 이어 붙이므로 trial_columns()보다 빠릅니다.
+    """
+    def concat(key):
+        values = []
+        for columns in column_sets:
+            column = columns.get(key)
+            values.extend(column if column is not None else [None] * _length(columns))
+        return values
+
+    counts = np.fromiter((_length(columns) for columns in column_sets), dtype=np.int64, count=len(column_sets))
+    session = np.repeat(np.arange(len(column_sets)), counts)
+    response = encode_responses(concat('user_response'))
+    correct = encode_responses(concat('correct_answer'))
+    response_time = np.array([value or 0 for value in concat('response_time')], dtype=np.float64)
+    return counts, session, response, correct, response_time
+
+
+def score_sessions(sessions, rt_cutoff_ms=None):
+    """
+    (연습 문항, 본 검사 문항) 쌍의 목록을 받아 세션별 요약 dict 목록을 돌려줍니다.
+
+    rt_cutoff_ms를 주면 그보다 늦게 누른 응답은 누르지 않은 것으로 처리합니다.
+    규칙을 바꾸지 않으면 process_stroop_result()의 요약과 같은 값을 냅니다.
+    """
+    if not sessions:
+        return []
+    return score_columns(trial_columns([practice for practice, _ in sessions]),
+                         trial_columns([test for _, test in sessions]), rt_cutoff_ms)
+
+
+def score_columns(practice_columns, test_columns, rt_cutoff_ms=None):
+    """trial_columns()로 만든 연습/본 검사 열 배열로 세션별 요약을 계산합니다."""
+    practice_counts, practice_session, practice_response, practice_correct, _ = practice_columns
+    counts, session, response, correct, response_time = test_columns
+    n = len(counts)
+
+    if rt_cutoff_ms is not None:
+        # 늦게 누른 응답만 바꾼다. 누르지 않은 시행의 응답 시간은 제한 시간에 가까우므로 건드리지 않는다.
+        response = np.where((response == 1) & (response_time > rt_cutoff_ms), np.int8(0), response)
+
+    practice_failures = np.bincount(practice_session, weights=practice_response != practice_correct, minlength=n)
+    incorrect = response != correct
+    no_response = incorrect & (correct == 1) & (response != 1)
+    false_positive = incorrect & (correct != 1) & (response == 1)
+
+    def per_session(values):
+        return np.bincount(session, weights=values, minlength=n)
+
+    total_incorrect = per_session(incorrect)
+    no_response_errors = per_session(no_response)
+    false_positive_errors = per_session(false_positive)
+    total_response_time = per_session(response_time)
+
+    has_trials = counts > 0
+    safe_counts = np.where(has_trials, counts, 1)
+
+    def rate(values):
+        return np.where(has_trials, values / safe_counts * 100, 0.0)
+
+    avg_response_time = np.where(has_trials, total_response_time / safe_counts, 0.0)
+    error_rate = rate(total_incorrect)
+    no_response_rate = rate(no_response_errors)
+    false_positive_rate = rate(false_positive_errors)
+
+    return [{
+        "practice_failures": int(practice_failures[i]),
+        "total_practice_trials": int(practice_counts[i]),
+        "total_test_trials": int(counts[i]),
+        "avg_response_time_ms": round(float(avg_response_time[i]), 2),
+        "overall_error_rate_percent": round(float(error_rate[i]), 2),
+        "no_response_error_rate_percent": round(float(no_response_rate[i]), 2),
+        "false_positive_error_rate_percent": round(float(false_positive_rate[i]), 2),
+        "total_incorrect": int(total_incorrect[i]),
+        "no_response_errors": int(no_response_errors[i]),
+        "false_positive_errors": int(false_positive_errors[i]),
+    } for i in range(n)]
+
+
+def stored_columns(result):
+    """
+    저장된 스트룹 결과의 (연습, 본 검사) 열 배열. 재채점할 수 없는 결과면 None.
+
+    채점 오류(summary의 processing_error)로 원본만 남은 결과, 객체가 아닌 시행이 있는 이전 형식 결과,
+    열 길이가 서로 다른 열 배열은 재채점할 수 없습니다.
+    """
+    if not isinstance(result, dict):
+        return None
+    summary = result.get('summary')
+    if isinstance(summary, dict) and 'processing_error' in summary:
+        return None
+    if not is_compact(result):
+        try:
+            trial_lists = get_trials(result)
+        except AttributeError:  # detailed_data/raw_data가 객체가 아님
+            return None
+        if not all(isinstance(trials, list) and all(isinstance(trial, dict) for trial in trials)
+                   for trials in trial_lists):
+            return None
+    elif not isinstance(result['trials'], dict) or not all(
+            isinstance(result['trials'].get(phase, {}), dict) for phase in PHASES):
+        return None
+    column_sets = get_trial_columns(result)
+    for columns in column_sets:
+        if not all(isinstance(values, list) for values in columns.values()) or \
+                len({len(values) for values in columns.values()}) > 1:
+            return None
+    return column_sets
+
+
+def rescore_store(store, version, rt_cutoff_ms=None, batch_size=1000, dry_run=False):
+    """
+    저장된 스트룹 세션 전체를 batch_size개씩 재채점해 버전별 요약으로 저장합니다.
+
+    (재채점한 세션 수, 건너뛴 세션 수)를 돌려줍니다. 재채점할 수 없는 세션(stored_columns())은 건너뜁니다.
+    """
+    rules = {"rt_cutoff_ms": rt_cutoff_ms}
+    scored_at = datetime.now().isoformat()
+    total = skipped = 0
+    batch = []
+    column_sets = []
+
+    def flush():
+        summaries = score_columns(packed_columns([practice for practice, _ in column_sets]),
+                                  packed_columns([test for _, test in column_sets]), rt_cutoff_ms)
+        if not dry_run:
+            store.append_summaries([
+                {"test_id": test['id'], "version": version, "rules": rules,
+                 "scored_at": scored_at, "summary": summary}
+                for test, summary in zip(batch, summaries)
+            ])
+        batch.clear()
+        column_sets.clear()
+
+    for test in store.iter_tests(test_type='stroop'):
+        columns = stored_columns(test.get('result'))
+        if columns is None:
+            print(f"재채점할 수 없는 스트룹 세션을 건너뜁니다: {test.get('id')}")
+            skipped += 1
+            continue
+        batch.append(test)
+        column_sets.append(columns)
+        total += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return total, skipped
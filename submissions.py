@@ -0,0 +1,146 @@
+"""
+결과 제출 중복 방지 기록
+
+클라이언트는 제출 한 건마다 submission ID를 만들어 X-Submission-ID 헤더로 보내고,
+응답을 받지 못해 다시 보낼 때도 같은 ID를 씁니다. 서버는 처리한 제출의 응답을 기록해 두었다가
+같은 ID가 다시 오면 다시 저장하지 않고 기록된 응답을 돌려줍니다.
+
+- sqlite : instance 폴더의 SQLite 파일. 여러 gunicorn 워커가 함께 씁니다. (기본값)
+- memory : 프로세스 메모리. 단일 프로세스 개발 서버용입니다.
+
+기록은 최대 max_entries건, ttl초까지만 보관합니다.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cooperative
+
+# 처리 중(응답 없음)으로 남은 기록을 버려진 것으로 보는 시간 (초). 요청 처리 중 워커가 죽은 경우 대비
+PENDING_TIMEOUT = 30
+# 오래된 기록을 정리하는 주기 (기록 횟수 기준)
+PURGE_EVERY = 200
+
+NEW, PENDING, DONE = 'new', 'pending', 'done'
+
+
+class MemorySubmissionLog:
+    """프로세스 메모리 제출 기록 (LRU)"""
+
+    def __init__(self, max_entries=10000, ttl=86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._items = OrderedDict()   # key -> (created, status, body) / 처리 중이면 status None
+        self._lock = threading.Lock()
+        self.stats = {"new": 0, "replayed": 0, "pending": 0}
+
+    def begin(self, key):
+        """(NEW | PENDING | DONE, (status, body))를 돌려줍니다. NEW면 처리 중으로 표시해 둡니다."""
+        now = time.time()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] >= now - self.ttl:
+                created, status, body = item
+                if status is not None:
+                    self._items.move_to_end(key)
+                    self.stats["replayed"] += 1
+                    return DONE, (status, body)
+                if created >= now - PENDING_TIMEOUT:
+                    self.stats["pending"] += 1
+                    return PENDING, None
+            self._items[key] = (now, None, None)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+            self.stats["new"] += 1
+            return NEW, None
+
+    def finish(self, key, status, body):
+        with self._lock:
+            self._items[key] = (time.time(), status, body)
+
+    def abort(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SqliteSubmissionLog:
+    """SQLite 제출 기록. 워커(프로세스)와 스레드마다 연결을 따로 엽니다. (gevent 워커에서는 요청들이 함께 씀)"""
+
+    def __init__(self, path, max_entries=10000, ttl=86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = cooperative.thread_local()
+        self._begins = 0
+        self.stats = {"new": 0, "replayed": 0, "pending": 0}
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = cooperative.sqlite_connect(self.path)
+            cooperative.sqlite_execute(conn, "PRAGMA journal_mode=WAL")
+            cooperative.sqlite_execute(conn, "PRAGMA synchronous=NORMAL")
+            cooperative.sqlite_execute(conn, "CREATE TABLE IF NOT EXISTS submissions ("
+                                       "key TEXT PRIMARY KEY, created REAL NOT NULL, status INTEGER, body BLOB)")
+            cooperative.sqlite_execute(conn, "CREATE INDEX IF NOT EXISTS ix_submissions_created "
+                                             "ON submissions (created)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _execute(self, sql, params=()):
+        return cooperative.sqlite_execute(self._connect(), sql, params)
+
+    def begin(self, key):
+        """MemorySubmissionLog.begin()과 같습니다. 같은 ID가 동시에 와도 한 요청만 NEW를 받습니다."""
+        conn = self._connect()
+        now = time.time()
+        cooperative.sqlite_execute(conn, "BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT created, status, body FROM submissions WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] >= now - self.ttl:
+                created, status, body = row
+                if status is not None:
+                    self.stats["replayed"] += 1
+                    return DONE, (status, body)
+                if created >= now - PENDING_TIMEOUT:
+                    self.stats["pending"] += 1
+                    return PENDING, None
+            conn.execute("INSERT OR REPLACE INTO submissions (key, created, status, body) VALUES (?, ?, NULL, NULL)",
+                         (key, now))
+            self.stats["new"] += 1
+            return NEW, None
+        finally:
+            conn.execute("COMMIT")
+            self._begins += 1
+            if self._begins % PURGE_EVERY == 0:
+                self.purge()
+
+    def finish(self, key, status, body):
+        self._execute("UPDATE submissions SET created = ?, status = ?, body = ? WHERE key = ?",
+                      (time.time(), status, body, key))
+
+    def abort(self, key):
+        self._execute("DELETE FROM submissions WHERE key = ? AND status IS NULL", (key,))
+
+    def purge(self):
+        """보관 기간이 지났거나 max_entries를 넘는 오래된 기록을 지웁니다."""
+        self._execute("DELETE FROM submissions WHERE created < ?", (time.time() - self.ttl,))
+        self._execute("DELETE FROM submissions WHERE key IN "
+                      "(SELECT key FROM submissions ORDER BY created DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def __len__(self):
+        return self._execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+
+def make_submission_log(name, instance_folder):
+    if name == 'sqlite':
+        return SqliteSubmissionLog(os.path.join(instance_folder, 'submissions.sqlite3'))
+    if name == 'memory':
+        return MemorySubmissionLog()
+    raise ValueError(f"알 수 없는 제출 기록 저장소: {name}")
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def sql_app(tmp_path):
+    """임시 SQLite DB에 스키마를 만든 Flask 앱 컨텍스트"""
+    from flask import Flask
+    from models import db
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'results.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """임시 instance 폴더를 쓰는 app 모듈. 결과는 요청 안에서 바로 저장합니다. (INGEST_MODE=sync)"""
+    os.environ.update(INSTANCE_FOLDER=str(tmp_path_factory.mktemp('instance')), INGEST_MODE='sync',
+                      SESSION_BACKEND='memory', SUBMISSION_LOG='memory')
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    """참가자 등록(start-test)까지 마친 test client"""
+    client = app_module.app.test_client()
+    client.post('/start-test', data={'name': f"참가자-{os.urandom(4).hex()}", 'age': '70', 'gender': 'female'})
+    return client
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from ingest import IngestQueue
+from storage import ResultStore
+
+
+def build_record(entry):
+    if entry['payload'].get('broken'):
+        raise ValueError("채점할 수 없는 결과")
+    return {"id": entry['id'], "user_id": entry['user_id'], "test_type": entry['test_type'],
+            "timestamp": entry['timestamp'], "result": entry['payload']}
+
+
+def open_queue(root, store):
+    queue = IngestQueue(str(root / 'ingest'), store, build_record, fsync=False)
+    queue.start = lambda: None   # 처리 스레드 없이 drain()을 직접 부른다.
+    return queue
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / 'store'), fsync=False)
+
+
+def test_replay_after_crash_before_checkpoint(tmp_path, store, monkeypatch):
+    queue = open_queue(tmp_path, store)
+    ids = [queue.submit('u1', 'card_matching', {"total_clicks": n}) for n in range(3)]
+
+    def crash(offset):
+        raise OSError("checkpoint를 쓰기 전에 멈춤")
+    monkeypatch.setattr(queue, '_write_checkpoint', crash)
+    with pytest.raises(OSError):
+        queue.drain()
+    assert queue.pending_bytes() > 0
+
+    # 다시 시작한 워커는 저널을 처음부터 다시 처리하지만 이미 저장한 id는 건너뛴다.
+    restarted = open_queue(tmp_path, store)
+    assert restarted.drain() == 3
+    assert restarted.pending_bytes() == 0
+    assert sorted(test['id'] for test in store.iter_tests()) == sorted(ids)
+
+
+def test_duplicate_entries_are_stored_once(tmp_path, store):
+    queue = open_queue(tmp_path, store)
+    first = queue.submit('u1', 'pattern', {"total_score": 3}, entry_id='a' * 32)
+    again = queue.submit('u1', 'pattern', {"total_score": 3}, entry_id='a' * 32)
+    queue.submit('u2', 'pattern', {"total_score": 1})
+    assert first == again
+    assert [entry['id'] for entry in queue.pending_entries('u1')] == [first]
+
+    queue.drain()
+    assert queue.pending_entries('u1') == []
+    assert [test['id'] for test in store.user_tests('u1')] == [first]
+
+
+def test_failed_and_partial_lines(tmp_path, store):
+    queue = open_queue(tmp_path, store)
+    good = queue.submit('u1', 'card_matching', {"total_clicks": 1})
+    queue.submit('u1', 'card_matching', {"broken": True})
+    with open(queue.journal_path, 'ab') as f:
+        f.write(b'{"id": "half')   # 쓰는 도중에 멈춘 줄
+
+    assert queue.drain() == 1
+    assert [test['id'] for test in store.iter_tests()] == [good]
+    with open(queue.failed_path, encoding='utf-8') as f:
+        assert [json.loads(line)['error'] for line in f] == ["채점할 수 없는 결과"]
+    # 덜 쓴 줄은 처리하지 않고 남겨 두므로 저널을 비우지 않는다.
+    assert queue.pending_bytes() == len(b'{"id": "half')
+
+    late = queue.submit('u1', 'card_matching', {"total_clicks": 2})
+    queue.drain()
+    assert store.get_test(late) is not None
+    assert queue.stats['failed'] == 2
@@ -0,0 +1,116 @@
+from sqlalchemy import insert
+
+from aggregates import CohortAggregates
+from longitudinal import ParticipantSummaries
+import models
+from models import db
+import sql_store
+from sql_store import SqlResultStore
+
+
+def open_store():
+    store = SqlResultStore()
+    summaries = ParticipantSummaries()
+    store.subscribe(CohortAggregates())
+    store.subscribe(summaries)
+    store.refresh()
+    return store, summaries
+
+
+def insert_session(seq, user_id, test_type='sequence'):
+    """seq를 정해 넣고 커밋합니다. (먼저 시작한 트랜잭션이 나중에 커밋된 경우를 흉내 냄)"""
+    db.session.execute(insert(models.TestSession).values(
+        seq=seq, id=f"{seq:032x}", participant_id=user_id, test_type=test_type,
+        timestamp='2026-10-01T10:00:00', data={"final_level": 3}))
+    db.session.commit()
+
+
+def test_refresh_picks_up_lower_seq_committed_later(sql_app):
+    store, summaries = open_store()
+    user = store.add_user('가', '70', 'female')
+    insert_session(1, user['id'])
+    insert_session(3, user['id'])
+    store.refresh()
+    assert summaries.session_counts(user['id']) == {'sequence': 2}
+
+    insert_session(2, user['id'], 'card_matching')   # seq 2가 3보다 늦게 커밋됨
+    store.refresh()
+    assert summaries.session_counts(user['id']) == {'sequence': 2, 'card_matching': 1}
+    store.refresh()
+    assert summaries.session_counts(user['id']) == {'sequence': 2, 'card_matching': 1}
+
+
+def test_checkpoint_keeps_pending_gaps(sql_app):
+    store, _ = open_store()
+    user = store.add_user('나', '71', 'male')
+    insert_session(1, user['id'])
+    insert_session(3, user['id'])
+    store.refresh()
+    store.save_checkpoint()
+
+    insert_session(2, user['id'])
+    restarted, summaries = open_store()
+    assert summaries.session_counts(user['id']) == {'sequence': 3}
+
+
+def test_gaps_expire(sql_app, monkeypatch):
+    store, _ = open_store()
+    user = store.add_user('다', '72', 'male')
+    insert_session(1, user['id'])
+    insert_session(5, user['id'])
+    store.refresh()
+    assert store.cache_stats()['pending_gaps'] == 3
+    monkeypatch.setattr(sql_store, 'GAP_TIMEOUT', 0)
+    store.refresh()
+    assert store.cache_stats()['pending_gaps'] == 0
+
+
+def test_compact_reports_old_years_and_index_plan(sql_app):
+    from datetime import date
+    store = SqlResultStore()
+    user = store.add_user('가', '70', 'female')
+    for year in (2023, 2023, 2024, 2026):
+        store.append_test(user['id'], 'stroop', f'{year}-03-01T10:00:00', result={"summary": {}})
+    result = store.compact(keep_months=3, today=date(2026, 10, 1))
+    assert result['rolled_up'] == {'2023': 2, '2024': 1}
+    assert any('ix_test_sessions_type_timestamp' in line for line in result['plan'])
+
+
+def test_archive_moves_old_trials_and_loads_them_back(sql_app):
+    from datetime import date
+    from stroop import process_stroop_result
+    store = SqlResultStore(batch_size=1)
+    user = store.add_user('가', '70', 'female')
+    trial = {"round": 1, "trial_number": 1, "word": "빨강", "color": "red",
+             "user_response": True, "response_time": 812.5, "correct_answer": True, "is_correct": True}
+    old_stroop = store.append_test(user['id'], 'stroop', '2023-03-01T10:00:00',
+                                   result=process_stroop_result({"practice_trials": [trial], "test_trials": [trial] * 2}))
+    old_sequence = store.append_test(user['id'], 'sequence', '2023-04-01T10:00:00', final_level=2,
+                                     history=[{"level": 1, "correct": True, "user_answer": [1], "correct_answer": [1],
+                                               "time_taken": 1.5, "hint": "x"}])
+    recent = store.append_test(user['id'], 'sequence', '2026-09-01T10:00:00', final_level=1,
+                               history=[{"level": 1, "correct": False, "user_answer": [2], "correct_answer": [1],
+                                         "time_taken": 2.0}])
+    before = {test['id']: test for test in store.iter_tests()}
+
+    result = store.archive(older_than_months=12, today=date(2026, 10, 1), max_sessions=1)
+    assert result['archived'] == {'2023': 1} and result['remaining'] == 1
+    result = store.archive(older_than_months=12, today=date(2026, 10, 1))
+    assert result['archived'] == {'2023': 1} and result['remaining'] == 0
+    assert result['bytes_after'] > 0
+
+    assert db.session.query(models.ArchivedTrials).count() == 2
+    assert db.session.query(models.StroopTrial).count() == 0
+    assert db.session.query(models.SequenceTrial).count() == len(recent['history'])
+    assert {test['id']: test for test in store.iter_tests()} == before
+    assert store.get_test(old_stroop['id']) == before[old_stroop['id']]
+    assert store.get_test(old_sequence['id'])['history'] == old_sequence['history']
+    assert store.rewrite_tests(lambda record: record) == (0, 3)
+
+    def bump(record):
+        if record['id'] == old_sequence['id']:
+            record['final_level'] = 3
+        return record
+    assert store.rewrite_tests(bump) == (1, 3)
+    assert db.session.query(models.ArchivedTrials).count() == 1
+    assert store.get_test(old_sequence['id'])['history'] == old_sequence['history']
@@ -0,0 +1,107 @@
+from datetime import date
+
+import pytest
+
+from longitudinal import ParticipantSummaries
+from storage import ResultStore
+
+TODAY = date(2026, 10, 1)
+
+
+class CountingSummaries(ParticipantSummaries):
+    """구독자에게 전달된 레코드 수를 세는 참가자 요약"""
+
+    def reset(self):
+        super().reset()
+        self.added = 0
+
+    def add(self, test, participant):
+        self.added += 1
+        super().add(test, participant)
+
+
+def open_store(root):
+    store = ResultStore(str(root), fsync=False)
+    summaries = CountingSummaries()
+    store.subscribe(summaries)
+    store.refresh()
+    return store, summaries
+
+
+def history(level):
+    return [{"level": level, "correct": True, "user_answer": [1, 2], "correct_answer": [1, 2], "time_taken": 1.5}]
+
+
+@pytest.fixture
+def filled(tmp_path):
+    """2023년 세션 3건과 최근 세션 1건이 있는 저장소"""
+    store, _ = open_store(tmp_path)
+    user = store.add_user('가', '70', 'female')
+    tests = [store.append_test(user['id'], 'sequence', timestamp, final_level=level, history=history(level))
+             for level, timestamp in enumerate(['2023-01-05T10:00:00', '2023-06-05T10:00:00',
+                                                '2023-06-20T10:00:00', '2026-09-01T10:00:00'], 1)]
+    return tmp_path, user, tests
+
+
+def test_append_is_visible_to_other_instance(filled):
+    root, user, tests = filled
+    writer, _ = open_store(root)
+    reader, summaries = open_store(root)
+    assert summaries.session_counts(user['id']) == {'sequence': 4}
+
+    new = writer.append_test(user['id'], 'card_matching', '2026-09-02T10:00:00', total_clicks=20)
+    reader.refresh()
+    assert reader.get_test(new['id']) == new
+    assert summaries.session_counts(user['id']) == {'sequence': 4, 'card_matching': 1}
+    assert [test['id'] for test in reader.user_tests(user['id'])] == [test['id'] for test in tests] + [new['id']]
+
+
+def test_checkpoint_restore_replays_only_newer_records(filled):
+    root, user, _ = filled
+    store, _ = open_store(root)
+    store.save_checkpoint()
+    store.append_test(user['id'], 'sequence', '2026-09-03T10:00:00', final_level=5, history=history(5))
+
+    restored, summaries = open_store(root)
+    assert summaries.added == 1
+    assert summaries.session_counts(user['id']) == {'sequence': 5}
+
+
+def test_checkpoint_is_discarded_after_compact(filled):
+    root, user, tests = filled
+    store, _ = open_store(root)
+    store.save_checkpoint()
+    result = store.compact(keep_months=3, today=TODAY)
+    assert result['rolled_up'] == {'2023': 3}
+
+    restored, summaries = open_store(root)
+    assert summaries.added == 4
+    assert summaries.session_counts(user['id']) == {'sequence': 4}
+    assert [test['id'] for test in restored.iter_tests()] == [test['id'] for test in tests]
+
+    # 합치기 전부터 열려 있던 저장소도 다시 읽은 뒤 같은 결과를 본다.
+    store.refresh()
+    assert store.get_test(tests[0]['id']) == tests[0]
+
+
+def test_archive_keeps_records_readable_and_counts_once(filled):
+    root, user, tests = filled
+    store, live = open_store(root)
+    store.save_checkpoint()
+    result = store.archive(older_than_months=12, today=TODAY)
+    assert sum(result['archived'].values()) == 3 and result['remaining'] == 0
+
+    store.refresh()
+    assert live.session_counts(user['id']) == {'sequence': 4}
+    restored, summaries = open_store(root)
+    assert summaries.session_counts(user['id']) == {'sequence': 4}
+    for test in tests:
+        assert restored.get_test(test['id']) == test
+    restored.save_checkpoint()
+
+    # 보관 뒤에 쓴 체크포인트에서 되살리면 새 레코드만 전달한다.
+    restored.append_test(user['id'], 'sequence', '2026-09-04T10:00:00', final_level=6, history=history(6))
+    again, summaries = open_store(root)
+    assert summaries.added == 1
+    assert summaries.session_counts(user['id']) == {'sequence': 5}
+    assert [test['id'] for test in again.iter_tests(date_to='2023-12-31')] == [test['id'] for test in tests[:3]]
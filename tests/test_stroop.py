@@ -0,0 +1,78 @@
+import pytest
+
+TRIAL = {"round": 1, "word": "빨강", "color": "blue-600", "user_response": True,
+         "response_time": 800, "correct_answer": False, "is_correct": False}
+
+
+@pytest.mark.parametrize('payload', [
+    {"practice_trials": [1], "test_trials": ["x"]},
+    {"practice_trials": [], "test_trials": [TRIAL, None]},
+    {"practice_trials": "x", "test_trials": []},
+    [TRIAL],
+])
+def test_submit_rejects_non_dict_trials(app_module, client, payload):
+    tests_before = sum(1 for _ in app_module.store.iter_tests('stroop'))
+    response = client.post('/api/submit-stroop-result', json=payload)
+    assert response.status_code == 400
+    assert sum(1 for _ in app_module.store.iter_tests('stroop')) == tests_before
+
+
+def test_submit_accepts_trials(app_module, client):
+    response = client.post('/api/submit-stroop-result', json={"practice_trials": [TRIAL], "test_trials": [TRIAL] * 3})
+    assert response.status_code == 200
+
+
+def stroop_record(user_id, payload, day):
+    from stroop import process_stroop_result
+    import uuid
+    return {"id": uuid.uuid4().hex, "user_id": user_id, "test_type": "stroop",
+            "timestamp": f"2026-09-{day:02d}T10:00:00", "result": process_stroop_result(payload)}
+
+
+@pytest.fixture
+def malformed_store(tmp_path):
+    """정상 스트룹 결과 사이에 채점 오류 레코드(원본만 남은 결과)와 잘못된 시행이 섞인 저장소"""
+    from storage import ResultStore
+    store = ResultStore(str(tmp_path / 'store'), fsync=False)
+    user = store.add_user('스트룹', '70', 'female')
+    good = [stroop_record(user['id'], {"practice_trials": [TRIAL], "test_trials": [TRIAL] * 2}, day)
+            for day in (1, 3)]
+    bad = stroop_record(user['id'], {"practice_trials": [1], "test_trials": ["x"]}, 2)
+    assert 'processing_error' in bad['result']['summary']
+    # 이전 형식(raw_data) 결과에 객체가 아닌 시행이 섞인 경우
+    legacy = dict(stroop_record(user['id'], {}, 4), result={"summary": {}, "raw_data": {"test_trials": [TRIAL, 3]}})
+    store.append_tests([good[0], bad, good[1], legacy])
+    return store, good, bad
+
+
+def test_export_skips_malformed_stroop_records(malformed_store):
+    import exporters
+    from collections import Counter
+    store, good, bad = malformed_store
+    skipped = Counter()
+    rows = list(exporters.iter_rows(store, 'stroop', skipped=skipped))
+    ids = [row['test_id'] for row in rows]
+    assert ids.count(good[0]['id']) == 3 and ids.count(good[1]['id']) == 3
+    assert bad['id'] not in ids
+    assert skipped == Counter(records=1, trials=1)
+
+
+def test_export_csv_streams_past_malformed_record(app_module, malformed_store):
+    store, good, _ = malformed_store
+    original, app_module.store = app_module.store, store
+    try:
+        response = app_module.app.test_client().get(f'/export/stroop.csv?pw={app_module.ADMIN_PASSWORD}')
+        body = response.get_data(as_text=True)
+    finally:
+        app_module.store = original
+    assert response.status_code == 200
+    assert body.count(good[1]['id']) == 3
+
+
+def test_rescore_skips_malformed_stroop_sessions(malformed_store):
+    from stroop_rescore import rescore_store
+    store, good, bad = malformed_store
+    assert rescore_store(store, 'v2', batch_size=1) == (2, 2)
+    store.refresh()
+    assert all('v2' in store.summaries(test['id']) for test in good)
+    assert store.summaries(bad['id']) == {}
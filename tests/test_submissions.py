@@ -0,0 +1,78 @@
+CARD_RESULT = [{"level": 1, "total_clicks": 12}]
+
+
+def participant_id(client):
+    with client.session_transaction() as session:
+        return session['participant_id']
+
+
+def stored(app_module, client, test_type):
+    return [test for test in app_module.store.user_tests(participant_id(client)) if test['test_type'] == test_type]
+
+
+def test_same_submission_id_is_stored_once(app_module, client):
+    headers = {'X-Submission-ID': 'card-1'}
+    first = client.post('/api/submit-card-result', json=CARD_RESULT, headers=headers)
+    again = client.post('/api/submit-card-result', json=CARD_RESULT, headers=headers)
+    assert first.status_code == again.status_code == 200
+    assert again.get_data() == first.get_data()
+    assert len(stored(app_module, client, 'card_matching')) == 1
+
+
+def test_submission_in_flight_gets_409(app_module, client):
+    key = f"submit_card_result:{participant_id(client)}:card-2"
+    app_module.submission_log.begin(key)   # 처음 요청이 아직 처리 중
+    response = client.post('/api/submit-card-result', json=CARD_RESULT, headers={'X-Submission-ID': 'card-2'})
+    assert response.status_code == 409
+    assert stored(app_module, client, 'card_matching') == []
+
+    app_module.submission_log.abort(key)
+    response = client.post('/api/submit-card-result', json=CARD_RESULT, headers={'X-Submission-ID': 'card-2'})
+    assert response.status_code == 200
+    assert len(stored(app_module, client, 'card_matching')) == 1
+
+
+def test_rejected_submission_is_not_recorded(app_module, client):
+    headers = {'X-Submission-ID': 'card-3'}
+    assert client.post('/api/submit-card-result', json={"level": 1}, headers=headers).status_code == 400
+    assert client.post('/api/submit-card-result', json=CARD_RESULT, headers=headers).status_code == 200
+    assert len(stored(app_module, client, 'card_matching')) == 1
+
+
+def level(number, score):
+    return {"level": number, "score": score, "total_problems": 5, "times": [1.2, 0.8]}
+
+
+def test_pattern_levels_are_buffered_until_final(app_module, client):
+    assert client.post('/api/submit-pattern-result', json=level(1, 2)).get_json() == {"status": "buffered", "levels": 1}
+    assert client.post('/api/submit-pattern-result', json=level(2, 1)).get_json()['levels'] == 2
+    # 같은 레벨을 다시 보내면 새 결과로 바꾼다.
+    assert client.post('/api/submit-pattern-result', json=level(2, 4)).get_json()['levels'] == 2
+    assert stored(app_module, client, 'pattern') == []
+
+    response = client.post('/api/submit-pattern-result', json=level(app_module.PATTERN_MAX_LEVEL, 5))
+    assert response.get_json()['status'] == 'success'
+    [test] = stored(app_module, client, 'pattern')
+    assert [item['level'] for item in test['result']['levels']] == [1, 2, 3]
+    assert test['result']['total_score'] == 2 + 4 + 5
+    assert test['result']['total_problems'] == 15
+
+    # 모은 결과는 저장 뒤 비워지므로 final만 다시 보내도 새로 저장하지 않는다.
+    assert client.post('/api/submit-pattern-result', json={"final": True}).get_json()['status'] == 'success'
+    assert len(stored(app_module, client, 'pattern')) == 1
+
+
+def test_pattern_final_flag_submits_partial_levels(app_module, client):
+    client.post('/api/submit-pattern-result', json=level(1, 3))
+    response = client.post('/api/submit-pattern-result', json=dict(level(2, 2), final=True))
+    assert response.get_json()['status'] == 'success'
+    [test] = stored(app_module, client, 'pattern')
+    assert test['result']['total_score'] == 5
+
+
+def test_pattern_rejects_malformed_level(app_module, client):
+    response = client.post('/api/submit-pattern-result', json=dict(level(1, 2), times=["1.2"]))
+    assert response.status_code == 400
+    response = client.post('/api/submit-pattern-result', json=dict(level(1, 2), score="2"))
+    assert response.status_code == 400
+    assert stored(app_module, client, 'pattern') == []